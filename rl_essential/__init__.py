@@ -0,0 +1,40 @@
+"""RL + MCTS sandbox for RNA folding.
+
+Top-level names resolve on first access, so `import rl_essential` costs nothing and
+only the energy/env/tabular code a script touches gets loaded. torch is pulled in
+by the network paths (learners, networks, PUCT search) and matplotlib by plotting.
+"""
+from importlib import import_module
+
+_LAZY = {
+    "RNARLEnv": ".env",
+    "StepResult": ".env",
+    "TurnerEnergyModel": ".energy",
+    "DoubleQ": ".agents.double_q",
+    "DenseDoubleQ": ".agents.dense_double_q",
+    "load_q_table": ".agents.q_checkpoint",
+    "MFEFolder": ".mfe",
+    "mfe_fold": ".mfe",
+    "Folder": ".folding",
+    "read_records": ".dataset",
+    "SequenceDataset": ".dataset",
+    "PUCT": ".mcts",
+    "AlphaZeroTrainer": ".learners.az_trainers",
+    "plot_rainbow": ".utils.visualizer",
+    "write_rainbow_svg": ".utils.svg",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(import_module(_LAZY[name], __name__), name)
+        globals()[name] = value  # later lookups skip __getattr__
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
+__all__ = list(_LAZY)
@@ -0,0 +1,7 @@
+from .double_q import DoubleQ, hash_state
+from .dense_double_q import DenseDoubleQ, run_batched_episodes
+from .q_checkpoint import CompactQTable, load_q_table, save_q_tables
+
+
+__all__ = ["DoubleQ", "hash_state", "DenseDoubleQ", "run_batched_episodes",
+           "CompactQTable", "load_q_table", "save_q_tables"]
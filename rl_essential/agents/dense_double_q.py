@@ -0,0 +1,158 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from .double_q import hash_state
+
+Action = Tuple[str, Optional[int]]
+
+
+class DenseDoubleQ:
+    """Array-backed Double Q-learning.
+
+    Q1/Q2 are dense float32 arrays [state_id, j]: rows come from a hash_state -> id map,
+    columns are the j of ("pair", j). Greedy choice is an argmax over a legal-action mask,
+    so act/update also run on whole batches of transitions (see run_batched_episodes).
+    act/update keep the DoubleQ interface for single-episode loops.
+    """
+    def __init__(self, n_actions: int, alpha=0.1, gamma=0.99, eps=0.3, eps_min=0.05, eps_decay=0.999,
+                 alpha_decay=0.9995, seed: int | None = None, capacity: int = 1024):
+        self.n_actions = int(n_actions)
+        self.Q1 = np.zeros((capacity, self.n_actions), dtype=np.float32)
+        self.Q2 = np.zeros((capacity, self.n_actions), dtype=np.float32)
+        self.state_ids: Dict[tuple, int] = {}
+        self.alpha, self.gamma = alpha, gamma
+        self.eps, self.eps_min, self.eps_decay = eps, eps_min, eps_decay
+        self.alpha_decay = alpha_decay
+        self.rng = np.random.default_rng(seed)
+
+    # ---------- state ids ----------
+    def state_id(self, state) -> int:
+        hs = hash_state(state)
+        sid = self.state_ids.get(hs)
+        if sid is None:
+            sid = len(self.state_ids)
+            self.state_ids[hs] = sid
+            if sid >= self.Q1.shape[0]:
+                self._grow(2 * self.Q1.shape[0])
+        return sid
+
+    def state_id_batch(self, states) -> np.ndarray:
+        return np.fromiter((self.state_id(s) for s in states), dtype=np.int64, count=len(states))
+
+    def _grow(self, rows: int) -> None:
+        for name in ("Q1", "Q2"):
+            old = getattr(self, name)
+            new = np.zeros((rows, self.n_actions), dtype=np.float32)
+            new[:old.shape[0]] = old
+            setattr(self, name, new)
+
+    def _pad(self, masks: np.ndarray) -> np.ndarray:
+        masks = np.asarray(masks, dtype=bool)
+        if masks.shape[1] == self.n_actions:
+            return masks
+        out = np.zeros((masks.shape[0], self.n_actions), dtype=bool)
+        out[:, :masks.shape[1]] = masks
+        return out
+
+    def _mask(self, valid_actions: List[Action]) -> np.ndarray:
+        mask = np.zeros((1, self.n_actions), dtype=bool)
+        mask[0, [a[1] for a in valid_actions if a[1] is not None]] = True
+        return mask
+
+    # ---------- batched ----------
+    def act_batch(self, sids: np.ndarray, masks: np.ndarray) -> np.ndarray:
+        """Epsilon-greedy column j per row; -1 where no action is legal."""
+        masks = self._pad(masks)
+        q = self.Q1[sids] + self.Q2[sids]
+        q[~masks] = -np.inf
+        js = q.argmax(axis=1)
+        explore = self.rng.random(len(sids)) < self.eps
+        if explore.any():
+            r = self.rng.random((int(explore.sum()), self.n_actions))
+            r[~masks[explore]] = -1.0
+            js[explore] = r.argmax(axis=1)
+        js[~masks.any(axis=1)] = -1
+        return js
+
+    def update_batch(self, sids, js, rewards, next_sids, next_masks) -> None:
+        """One Double-Q update per transition; each picks Q1 or Q2 with a fair coin.
+        Targets are computed from the tables before any row of the batch is written."""
+        n = len(sids)
+        if n == 0:
+            return
+        next_masks = self._pad(next_masks)
+        rows = np.arange(n)
+        use_q1 = self.rng.random(n) < 0.5
+        qa, qb = self.Q1[next_sids], self.Q2[next_sids]
+        sel = np.where(use_q1[:, None], qa, qb)
+        ev = np.where(use_q1[:, None], qb, qa)
+        sel[~next_masks] = -np.inf
+        a_star = sel.argmax(axis=1)
+        bootstrap = np.where(next_masks.any(axis=1), ev[rows, a_star], 0.0)
+        target = np.asarray(rewards, dtype=np.float32) + self.gamma * bootstrap
+        for table, pick in ((self.Q1, use_q1), (self.Q2, ~use_q1)):
+            if not pick.any():
+                continue
+            # duplicate (s, j) cells in a batch move toward their mean target, not the sum
+            cell = sids[pick] * self.n_actions + js[pick]
+            uniq, inv = np.unique(cell, return_inverse=True)
+            mean_t = np.bincount(inv, weights=target[pick]) / np.bincount(inv)
+            flat = table.reshape(-1)
+            flat[uniq] += self.alpha * (mean_t - flat[uniq])
+        self.alpha = max(1e-4, self.alpha * self.alpha_decay ** n)
+        self.eps = max(self.eps_min, self.eps * self.eps_decay ** n)
+
+    # ---------- DoubleQ interface ----------
+    def act(self, state, valid_actions: List[Action]):
+        if not valid_actions:
+            return ("skip", None)
+        j = self.act_batch(np.array([self.state_id(state)]), self._mask(valid_actions))[0]
+        return ("pair", int(j))
+
+    def update(self, state, action, reward, next_state, next_valid_actions):
+        self.update_batch(np.array([self.state_id(state)]), np.array([action[1]]), [reward],
+                          np.array([self.state_id(next_state)]), self._mask(next_valid_actions))
+
+    def save(self, path: str) -> None:
+        """Write the visited entries as a .qtab checkpoint readable by load_q_table."""
+        from .q_checkpoint import save_q_tables
+        Q1, Q2 = {}, {}
+        for hs, sid in self.state_ids.items():
+            for j in np.flatnonzero((self.Q1[sid] != 0) | (self.Q2[sid] != 0)):
+                Q1.setdefault(hs, {})[("pair", int(j))] = float(self.Q1[sid, j])
+                Q2.setdefault(hs, {})[("pair", int(j))] = float(self.Q2[sid, j])
+        save_q_tables(path, Q1, Q2)
+
+
+def run_batched_episodes(agent: DenseDoubleQ, vec_env, n_episodes: int):
+    """Train over n_episodes, keeping all of vec_env's envs busy and updating
+    the agent once per lockstep round. Returns [(return, final_info)] in finish order."""
+    B = vec_env.num_envs
+    states = vec_env.reset()
+    sids = agent.state_id_batch(states)
+    masks = vec_env.legal_masks()
+    active = np.arange(B) < n_episodes
+    started = int(active.sum())
+    returns = np.zeros(B, dtype=np.float64)
+    results = []
+    while active.any():
+        js = agent.act_batch(sids, masks)
+        js[~active] = -1
+        next_states, rewards, dones, infos = vec_env.step(js)
+        next_sids = agent.state_id_batch(next_states)
+        next_masks = vec_env.legal_masks()
+        upd = active & (js >= 0)  # no update for implicit skips, as in train_doubleq
+        agent.update_batch(sids[upd], js[upd], rewards[upd], next_sids[upd], next_masks[upd])
+        returns[active] += rewards[active]
+        for k in np.flatnonzero(active & dones):
+            results.append((float(returns[k]), infos[k]))
+            returns[k] = 0.0
+            if started < n_episodes:
+                next_sids[k] = agent.state_id(vec_env.reset(k))
+                next_masks[k, :vec_env.envs[k].n] = vec_env.envs[k].legal_mask()
+                started += 1
+            else:
+                active[k] = False
+        sids, masks = next_sids, next_masks
+    return results
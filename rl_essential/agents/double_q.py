@@ -5,42 +5,17 @@ import numpy as np
 
 Action = Tuple[str, Optional[int]]
 
-class DoubleQ:
-    # Add these guards inside your DoubleQ class.
 
-    def act(self, state, actions):
-        # If no legal actions, return a harmless dummy; env will auto-advance.
-        if not actions:
-            return ("pair", None)
-        import random
-        if random.random() < self.eps:
-            return random.choice(actions)
-        hs = self._hash_state(state)
-        # Greedy on Q1+Q2
-        return max(actions, key=lambda a: self.Q1[hs][a] + self.Q2[hs][a])
+def hash_state(state) -> tuple:
+    """Coarse tabular key for (i, pairing): (i, #pairs, fraction of max pairs)."""
+    i, pairing = state
+    paired_count = sum(1 for p in pairing if p != -1) // 2
+    n = len(pairing)
+    frac = paired_count / max(1, n // 2)
+    return (i, paired_count, round(frac, 2))
 
-    def update(self, s, a, r, s_next, next_actions):
-        # Standard Double Q-learning, but handle terminal / no-action next states.
-        hs  = self._hash_state(s)
-        hs2 = self._hash_state(s_next)
-        if not next_actions:
-            target = r      # no bootstrap when no next actions (terminal-like)
-        else:
-            # pick argmax under Q1 then evaluate with Q2 (or vice versa)
-            import random
-            if random.random() < 0.5:
-                a_star = max(next_actions, key=lambda aa: self.Q1[hs2][aa])
-                target = r + self.gamma * self.Q2[hs2][a_star]
-            else:
-                a_star = max(next_actions, key=lambda aa: self.Q2[hs2][aa])
-                target = r + self.gamma * self.Q1[hs2][a_star]
-        # do the update on Q1 or Q2
-        import random
-        if random.random() < 0.5:
-            self.Q1[hs][a] += self.alpha * (target - self.Q1[hs][a])
-        else:
-            self.Q2[hs][a] += self.alpha * (target - self.Q2[hs][a])
 
+class DoubleQ:
     def __init__(self, alpha=0.1, gamma=0.99, eps=0.3, eps_min=0.05, eps_decay=0.999, alpha_decay=0.9995, seed: int | None = None):
         self.Q1 = defaultdict(lambda: defaultdict(float))
         self.Q2 = defaultdict(lambda: defaultdict(float))
@@ -50,11 +25,12 @@ class DoubleQ:
         self.rng = np.random.default_rng(seed)
 
     def _hash_state(self, state) -> tuple:
-        i, pairing = state
-        paired_count = sum(1 for p in pairing if p != -1) // 2
-        n = len(pairing)
-        frac = paired_count / max(1, n // 2)
-        return (i, paired_count, round(frac, 2))
+        return hash_state(state)
+
+    def save(self, path: str) -> None:
+        """Write Q1/Q2 as a compact .qtab checkpoint (see q_checkpoint.load_q_table)."""
+        from .q_checkpoint import save_q_tables
+        save_q_tables(path, self.Q1, self.Q2)
 
     def act(self, state, valid_actions: List[Action]):
         s = self._hash_state(state)
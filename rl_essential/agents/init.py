@@ -1,3 +0,0 @@
-from .double_q import TabularQ
-
-__all__ = ["Double-Q"]
\ No newline at end of file
@@ -0,0 +1,146 @@
+"""Compact, memory-mapped Double-Q checkpoints.
+
+Layout of a `.qtab` file: an 8-byte magic, a little-endian uint64 header length,
+a JSON header, then 64-byte aligned column blocks (CSR over states):
+    state_keys int64 [S]     packed hash_state keys, sorted
+    state_ptr  int64 [S+1]   rows of state s are state_ptr[s]:state_ptr[s+1]
+    j          int32 [R]     action column j of ("pair", j), sorted within a state
+    q1, q2     float32 [R]
+Opening a table only maps the file; lookups binary-search the state keys and
+touch just the pages they need.
+"""
+from __future__ import annotations
+import json
+import pickle
+import struct
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"RLQTAB01"
+_ALIGN = 64
+Action = Tuple[str, Optional[int]]
+
+
+def pack_state_key(hs: Tuple[int, int, float]) -> int:
+    """Pack a DoubleQ state hash (i, paired_count, frac) into one int64."""
+    i, paired_count, frac = hs
+    return (int(i) << 32) | (int(paired_count) << 12) | int(round(frac * 100))
+
+
+def _rows_from_tables(Q1: Dict, Q2: Dict):
+    rows: Dict[Tuple[int, int], List[float]] = {}
+    for col, table in ((0, Q1), (1, Q2)):
+        for hs, qa in table.items():
+            key = pack_state_key(hs)
+            for a, q in qa.items():
+                if a[1] is None:
+                    continue
+                rows.setdefault((key, int(a[1])), [0.0, 0.0])[col] = q
+    items = sorted(rows.items())
+    keys = np.fromiter((k for (k, _), _ in items), dtype=np.int64, count=len(items))
+    js = np.fromiter((j for (_, j), _ in items), dtype=np.int32, count=len(items))
+    qs = np.array([q for _, q in items], dtype=np.float32).reshape(-1, 2)
+    return keys, js, qs
+
+
+def save_q_tables(path: str, Q1: Dict, Q2: Dict) -> None:
+    """Write DoubleQ-style nested tables {hs: {("pair", j): q}} to a .qtab file."""
+    keys, js, qs = _rows_from_tables(Q1, Q2)
+    state_keys, starts = np.unique(keys, return_index=True)
+    state_ptr = np.append(starts, len(keys)).astype(np.int64)
+    columns = [
+        ("state_keys", state_keys.astype(np.int64)),
+        ("state_ptr", state_ptr),
+        ("j", js),
+        ("q1", np.ascontiguousarray(qs[:, 0])),
+        ("q2", np.ascontiguousarray(qs[:, 1])),
+    ]
+    # offsets are relative to the start of the data section
+    header, off = {"format": 1, "columns": []}, 0
+    for name, arr in columns:
+        header["columns"].append({"name": name, "dtype": arr.dtype.str, "length": int(arr.size), "offset": off})
+        off += -(-arr.nbytes // _ALIGN) * _ALIGN
+    blob = json.dumps(header).encode("utf-8")
+    data_start = -(-(len(MAGIC) + 8 + len(blob)) // _ALIGN) * _ALIGN
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(blob)))
+        f.write(blob)
+        for col, (_, arr) in zip(header["columns"], columns):
+            f.seek(data_start + col["offset"])
+            f.write(arr.tobytes())
+        f.truncate(data_start + off)
+
+
+class CompactQTable:
+    """Read-only view over a .qtab checkpoint (or arrays built in memory)."""
+    def __init__(self, state_keys, state_ptr, j, q1, q2):
+        self.state_keys = state_keys
+        self.state_ptr = state_ptr
+        self.j = j
+        self.q1 = q1
+        self.q2 = q2
+
+    @classmethod
+    def open(cls, path: str, mmap: bool = True) -> "CompactQTable":
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a .qtab checkpoint")
+            (hlen,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(hlen).decode("utf-8"))
+        data_start = -(-(len(MAGIC) + 8 + hlen) // _ALIGN) * _ALIGN
+        cols = {}
+        for col in header["columns"]:
+            dt = np.dtype(col["dtype"])
+            if col["length"] == 0:
+                cols[col["name"]] = np.zeros(0, dtype=dt)
+            elif mmap:
+                cols[col["name"]] = np.memmap(path, dtype=dt, mode="r",
+                                              offset=data_start + col["offset"], shape=(col["length"],))
+            else:
+                cols[col["name"]] = np.fromfile(path, dtype=dt, count=col["length"],
+                                                offset=data_start + col["offset"])
+        return cls(**cols)
+
+    @classmethod
+    def from_tables(cls, Q1: Dict, Q2: Dict) -> "CompactQTable":
+        keys, js, qs = _rows_from_tables(Q1, Q2)
+        state_keys, starts = np.unique(keys, return_index=True)
+        return cls(state_keys, np.append(starts, len(keys)), js, qs[:, 0].copy(), qs[:, 1].copy())
+
+    def __len__(self) -> int:
+        return int(self.j.shape[0])
+
+    def _rows(self, hs) -> Tuple[int, int]:
+        key = pack_state_key(hs)
+        s = int(np.searchsorted(self.state_keys, key))
+        if s >= len(self.state_keys) or int(self.state_keys[s]) != key:
+            return 0, 0
+        return int(self.state_ptr[s]), int(self.state_ptr[s + 1])
+
+    def values(self, hs, js: Iterable[int]) -> np.ndarray:
+        """Q1+Q2 for each column j at state hash hs (unseen entries are 0, like the dict tables)."""
+        js = np.asarray(list(js), dtype=np.int32)
+        lo, hi = self._rows(hs)
+        out = np.zeros(len(js), dtype=np.float32)
+        if hi > lo and len(js):
+            row_j = np.asarray(self.j[lo:hi])
+            pos = np.minimum(np.searchsorted(row_j, js), hi - lo - 1)
+            hit = row_j[pos] == js
+            out[hit] = np.asarray(self.q1[lo:hi])[pos[hit]] + np.asarray(self.q2[lo:hi])[pos[hit]]
+        return out
+
+    def greedy(self, hs, valid_actions: List[Action]) -> Action:
+        """argmax_a Q1+Q2 over valid ("pair", j) actions; ties go to the first action."""
+        vals = self.values(hs, [a[1] for a in valid_actions])
+        return valid_actions[int(np.argmax(vals))]
+
+
+def load_q_table(path: str, mmap: bool = True) -> CompactQTable:
+    """Open a .qtab checkpoint; legacy pickled {"Q1", "Q2"} dicts are converted in memory."""
+    if path.endswith(".pkl"):
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        return CompactQTable.from_tables(data["Q1"], data["Q2"])
+    return CompactQTable.open(path, mmap=mmap)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+from typing import List, Optional
+
+from .env import RNARLEnv
+from .mcts import head_actions
+from .utils.profiling import PROFILER
+
+
+class BeamSearch:
+    """Batched beam-search decoding over RNARLEnv, a cheap alternative to PUCT.
+
+    Each beam expands its top_k actions by policy logit over mcts.head_actions (logit
+    k scores acts[k], with skip last, the layout PUCT and AlphaZeroTrainer use). All
+    unfinished children of a step are encoded and evaluated in one network forward,
+    then ranked by value_weight * v - E: their own value-head estimate plus the energy
+    accumulated so far. value_weight is in kcal/mol per unit of value (the tanh head
+    lies in [-1, 1]), so 0 ranks on energy alone and larger weights let the value head
+    overrule energy differences of up to 2 * value_weight. The best `width` survive,
+    and the logits of that forward drive their next expansion. Finished beams are
+    compared on final energy alone. A fold therefore costs one batched forward per
+    decision, at most n + 1, instead of n_sim forwards per move.
+    """
+    def __init__(self, encoder, net, width: int = 4, top_k: int = 4, value_weight: float = 1.0,
+                 device: str = "cpu"):
+        if width < 1 or top_k < 1:
+            raise ValueError("width and top_k must be >= 1")
+        self.encoder = encoder
+        self.net = net
+        self.width = int(width)
+        self.top_k = int(top_k)
+        self.value_weight = float(value_weight)
+        self.device = device
+        self.forwards = 0  # batched network calls, for latency accounting
+
+    def _evaluate(self, beams: List[RNARLEnv]):
+        import torch  # deferred like mcts, so importing folding doesn't load torch
+        X = torch.stack([self.encoder.encode(e.seq, e.state) for e in beams]).to(self.device)
+        with torch.no_grad(), PROFILER.span("beam.evaluate"):
+            logits, v = self.net(X)
+        self.forwards += 1
+        return logits.cpu(), v.cpu().tolist()
+
+    def search(self, env: RNARLEnv) -> RNARLEnv:
+        """Best finished env reachable from env's state (env itself is not modified)."""
+        best: Optional[RNARLEnv] = None
+        live = [env.copy()]
+        if env.i >= env.n:
+            return live[0]
+        logits, _ = self._evaluate(live)
+        while live:
+            children: List[RNARLEnv] = []
+            for b, e in enumerate(live):
+                acts = head_actions(e, getattr(self.net, "a_max", None))
+                scores = logits[b, :len(acts)]
+                for k in scores.topk(min(self.top_k, len(scores))).indices.tolist():
+                    child = e.copy()
+                    if child.step(acts[k]).done:
+                        if best is None or child.E < best.E:
+                            best = child
+                    else:
+                        children.append(child)
+            if not children:
+                break
+            child_logits, values = self._evaluate(children)
+            rank = sorted(range(len(children)), reverse=True,  # stable: ties keep expansion order
+                          key=lambda c: self.value_weight * values[c] - children[c].E)[:self.width]
+            live = [children[c] for c in rank]
+            logits = child_logits[rank]
+        return best
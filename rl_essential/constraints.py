@@ -0,0 +1,116 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import FrozenSet, Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+from .mfe import allowed_pairs
+
+Pair = Tuple[int, int]
+
+
+def _pairs(pairs: Iterable[Pair]) -> FrozenSet[Pair]:
+    return frozenset((min(i, j), max(i, j)) for i, j in pairs)
+
+
+@dataclass(frozen=True)
+class Constraints:
+    """Hard folding constraints.
+
+    unpaired:  positions that must stay unpaired (binding sites, primers, ...)
+    pairs:     forced pairs (i, j); RNARLEnv commits them at reset
+    forbidden: pairs that may not form
+    length:    sequence length the constraints were written for (None: unchecked)
+
+    mask() compiles them into the allowed-pair mask that RNARLEnv, MCTS, beam search
+    and MFEFolder share, so search never enters the infeasible space.
+    """
+    unpaired: FrozenSet[int] = frozenset()
+    pairs: FrozenSet[Pair] = frozenset()
+    forbidden: FrozenSet[Pair] = frozenset()
+    length: Optional[int] = None
+
+    @classmethod
+    def build(cls, unpaired: Iterable[int] = (), pairs: Iterable[Pair] = (), forbidden: Iterable[Pair] = (),
+              length: Optional[int] = None) -> "Constraints":
+        return cls(frozenset(unpaired), _pairs(pairs), _pairs(forbidden), length)
+
+    @classmethod
+    def parse(cls, spec: str) -> "Constraints":
+        """Dot-bracket-style constraint string: '.' free, 'x' unpaired, matching '(' ')'
+        a forced pair."""
+        unpaired, pairs, stack = set(), set(), []
+        for k, c in enumerate(spec):
+            if c == "x":
+                unpaired.add(k)
+            elif c == "(":
+                stack.append(k)
+            elif c == ")":
+                if not stack:
+                    raise ValueError(f"Unbalanced ')' at {k} in constraint string")
+                pairs.add((stack.pop(), k))
+            elif c != ".":
+                raise ValueError(f"Unknown constraint symbol {c!r} at {k}; use '.', 'x', '(' or ')'")
+        if stack:
+            raise ValueError(f"Unbalanced '(' at {stack[-1]} in constraint string")
+        return cls(frozenset(unpaired), frozenset(pairs), frozenset(), len(spec))
+
+    def validate(self, seq: str, min_pair_separation: int = 4) -> None:
+        """Raise ValueError unless a structure satisfying every constraint exists."""
+        n = len(seq)
+        if self.length is not None and self.length != n:
+            raise ValueError(f"Constraints are for length {self.length}, sequence has {n}")
+        bad = [k for k in self.unpaired if not 0 <= k < n]
+        if bad:
+            raise ValueError(f"Unpaired positions {sorted(bad)} outside the sequence")
+        ok = allowed_pairs(seq, min_pair_separation)
+        used = set()
+        for i, j in sorted(self.pairs):
+            if not (0 <= i < j < n) or not ok[i, j]:
+                raise ValueError(f"Forced pair ({i},{j}) is not a legal pair for this sequence")
+            if i in used or j in used or i in self.unpaired or j in self.unpaired:
+                raise ValueError(f"Forced pair ({i},{j}) conflicts with another constraint")
+            if (i, j) in self.forbidden:
+                raise ValueError(f"Pair ({i},{j}) is both forced and forbidden")
+            used |= {i, j}
+        for i, j in self.pairs:
+            for k, l in self.pairs:
+                if i < k < j < l:
+                    raise ValueError(f"Forced pairs ({i},{j}) and ({k},{l}) cross")
+
+    def mask(self, seq: str, min_pair_separation: int = 4) -> np.ndarray:
+        """Symmetric n x n bool mask of the pairs compatible with every constraint
+        (forced pairs included), on top of base pairing and min_pair_separation."""
+        self.validate(seq, min_pair_separation)
+        n = len(seq)
+        allowed = allowed_pairs(seq, min_pair_separation)
+        blocked = np.zeros(n, dtype=bool)
+        blocked[list(self.unpaired)] = True
+        for i, j in self.pairs:
+            blocked[[i, j]] = True
+        allowed[blocked, :] = False
+        allowed[:, blocked] = False
+        if self.pairs:
+            # a pair crosses no forced pair iff both ends lie in the same innermost forced pair
+            region, stack, opener = np.zeros(n, dtype=np.intp), [0], dict(self.pairs)
+            closer = {j: i for i, j in self.pairs}
+            for k in range(n):
+                if k in closer:
+                    stack.pop()
+                region[k] = stack[-1]
+                if k in opener:
+                    stack.append(k + 1)
+            allowed &= region[:, None] == region[None, :]
+        for i, j in self.forbidden:
+            if 0 <= i < j < n:
+                allowed[i, j] = False
+        for i, j in self.pairs:
+            allowed[i, j] = True
+        return allowed | allowed.T
+
+
+def as_constraints(spec: Union[None, str, Constraints]) -> Optional[Constraints]:
+    """Accept a constraint string, a Constraints or None."""
+    if spec is None or isinstance(spec, Constraints):
+        return spec
+    return Constraints.parse(spec)
@@ -0,0 +1,157 @@
+from __future__ import annotations
+import glob
+import os
+import warnings
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+_STRUCT_CHARS = set(".()[]{}<>")
+
+
+@dataclass
+class SeqRecord:
+    id: str
+    seq: str
+    structure: Optional[str] = None  # dot-bracket, if the file carries one
+
+
+def _normalise(seq: str) -> str:
+    return seq.upper().replace("T", "U")
+
+
+def read_records(path: str) -> Iterator[SeqRecord]:
+    """Lazily parse FASTA or dot-bracket (.dbn) files, one record at a time.
+
+    A record starts at a '>' header (FASTA) or a '#Name:' comment (bpRNA .dbn);
+    sequence lines may wrap, and lines made only of structure symbols form the
+    optional reference structure. Other '#' lines are ignored. A record whose
+    structure length differs from its sequence length is skipped with a warning,
+    so one bad entry does not abort a batch run.
+    """
+    rid, seq, struct = None, [], []
+    count = 0
+
+    def emit():
+        s = _normalise("".join(seq))
+        db = "".join(struct) or None
+        if db is not None and len(db) != len(s):
+            warnings.warn(f"{path}: skipping record {rid!r}: sequence length {len(s)} "
+                          f"but structure length {len(db)}")
+            return None
+        return SeqRecord(rid or f"{os.path.basename(path)}:{count}", s, db)
+
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith(">") or line.startswith("#Name:"):
+                if seq:
+                    rec = emit()
+                    if rec is not None:
+                        yield rec
+                    count += 1
+                head = line[1:] if line.startswith(">") else line[len("#Name:"):]
+                rid, seq, struct = (head.split() or [None])[0], [], []
+            elif line.startswith("#"):
+                continue
+            elif set(line) <= _STRUCT_CHARS:
+                struct.append(line)
+            else:
+                seq.append(line)
+    if seq:
+        rec = emit()
+        if rec is not None:
+            yield rec
+
+
+def shard_of(record_id: str, world: int) -> int:
+    """Stable worker assignment (crc32 of the id), independent of file order and PYTHONHASHSEED."""
+    return zlib.crc32(record_id.encode("utf-8")) % world
+
+
+class SequenceDataset:
+    """Streams SeqRecords from one or more FASTA/.dbn files (paths may be globs).
+
+    Nothing is loaded up front: every iteration re-reads the files. Records with
+    bases outside AUGC (after T->U) or outside [min_len, max_len] are dropped.
+    rank/world keep only this worker's deterministic shard.
+    """
+    def __init__(self, paths, min_len: int = 1, max_len: Optional[int] = None,
+                 rank: int = 0, world: int = 1):
+        if isinstance(paths, str):
+            paths = [paths]
+        self.paths: List[str] = []
+        for p in paths:
+            hits = sorted(glob.glob(p))
+            if not hits:
+                raise FileNotFoundError(f"No sequence files match {p!r}")
+            self.paths.extend(hits)
+        if not 0 <= rank < world:
+            raise ValueError(f"rank must be in [0, {world}), got {rank}")
+        self.min_len, self.max_len = min_len, max_len
+        self.rank, self.world = rank, world
+
+    def __iter__(self) -> Iterator[SeqRecord]:
+        for path in self.paths:
+            for rec in read_records(path):
+                n = len(rec.seq)
+                if n < self.min_len or (self.max_len is not None and n > self.max_len):
+                    continue
+                if not set(rec.seq) <= set("AUGC"):
+                    continue
+                if self.world > 1 and shard_of(rec.id, self.world) != self.rank:
+                    continue
+                yield rec
+
+    def batches(self, batch_size: int, bucket_width: int = 32, shuffle_buffer: int = 0,
+                seed: Optional[int] = None) -> Iterator[List[SeqRecord]]:
+        """Length-bucketed batches; see bucket_by_length."""
+        stream: Iterable[SeqRecord] = iter(self)
+        if shuffle_buffer > 1:
+            stream = shuffled(stream, shuffle_buffer, seed)
+        return bucket_by_length(stream, batch_size, bucket_width)
+
+
+def shuffled(records: Iterable[SeqRecord], buffer_size: int, seed: Optional[int] = None) -> Iterator[SeqRecord]:
+    """Approximate streaming shuffle through a fixed-size reservoir."""
+    rng = np.random.default_rng(seed)
+    buf: List[SeqRecord] = []
+    for rec in records:
+        if len(buf) < buffer_size:
+            buf.append(rec)
+            continue
+        k = int(rng.integers(buffer_size))
+        yield buf[k]
+        buf[k] = rec
+    rng.shuffle(buf)
+    yield from buf
+
+
+def bucket_by_length(records: Iterable[SeqRecord], batch_size: int, bucket_width: int = 32,
+                     boundaries: Optional[Sequence[int]] = None) -> Iterator[List[SeqRecord]]:
+    """Group a stream into batches of similar length.
+
+    Records go to bucket len // bucket_width, or to the first boundary >= len when
+    `boundaries` is given. A bucket is emitted as soon as it holds batch_size records;
+    leftovers are flushed (shortest bucket first) when the stream ends. At most one
+    partial batch per bucket is held in memory.
+    """
+    buckets: Dict[int, List[SeqRecord]] = {}
+    for rec in records:
+        n = len(rec.seq)
+        if boundaries is not None:
+            key = int(np.searchsorted(boundaries, n))
+        else:
+            key = n // bucket_width
+        b = buckets.setdefault(key, [])
+        b.append(rec)
+        if len(b) >= batch_size:
+            yield b
+            buckets[key] = []
+    for key in sorted(buckets):
+        if buckets[key]:
+            yield buckets[key]
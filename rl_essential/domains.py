@@ -0,0 +1,175 @@
+from __future__ import annotations
+import multiprocessing as mp
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .energy import TurnerEnergyModel
+from .utils.profiling import PROFILER
+
+Helix = Tuple[int, int, int]  # (i, j, L): pairs (i+k, j-k) for k < L
+
+
+@dataclass
+class DomainPlan:
+    """Outer helices fixed up front, and the index sets folded independently.
+
+    Each domain is a sorted list of original positions. It is either the inside of a
+    chosen helix or what remains of a region once a helix and its inside are cut out;
+    the flanks of such a remainder are concatenated. Any nested structure of a domain
+    stays nested with the helices and every other domain once mapped back.
+    A domain is folded as one contiguous string, so loops and stacks across a junction
+    of concatenated flanks are scored as if adjacent: per-domain energies mean nothing,
+    only the energy recomputed on the stitched full pairing counts.
+    """
+    helices: List[Helix] = field(default_factory=list)
+    domains: List[List[int]] = field(default_factory=list)
+
+
+def _outer_helices(stems, min_helix: int):
+    """(i, j, L, energy) arrays of maximal helices with at least min_helix pairs."""
+    L = stems.length
+    i, j = np.nonzero(L >= min_helix)
+    outer = (i == 0) | (j == stems.n - 1)
+    outer |= L[np.maximum(i - 1, 0), np.minimum(j + 1, stems.n - 1)] == 0
+    i, j = i[outer], j[outer]
+    return i, j, L[i, j].astype(np.intp), stems.energy[i, j]
+
+
+def plan_domains(seq: str, max_domain: int = 200, min_helix: int = 4, min_pair_separation: int = 4,
+                 energy_model: Optional[TurnerEnergyModel] = None) -> DomainPlan:
+    """Cut seq into domains of at most max_domain positions along strong helices.
+
+    While a domain is too long, fix the helix of at least min_helix stackable pairs
+    (stems.StemIndex) that lies in it and leaves the smallest larger part, inside
+    vs outside; among equally balanced cuts the most stable stem wins. Helices weaker
+    than their own length in stack energy are ignored. With no usable helix the domain
+    is cut into near-equal consecutive chunks, with no pairs across the cut.
+    """
+    from .stems import stem_index
+    n = len(seq)
+    plan = DomainPlan()
+    if n <= max_domain:
+        plan.domains.append(list(range(n)))
+        return plan
+    hi, hj, hL, hE = _outer_helices(stem_index(seq, min_pair_separation, energy_model), min_helix)
+    strong = hE <= -hL
+    hi, hj, hL, hE = hi[strong], hj[strong], hL[strong], hE[strong]
+    work = [np.arange(n)]
+    while work:
+        idx = work.pop()
+        if len(idx) <= max_domain:
+            if len(idx):
+                plan.domains.append(idx.tolist())
+            continue
+        inset = np.zeros(n + 1, dtype=np.intp)
+        inset[idx] = 1
+        count = np.concatenate([[0], np.cumsum(inset)])  # count[b] - count[a] = |idx in [a, b)|
+        fits = ((count[hi + hL] - count[hi] == hL) & (count[hj + 1] - count[hj - hL + 1] == hL))
+        inside = count[hj - hL + 1] - count[hi + hL]
+        outside = len(idx) - inside - 2 * hL
+        ok = fits & (inside > 0) & (outside >= 0)
+        if not ok.any():
+            work.extend(np.array_split(idx, -(-len(idx) // max_domain)))  # balanced chunks
+            continue
+        worst = np.where(ok, np.maximum(inside, outside), n + 1)
+        k = int(np.lexsort((hE, worst))[0])
+        i, j, L = int(hi[k]), int(hj[k]), int(hL[k])
+        plan.helices.append((i, j, L))
+        work.append(idx[(idx >= i + L) & (idx <= j - L)])
+        work.append(idx[(idx < i) | (idx > j)])
+    return plan
+
+
+def stitch(n: int, plan: DomainPlan, folds: List[List[int]]) -> List[int]:
+    """Full pairing from the plan's helices and each domain's local pairing."""
+    pairing = [-1] * n
+    for i, j, L in plan.helices:
+        for k in range(L):
+            pairing[i + k], pairing[j - k] = j - k, i + k
+    for idx, local in zip(plan.domains, folds):
+        for a, b in enumerate(local):
+            if b > a:
+                pairing[idx[a]], pairing[idx[b]] = idx[b], idx[a]
+    return pairing
+
+
+_worker_folder = None
+
+
+def _init_worker(kwargs: Dict, energy_model: Optional[TurnerEnergyModel], profile: bool) -> None:
+    global _worker_folder
+    from .folding import pool_folder
+    _worker_folder = pool_folder(kwargs, energy_model)
+    if profile:
+        PROFILER.enable()
+
+
+def _fold_domain(sub: str) -> Tuple[List[int], Optional[Dict]]:
+    """(pairing of sub, the worker's profile since its last call or None)."""
+    pairing = _worker_folder.fold(sub)[0]
+    if not PROFILER.enabled:
+        return pairing, None
+    summary = PROFILER.summary()
+    PROFILER.reset()
+    return pairing, summary
+
+
+class DomainFolder:
+    """Folds long sequences as independent domains (plan_domains) in worker processes.
+
+    Every worker loads Folder(**folder_kwargs, energy_model=energy_model) once; a
+    sequence's domains are folded in parallel, so wall time follows the largest domain
+    instead of the full length. The stitched pairing's energy is recomputed on the
+    whole sequence under the same model. If PROFILER is enabled when the pool starts,
+    worker timings are merged into it after every fold. Use as a context manager, or
+    call close().
+    """
+    def __init__(self, folder_kwargs: Dict, max_domain: int = 200, min_helix: int = 4,
+                 workers: Optional[int] = None, energy_model: Optional[TurnerEnergyModel] = None):
+        self.folder_kwargs = dict(folder_kwargs)
+        self.max_domain = int(max_domain)
+        self.min_helix = int(min_helix)
+        self.min_pair_separation = int(self.folder_kwargs.get("min_pair_separation", 4))
+        self.energy = energy_model or TurnerEnergyModel()
+        self._key = None
+        self.pool = mp.Pool(workers, initializer=_init_worker,
+                            initargs=(self.folder_kwargs, energy_model, PROFILER.enabled))
+
+    def cache_key(self, seq: str) -> Optional[str]:
+        """fold_cache.fold_key of fold(seq); the domain split is part of the version.
+        None (do not cache) for an untrained network, as in Folder.cache_key."""
+        from .fold_cache import fold_key
+        from .folding import model_version
+        if self._key is None:
+            self._key = (model_version(**self.folder_kwargs, max_domain=self.max_domain, min_helix=self.min_helix),
+                         self.energy.fingerprint())
+        if self._key[0] is None:
+            return None
+        return fold_key(seq, *self._key, self.min_pair_separation)
+
+    def plan(self, seq: str) -> DomainPlan:
+        return plan_domains(seq, self.max_domain, self.min_helix, self.min_pair_separation, self.energy)
+
+    def fold(self, seq: str) -> Tuple[List[int], float]:
+        """Return (pairing, energy) of the stitched structure."""
+        if not set(seq) <= set("AUGC"):
+            raise ValueError("Sequence must contain only A/U/G/C")
+        plan = self.plan(seq)
+        results = self.pool.map(_fold_domain, ["".join(seq[k] for k in idx) for idx in plan.domains], chunksize=1)
+        for _, summary in results:
+            if summary is not None:
+                PROFILER.merge(summary)
+        pairing = stitch(len(seq), plan, [p for p, _ in results])
+        return pairing, self.energy.total_energy(seq, pairing)
+
+    def close(self) -> None:
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -3,6 +3,8 @@ from __future__ import annotations
 import math
 from typing import List, Tuple, Dict
 
+from .utils.profiling import timed
+
 BASES = "AUGC"
 PAIR_OK = {("A","U"),("U","A"),("G","C"),("C","G"),("G","U"),("U","G")}
 
@@ -124,6 +126,94 @@ class TurnerEnergyModel:
     def __init__(self):
         pass
 
+    # ---------- per-term energies (shared by total_energy and the DP folders) ----------
+    def stack_energy(self, seq: str, i: int, j: int) -> float:
+        """ΔG of pair (i,j) stacked on (i+1,j-1)."""
+        left = (seq[i], seq[j])
+        right = (seq[i+1], seq[j-1])
+        if not _is_pair(left[0], left[1]) or not _is_pair(right[0], right[1]):
+            return 0.0
+        return STACK_DG.get((left, right), DEFAULT_STACK)
+
+    def hairpin_energy(self, seq: str, il: int, jr: int) -> float:
+        """Loop term for the unpaired flanks il..jr at the inner end of a helix."""
+        L = jr - il + 1
+        if L < 3:
+            # prohibit tiny hairpins heavily
+            return 50.0
+        a, b = 3.4, 1.3
+        term = a + b * math.log(L)
+        # tetraloop bonuses
+        if L == 4:
+            term += self._tetraloop_bonus(seq[il:jr+1])
+        return term
+
+    @staticmethod
+    def _tetraloop_bonus(loop: str) -> float:
+        bonus = 0.0
+        if loop.startswith("G") and loop.endswith("A") and loop[2] == "A":
+            bonus += TETRA_BONUS["GNRA"]
+        if loop == "UUCG":
+            bonus += TETRA_BONUS["UNCG"]
+        if loop == "CUUG":
+            bonus += TETRA_BONUS["CUUG"]
+        return bonus
+
+    # ---------- whole-sequence tables for the vectorized DPs (partition.py) ----------
+    def stack_energy_matrix(self, seq: str):
+        """n x n array S[i, j] = stack_energy(seq, i, j) for j - i >= 2 (0 elsewhere)."""
+        import numpy as np
+        code = {b: k for k, b in enumerate(BASES)}
+        table = np.zeros((4, 4, 4, 4))  # [b_i, b_j, b_i+1, b_j-1]
+        for bi in BASES:
+            for bj in BASES:
+                for bi1 in BASES:
+                    for bj1 in BASES:
+                        table[code[bi], code[bj], code[bi1], code[bj1]] = self.stack_energy(bi + bi1 + bj1 + bj, 0, 3)
+        n = len(seq)
+        c = np.array([code[b] for b in seq], dtype=np.intp)
+        S = np.zeros((n, n))
+        if n >= 3:
+            S[:n - 1, 1:] = table[c[:n - 1, None], c[None, 1:], c[1:, None], c[None, :n - 1]]
+        return np.triu(S, 2)
+
+    def hairpin_energy_matrix(self, seq: str):
+        """n x n array H[il, jr] = hairpin_energy(seq, il, jr) for jr >= il (0 elsewhere)."""
+        import numpy as np
+        n = len(seq)
+        L = np.arange(n)[None, :] - np.arange(n)[:, None] + 1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            H = np.where(L < 3, 50.0, 3.4 + 1.3 * np.log(np.maximum(L, 1)))
+        for il in range(n - 3):
+            H[il, il + 3] += self._tetraloop_bonus(seq[il:il + 4])
+        return np.where(L >= 1, H, 0.0)
+
+    def fingerprint(self) -> str:
+        """Short hash of the parameter set, taken from the terms themselves (stacks,
+        hairpins incl. every tetraloop, exterior runs, and whole structures with internal
+        loops), so inline constants and subclass overrides count. Equal fingerprints give
+        equal energies; fold caches key on it."""
+        import hashlib, json
+        from .utils.structures import from_dot_bracket
+        probe = [self.stack_energy(a + c + d + b, 0, 3) for a in BASES for b in BASES for c in BASES for d in BASES]
+        probe += [self.hairpin_energy("A" * L, 0, L - 1) for L in range(1, 41)]
+        probe += [self.hairpin_energy(a + b + c + d, 0, 3) for a in BASES for b in BASES for c in BASES for d in BASES]
+        probe += [self.exterior_run_energy(L) for L in range(1, 41)]
+        for L in range(1, 9):
+            seq = "AA" + "GGG" + "A" * L + "GGGAAAACCC" + "A" * (L // 2) + "CCC"
+            db = ".." + "(((" + "." * L + "(((....)))" + "." * (L // 2) + ")))"
+            probe.append(self.total_energy(seq, from_dot_bracket(db)))
+        blob = json.dumps([round(float(x), 9) for x in probe])
+        return hashlib.sha1(blob.encode()).hexdigest()[:16]
+
+    def exterior_run_energy(self, L: int) -> float:
+        """Cost of an unpaired exterior run of length L that is followed by a pair."""
+        # multibranch: a_mb + b_mb * branches + c_mb * unpaired (very rough)
+        # Here we approximate each multibranch segment as contributing a small cost.
+        a_mb, b_mb, c_mb = 3.2, 0.4, 0.2
+        return a_mb + c_mb * L
+
+    @timed("energy.total_energy")
     def total_energy(self, seq: str, pairing: List[int]) -> float:
         n = len(seq)
         # 1) stacking (negative)
@@ -131,35 +221,14 @@ class TurnerEnergyModel:
         for i, j, L in _helices(pairing):
             # each step in the helix (i+k, j-k) over (i+k+1, j-k-1)
             for k in range(L-1):
-                left = (seq[i+k], seq[j-k])
-                right = (seq[i+k+1], seq[j-k-1])
-                if not _is_pair(left[0], left[1]) or not _is_pair(right[0], right[1]):
-                    continue
-                dg = STACK_DG.get((left, right), DEFAULT_STACK)
-                dg_stack += dg
+                dg_stack += self.stack_energy(seq, i+k, j-k)
 
         # 2) loops (positive)
         loops = _loops(seq, pairing)
         dg_loop = 0.0
         # hairpin: a + b*ln(L) + tetraloop bonus
         for il, jr in loops["hairpin"]:
-            L = jr - il + 1
-            if L < 3:
-                # prohibit tiny hairpins heavily
-                dg_loop += 50.0
-                continue
-            a, b = 3.4, 1.3
-            term = a + b * math.log(L)
-            # tetraloop bonuses
-            if L == 4:
-                loop = seq[il:jr+1]
-                if loop.startswith("G") and loop.endswith("A") and loop[2] == "A":
-                    term += TETRA_BONUS["GNRA"]
-                if loop == "UUCG":
-                    term += TETRA_BONUS["UNCG"]
-                if loop == "CUUG":
-                    term += TETRA_BONUS["CUUG"]
-            dg_loop += term
+            dg_loop += self.hairpin_energy(seq, il, jr)
 
         # internal/bulge: c + d*ln(L) + asymmetry penalty
         for il, jr in loops["internal"]:
@@ -168,12 +237,7 @@ class TurnerEnergyModel:
             term = c + d * math.log(max(1, L))
             dg_loop += term
 
-        # multibranch: a_mb + b_mb * branches + c_mb * unpaired (very rough)
-        # Here we approximate each multibranch segment as contributing a small cost.
         for il, jr in loops["multibranch"]:
-            L = jr - il + 1
-            a_mb, b_mb, c_mb = 3.2, 0.4, 0.2
-            term = a_mb + c_mb * L
-            dg_loop += term
+            dg_loop += self.exterior_run_energy(jr - il + 1)
 
         return dg_stack + dg_loop
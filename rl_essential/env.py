@@ -3,10 +3,17 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
+
 from .energy import TurnerEnergyModel
-from .utils.structures import is_valid_pair, to_dot_bracket
+from .utils.profiling import timed
+from .utils.structures import ALLOWED, BASES, is_valid_pair, to_dot_bracket
+
+Action = Tuple[str, Optional[int]]  # ("pair", j); ("skip", None) leaves i unpaired
 
-Action = Tuple[str, Optional[int]]  # ("pair", j) only
+BASE_CODE = {b: k for k, b in enumerate(BASES)}
+# PAIR_TABLE[code(b1), code(b2)] == is_valid_pair(b1, b2)
+PAIR_TABLE = np.array([[(a, b) in ALLOWED for b in BASES] for a in BASES], dtype=bool)
 
 
 @dataclass
@@ -48,12 +55,37 @@ class RNARLEnv:
     def __init__(self,
         seq: str,
         energy_model: Optional[TurnerEnergyModel] = None,
-        min_pair_separation: int = 4,):
+        min_pair_separation: int = 4,
+        candidates: Optional[np.ndarray] = None,
+        stems=None,
+        constraints=None,):
+        """candidates: optional n x n bool mask of the pairs (i, j) the agent may consider,
+        e.g. partition.candidate_mask(...) of the base-pair probabilities or
+        StemIndex.mask(); None allows every legal pair.
+        stems: a stems.StemIndex of seq, shared with MCTS and the encoders.
+        constraints: a constraints.Constraints or constraint string ('.' free, 'x' unpaired,
+        '()' forced pair). It is compiled into the candidates mask (and kept alone as
+        .allowed, the mask pair probabilities are computed under), and forced pairs are
+        committed at every reset."""
         assert all(b in "AUGC" for b in seq), "Sequence must contain only A/U/G/C"
         self.seq = seq
         self.n = len(seq)
         self.energy = energy_model or TurnerEnergyModel()
         self.min_pair_separation = int(min_pair_separation)
+        if candidates is not None:
+            candidates = np.asarray(candidates, dtype=bool)
+            assert candidates.shape == (self.n, self.n), "candidates must be an n x n mask"
+        allowed = None
+        if constraints is not None:
+            from .constraints import as_constraints
+            constraints = as_constraints(constraints)
+            allowed = constraints.mask(seq, self.min_pair_separation)
+            candidates = allowed if candidates is None else candidates & allowed
+        self.constraints = constraints
+        self.allowed = allowed
+        self.candidates = candidates
+        self.stems = stems
+        self.codes = np.array([BASE_CODE[b] for b in seq], dtype=np.int8)
         self.reset()
 
     # ---------- helpers (relations) ----------
@@ -82,9 +114,14 @@ class RNARLEnv:
         return True
 
     # ---------- API ----------
+    @timed("env.reset")
     def reset(self) -> Tuple[int, List[int]]:
+        self._row_cache = None
         self.i = 0
         self.pairing = [-1] * self.n
+        if self.constraints is not None:
+            for i, j in self.constraints.pairs:
+                self.pairing[i], self.pairing[j] = j, i
         self.E = self.energy.total_energy(self.seq, self.pairing)
         # advance i to the first index that *could* pair with someone
         self._advance_until_candidate()
@@ -94,6 +131,16 @@ class RNARLEnv:
     def state(self) -> Tuple[int, List[int]]:
         return (self.i, self.pairing.copy())
 
+    def copy(self) -> "RNARLEnv":
+        """Independent env at the same state; seq, energy model and masks are shared."""
+        env = object.__new__(type(self))
+        env.__dict__.update(self.__dict__)
+        env.pairing = self.pairing.copy()
+        cached = self._row_cache
+        if cached is not None and cached[1] is self.pairing:
+            env._row_cache = (cached[0], env.pairing, cached[2])
+        return env
+
     def _advance_i(self) -> None:
         """Advance i to next free site."""
         while self.i < self.n and self.pairing[self.i] != -1:
@@ -105,38 +152,67 @@ class RNARLEnv:
             if self.pairing[self.i] != -1:
                 self._advance_i()
                 continue
-            has_candidate = any(
-                self._pair_allowed(self.i, j) and self.pairing[j] == -1
-                for j in range(self.i + 1, self.n)
-            )
-            if has_candidate:
+            row = self._legal_row(self.i)
+            if row.any():
+                self._row_cache = (self.i, self.pairing, row)
                 break
             self.i += 1  # implicit skip
         # if i==n, terminal
 
-    def valid_actions(self) -> List[Action]:
-        """Pairs-only actions at current i. Empty => auto-advance on step()."""
+    @timed("env.legal_row")
+    def _legal_row(self, i: int) -> np.ndarray:
+        """Vectorized _pair_allowed(i, j) & pairing[j] == -1 over all j."""
+        n = self.n
+        mask = np.zeros(n, dtype=bool)
+        lo = i + max(1, self.min_pair_separation)
+        if lo >= n:
+            return mask
+        pairing = np.asarray(self.pairing)
+        mask[lo:] = PAIR_TABLE[self.codes[i], self.codes[lo:]] & (pairing[lo:] == -1)
+        if self.candidates is not None:
+            mask &= self.candidates[i]
+        ks = np.flatnonzero(pairing > np.arange(n))
+        ls = pairing[ks]
+        # enclosing pair k < i < l: j must stay inside it
+        enc = (ks < i) & (ls > i)
+        if enc.any():
+            mask[ls[enc].min():] = False
+        # pair i < k < l: j may not fall strictly inside (k, l)
+        inner = ks > i
+        if inner.any():
+            depth = np.zeros(n + 1, dtype=np.int32)
+            np.add.at(depth, ks[inner] + 1, 1)
+            np.add.at(depth, ls[inner], -1)
+            mask &= np.cumsum(depth[:n]) == 0
+        return mask
+
+    def legal_mask(self) -> np.ndarray:
+        """Bool mask over j of the legal ('pair', j) actions at current i."""
         if self.i >= self.n:
-            return []
-        acts: List[Action] = []
-        # collect pair candidates i<j
-        for j in range(self.i + 1, self.n):
-            if self.pairing[j] != -1:
-                continue
-            if self._pair_allowed(self.i, j):
-                acts.append(("pair", j))
-        return acts
+            return np.zeros(self.n, dtype=bool)
+        cached = self._row_cache
+        if cached is not None and cached[0] == self.i and cached[1] is self.pairing:
+            return cached[2].copy()
+        return self._legal_row(self.i)
+
+    @timed("env.valid_actions")
+    def valid_actions(self) -> List[Action]:
+        """Pairs-only actions at current i, by increasing j (the layout of the fixed
+        policy head). Empty => auto-advance on step()."""
+        return [("pair", int(j)) for j in np.flatnonzero(self.legal_mask())]
 
+    @timed("env.step")
     def step(self, action: Action) -> StepResult:
-        """Apply ('pair', j) if available; otherwise implicitly advance i."""
+        """Apply ('pair', j) if available; ('skip', None) or no legal pair advances i."""
         if self.i >= self.n:
             return StepResult(self.state, 0.0, True, {"reason": "done"})
 
         old_E = self.E
-        acts = self.valid_actions()
+        has_pair = self.legal_mask().any()
+        self._row_cache = None  # pairing/i change below
 
-        if not acts:
-            # no legal pair: implicit skip
+        if not has_pair or action[0] == "skip":
+            # no legal pair (or explicit skip): leave i unpaired
             self.i += 1
             self._advance_until_candidate()
         else:
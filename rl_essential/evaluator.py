@@ -0,0 +1,138 @@
+from __future__ import annotations
+import collections
+import contextlib
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Optional
+
+import torch
+
+
+class BatchedEvaluator:
+    """Merges single-state network calls from many threads into batched forwards.
+
+    Callable like the net on one encoded state: evaluator(x) with x of shape (1, in_dim)
+    returns (logits (1, a_max), v (1,)), so it drops into PUCT(evaluator=...). A worker
+    thread takes the first waiting request, then keeps collecting until it has max_batch
+    of them or max_wait_ms has passed since that first request arrived, and runs one
+    forward for the lot. Callers block only on their own result.
+
+    Wrap each search in `with evaluator.session():` so the worker knows how many
+    searches are live: once all of them are waiting it dispatches without sitting out
+    the deadline, so a lone request pays no batching latency.
+    """
+    def __init__(self, net, device: str = "cpu", max_batch: int = 32, max_wait_ms: float = 2.0):
+        self.net = net
+        self.device = device
+        self.max_batch = int(max_batch)
+        self.max_wait = max_wait_ms / 1e3
+        self._q: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._active = 0
+        self.reset_stats()
+        self._thread = threading.Thread(target=self._run, name="batched-evaluator", daemon=True)
+        self._thread.start()
+
+    def __call__(self, x: torch.Tensor):
+        fut: Future = Future()
+        self._q.put((x.reshape(-1), fut, time.perf_counter()))
+        return fut.result()
+
+    @contextlib.contextmanager
+    def session(self):
+        with self._lock:
+            self._active += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def close(self) -> None:
+        self._q.put(None)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- worker ----------
+    def _collect(self):
+        first = self._q.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch:
+            if 0 < self._active <= len(batch) and self._q.empty():
+                break  # every live search is already waiting on this batch
+            timeout = deadline - time.perf_counter()
+            try:
+                item = self._q.get(timeout=timeout) if timeout > 0 else self._q.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._q.put(None)  # finish this batch, stop on the next collect
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            t0 = time.perf_counter()
+            try:
+                X = torch.stack([x for x, _, _ in batch]).to(self.device)
+                with torch.no_grad():
+                    logits, v = self.net(X)
+                logits, v = logits.cpu(), v.cpu()
+            except Exception as e:  # hand the failure to every waiting caller
+                for _, fut, _ in batch:
+                    fut.set_exception(e)
+                continue
+            t1 = time.perf_counter()
+            for k, (_, fut, _) in enumerate(batch):
+                fut.set_result((logits[k:k + 1], v[k:k + 1]))
+            self._record(batch, t0, t1)
+
+    # ---------- stats ----------
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._n_requests = 0
+            self._n_batches = 0
+            self._max_batch_seen = 0
+            self._max_depth = 0
+            self._eval_s = 0.0
+            self._wait_ms = collections.deque(maxlen=4096)
+
+    def _record(self, batch, t0: float, t1: float) -> None:
+        depth = self._q.qsize()
+        with self._lock:
+            self._n_requests += len(batch)
+            self._n_batches += 1
+            self._max_batch_seen = max(self._max_batch_seen, len(batch))
+            self._max_depth = max(self._max_depth, depth + len(batch))
+            self._eval_s += t1 - t0
+            self._wait_ms.extend((t0 - t_in) * 1e3 for _, _, t_in in batch)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            waits = sorted(self._wait_ms)
+            nb = max(1, self._n_batches)
+            return {
+                "queue_depth": self._q.qsize(),
+                "max_queue_depth": self._max_depth,
+                "requests": self._n_requests,
+                "batches": self._n_batches,
+                "mean_batch": self._n_requests / nb,
+                "max_batch": self._max_batch_seen,
+                "eval_ms_per_batch": 1e3 * self._eval_s / nb,
+                "wait_ms_p50": waits[len(waits) // 2] if waits else None,
+                "wait_ms_p95": waits[int(len(waits) * 0.95)] if waits else None,
+            }
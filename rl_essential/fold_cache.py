@@ -0,0 +1,123 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+DEFAULT_PATH = ".fold_cache.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS folds (
+    key TEXT PRIMARY KEY,
+    dot_bracket TEXT NOT NULL,
+    energy REAL NOT NULL,
+    stats TEXT NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS folds_used ON folds (used);
+"""
+
+
+def fold_key(seq: str, version: str, energy: str, min_pair_separation: int = 4, constraints=None) -> str:
+    """Content address of one fold: the sequence, the predictor (folding.model_version),
+    the energy parameters (TurnerEnergyModel.fingerprint) and the env options."""
+    from .constraints import as_constraints
+    c = as_constraints(constraints)
+    spec = None if c is None else [sorted(c.unpaired), sorted(c.pairs), sorted(c.forbidden), c.length]
+    blob = json.dumps([seq, version, energy, int(min_pair_separation), spec])
+    return hashlib.sha1(blob.encode()).hexdigest()
+
+
+class FoldCache:
+    """Persistent fold results in one SQLite file, keyed by fold_key().
+
+    Each entry holds the dot-bracket, the energy and a JSON dict of search stats
+    (time_ms, ...). Lookups refresh an entry's last-use time; once there are more
+    than max_entries, the least recently used tenth is evicted. Several processes
+    may share the file (WAL journal); one FoldCache may be shared by threads.
+    """
+    def __init__(self, path: str = DEFAULT_PATH, max_entries: int = 1_000_000):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_entries = int(max_entries)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=60.0, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._count = len(self)
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count_rows()
+
+    def _count_rows(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM folds").fetchone()[0]
+
+    def get(self, key: str) -> Optional[Dict]:
+        """{"dot_bracket", "energy", "stats"} stored under key, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT dot_bracket, energy, stats FROM folds WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute("UPDATE folds SET used = ? WHERE key = ?", (time.time(), key))
+        return {"dot_bracket": row[0], "energy": row[1], "stats": json.loads(row[2])}
+
+    def put(self, key: str, dot_bracket: str, energy: float, stats: Optional[Dict] = None) -> None:
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT OR IGNORE INTO folds (key, dot_bracket, energy, stats, used) VALUES (?, ?, ?, ?, ?)",
+                (key, dot_bracket, float(energy), json.dumps(stats or {}), time.time()))
+            self._count += cur.rowcount
+            if self._count > self.max_entries:
+                self._evict()
+
+    def _evict(self) -> None:
+        # the in-memory count drifts when other processes write; recount before deleting
+        self._count = self._count_rows()
+        excess = self._count - self.max_entries
+        if excess <= 0:
+            return
+        excess += self.max_entries // 10  # headroom, so eviction is not paid on every put
+        cur = self._db.execute(
+            "DELETE FROM folds WHERE key IN (SELECT key FROM folds ORDER BY used, rowid LIMIT ?)", (excess,))
+        self._count -= cur.rowcount
+        self.evicted += cur.rowcount
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": self._count, "hits": self.hits, "misses": self.misses, "evicted": self.evicted}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ---------- script helpers ----------
+def add_arguments(parser, default: Optional[str] = None) -> None:
+    parser.add_argument("--fold_cache", type=str, default=default,
+                        help="SQLite file of earlier fold results; only sequences not in it are folded")
+    parser.add_argument("--fold_cache_size", type=int, default=1_000_000, help="max cached folds (LRU eviction)")
+    parser.add_argument("--no_fold_cache", action="store_true")
+
+
+def open_cache(args) -> Optional[FoldCache]:
+    """FoldCache for a namespace parsed with add_arguments, or None if disabled."""
+    if args.no_fold_cache or not args.fold_cache:
+        return None
+    return FoldCache(args.fold_cache, max_entries=args.fold_cache_size)
@@ -0,0 +1,244 @@
+from __future__ import annotations
+import hashlib
+import inspect
+import json
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .energy import TurnerEnergyModel
+from .env import RNARLEnv
+
+POLICIES = ("dq", "mcts", "mfe", "beam")
+DEFAULT_DQ_CKPT = "checkpoints/dq.qtab"
+
+
+def rollout(env: RNARLEnv, choose: Callable) -> RNARLEnv:
+    """Run env to the end; choose(env, valid_actions) picks each move."""
+    while env.i < env.n:
+        acts = env.valid_actions()
+        env.step(choose(env, acts) if acts else ("pair", None))  # empty => auto-advance
+    return env
+
+
+class Folder:
+    """Loads one folding policy once and folds many sequences with it.
+
+    policy: "dq"   greedy Q1+Q2 from a .qtab (or legacy .pkl) Double-Q checkpoint
+            "mcts" PUCT with an AlphaZeroTrainer checkpoint (untrained net if ckpt is None);
+                   each move takes the most visited root action
+            "mfe"  exact minimum of the energy model (mfe.MFEFolder)
+            "beam" batched beam search (beam.BeamSearch, beam_width x beam_top_k) with
+                   the same network as "mcts": about one forward per move instead of sims;
+                   beam_value_weight is the kcal/mol one unit of the value head is worth
+    bpp_top_k / bpp_threshold restrict every policy to the likely pairs of the
+    base-pair probabilities (partition.candidate_mask); prior_mix seeds the MCTS prior
+    with them. bpp_max_span limits pair span in that computation for long sequences.
+    stem_min_length keeps only pairs that sit in a helix of at least that many
+    stackable pairs (stems.StemIndex); stem_order breaks Double-Q ties most stable
+    stem first; stem_prior mixes the stem weights into the MCTS prior.
+    fold() only reads the loaded policy, so one Folder can serve many threads; set
+    .evaluator to a BatchedEvaluator over .trainer.net to batch their MCTS evaluations.
+    """
+    def __init__(self, policy: str = "dq", ckpt: Optional[str] = None, sims: int = 100,
+                 min_pair_separation: int = 4, device: str = "cpu",
+                 energy_model: Optional[TurnerEnergyModel] = None, bpp_top_k: Optional[int] = None,
+                 bpp_threshold: Optional[float] = None, prior_mix: float = 0.0, bpp_max_span: Optional[int] = None,
+                 stem_min_length: Optional[int] = None, stem_order: bool = False, stem_prior: float = 0.0,
+                 beam_width: int = 4, beam_top_k: int = 4, beam_value_weight: float = 1.0):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}; expected one of {POLICIES}")
+        self.policy = policy
+        self.ckpt = ckpt
+        self.sims = sims
+        self.min_pair_separation = int(min_pair_separation)
+        self.device = device
+        self.energy = energy_model or TurnerEnergyModel()
+        self.evaluator = None
+        self.bpp_top_k = bpp_top_k
+        self.bpp_threshold = bpp_threshold
+        self.prior_mix = float(prior_mix)
+        self.bpp = None
+        self.stem_min_length = stem_min_length
+        self.stem_order = bool(stem_order)
+        self.stem_prior = float(stem_prior)
+        self.beam_width = int(beam_width)
+        self.beam_top_k = int(beam_top_k)
+        self.beam_value_weight = float(beam_value_weight)
+        self._options = dict(sims=sims, min_pair_separation=self.min_pair_separation, bpp_top_k=bpp_top_k,
+                             bpp_threshold=bpp_threshold, prior_mix=self.prior_mix, bpp_max_span=bpp_max_span,
+                             stem_min_length=stem_min_length, stem_order=self.stem_order,
+                             stem_prior=self.stem_prior, beam_width=self.beam_width, beam_top_k=self.beam_top_k,
+                             beam_value_weight=self.beam_value_weight)
+        self._key = None
+        if bpp_top_k is not None or bpp_threshold is not None or self.prior_mix > 0:
+            from .partition import McCaskill
+            self.bpp = McCaskill(self.energy, self.min_pair_separation, max_span=bpp_max_span)
+        if policy == "dq":
+            from .agents.q_checkpoint import load_q_table
+            self.table = load_q_table(ckpt or DEFAULT_DQ_CKPT)
+        elif policy in ("mcts", "beam"):
+            from .learners.az_trainers import AlphaZeroTrainer
+            if ckpt:
+                self.trainer = AlphaZeroTrainer.load(ckpt, device=device)
+            else:
+                self.trainer = AlphaZeroTrainer(device=device)
+            self.trainer.net.eval()
+        else:
+            from .mfe import MFEFolder
+            self.mfe = MFEFolder(self.energy, self.min_pair_separation)
+
+    def cache_key(self, seq: str, constraints=None) -> Optional[str]:
+        """fold_cache.fold_key of fold(seq, constraints) with this policy, checkpoint,
+        options and energy model; None (do not cache) for an untrained network."""
+        from .fold_cache import fold_key
+        if self._key is None:
+            self._key = (model_version(self.policy, self.ckpt, **self._options), self.energy.fingerprint())
+        if self._key[0] is None:
+            return None
+        return fold_key(seq, *self._key, self.min_pair_separation, constraints)
+
+    def _stems(self, seq: str):
+        if self.stem_min_length is None and not self.stem_order and self.stem_prior <= 0:
+            return None
+        from .stems import stem_index
+        return stem_index(seq, self.min_pair_separation, self.energy)
+
+    def _candidates(self, seq: str, allowed=None):
+        cand = None
+        if self.bpp_top_k is not None or self.bpp_threshold is not None:
+            from .partition import candidate_mask
+            probs = self.bpp.pair_probs(seq, None if allowed is None else np.triu(allowed, 1))
+            cand = candidate_mask(probs, self.bpp_top_k, self.bpp_threshold)
+        if self.stem_min_length is not None:
+            stem_mask = self._stems(seq).mask(self.stem_min_length)
+            cand = stem_mask if cand is None else cand & stem_mask
+        return cand
+
+    def _env(self, seq: str, constraints=None, allowed=None) -> RNARLEnv:
+        return RNARLEnv(seq, energy_model=self.energy, min_pair_separation=self.min_pair_separation,
+                        candidates=self._candidates(seq, allowed), stems=self._stems(seq),
+                        constraints=constraints)
+
+    def fold(self, seq: str, constraints=None) -> Tuple[List[int], float]:
+        """Return (pairing, energy). constraints: a constraints.Constraints or constraint
+        string ('.' free, 'x' unpaired, '()' forced pair) every policy must respect."""
+        if not set(seq) <= set("AUGC"):
+            raise ValueError("Sequence must contain only A/U/G/C")
+        allowed = None
+        if constraints is not None:
+            from .constraints import as_constraints
+            constraints = as_constraints(constraints)
+            allowed = constraints.mask(seq, self.min_pair_separation)
+        if self.policy == "mfe":
+            cand = self._candidates(seq, allowed)
+            forced = constraints.pairs if constraints is not None else ()
+            if cand is None and allowed is None:
+                return self.mfe.fold(seq)
+            from .mfe import allowed_pairs
+            mask = allowed_pairs(seq, self.min_pair_separation)
+            for m in (cand, allowed):
+                if m is not None:
+                    mask &= m
+            if forced:
+                mask[tuple(zip(*forced))] = True  # forced pairs stay even if bpp/stems would prune them
+            return self.mfe.fold(seq, allowed=mask, forced=forced)
+        if self.policy == "dq":
+            from .agents.double_q import hash_state
+
+            def choose(env, acts):
+                if self.stem_order and len(acts) > 1:
+                    # greedy() keeps the first maximum: list the most stable stems first
+                    acts = [("pair", int(j)) for j in env.stems.order(env.i, [j for _, j in acts])]
+                return self.table.greedy(hash_state(env.state), acts)
+            env = rollout(self._env(seq, constraints, allowed), choose)
+        elif self.policy == "beam":
+            from .beam import BeamSearch
+            beam = BeamSearch(self.trainer.encoder, self.trainer.net, width=self.beam_width,
+                              top_k=self.beam_top_k, value_weight=self.beam_value_weight, device=self.device)
+            env = beam.search(self._env(seq, constraints, allowed))
+        else:
+            from .mcts import PUCT
+            mcts = PUCT(RNARLEnv, self.trainer.encoder, self.trainer.net, n_sim=self.sims, device=self.device,
+                        evaluator=self.evaluator, bpp=self.bpp if self.prior_mix > 0 else None,
+                        prior_mix=self.prior_mix, stem_prior=self.stem_prior)
+
+            def choose(env, acts):
+                pi, cand = mcts.search(env)
+                return cand[max(range(len(pi)), key=pi.__getitem__)]
+            if self.evaluator is not None:
+                with self.evaluator.session():
+                    env = rollout(self._env(seq, constraints, allowed), choose)
+            else:
+                env = rollout(self._env(seq, constraints, allowed), choose)
+        return env.pairing, env.E
+
+
+def pool_folder(kwargs: Dict, energy_model: Optional[TurnerEnergyModel] = None) -> Folder:
+    """Folder(**kwargs) for a process-pool worker, with torch held to one thread."""
+    if kwargs.get("policy") in ("mcts", "beam"):
+        import torch
+        torch.set_num_threads(1)  # parallelism comes from the pool
+    return Folder(**kwargs, energy_model=energy_model)
+
+
+def model_version(policy: str = "dq", ckpt: Optional[str] = None, **options) -> Optional[str]:
+    """Short hash of everything that decides what Folder(policy, ckpt, **options) predicts:
+    the policy, the checkpoint file's bytes, and every option that differs from its
+    default (device excluded). Equal versions give equal folds, so results can be
+    cached under it. None for mcts/beam without a ckpt: each Folder then draws a fresh
+    random network, so its folds must not be cached or compared across runs."""
+    if policy in ("mcts", "beam") and not ckpt:
+        return None
+    defaults = {k: p.default for k, p in inspect.signature(Folder.__init__).parameters.items()
+                if p.default is not inspect.Parameter.empty}
+    if policy != "mcts":
+        options.pop("sims", None)
+    if policy != "dq":
+        options.pop("stem_order", None)
+    if policy != "beam":
+        options.pop("beam_width", None)
+        options.pop("beam_top_k", None)
+        options.pop("beam_value_weight", None)
+    key = {k: v for k, v in options.items() if k not in ("device", "energy_model") and v != defaults.get(k)}
+    h = hashlib.sha1(json.dumps({"policy": policy, **key}, sort_keys=True).encode())
+    if policy == "dq":
+        ckpt = ckpt or DEFAULT_DQ_CKPT
+    if policy != "mfe":
+        with open(ckpt, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+# ---------- script helpers ----------
+def add_arguments(parser, policy: bool = True) -> None:
+    """Policy and search flags shared by the scripts that build a Folder. policy=False
+    leaves out --policy/--ckpt, for scripts that load several policies."""
+    if policy:
+        parser.add_argument("--policy", type=str, default="dq", choices=POLICIES)
+        parser.add_argument("--ckpt", type=str, default=None, help="Double-Q .qtab or AlphaZero .pt (mcts/beam) checkpoint")
+    parser.add_argument("--sims", type=int, default=100, help="MCTS simulations per move")
+    parser.add_argument("--min_pair_separation", type=int, default=4)
+    parser.add_argument("--bpp_top_k", type=int, default=None, help="only consider each base's k most probable partners")
+    parser.add_argument("--bpp_threshold", type=float, default=None, help="... or partners with pair probability >= this")
+    parser.add_argument("--prior_mix", type=float, default=0.0, help="mix pair probabilities into the MCTS prior")
+    parser.add_argument("--bpp_max_span", type=int, default=None, help="max pair span in the probability computation")
+    parser.add_argument("--stem_min_length", type=int, default=None, help="only consider pairs in helices of >= this many pairs")
+    parser.add_argument("--stem_order", action="store_true", help="break Double-Q ties most stable stem first")
+    parser.add_argument("--stem_prior", type=float, default=0.0, help="weight of stem energies in the MCTS prior")
+    parser.add_argument("--beam_width", type=int, default=4, help="beams kept per step (beam policy)")
+    parser.add_argument("--beam_top_k", type=int, default=4, help="actions expanded per beam (beam policy)")
+    parser.add_argument("--beam_value_weight", type=float, default=1.0,
+                        help="kcal/mol per unit of predicted value when ranking beams (0: energy only)")
+
+
+def folder_kwargs(args, **overrides) -> Dict:
+    """Folder(**folder_kwargs(args)) for a namespace parsed with add_arguments; overrides
+    replace or supply fields (policy and ckpt after add_arguments(policy=False))."""
+    names = ("policy", "ckpt", "sims", "min_pair_separation", "bpp_top_k", "bpp_threshold", "prior_mix",
+             "bpp_max_span", "stem_min_length", "stem_order", "stem_prior", "beam_width", "beam_top_k",
+             "beam_value_weight")
+    kwargs = {k: getattr(args, k) for k in names if hasattr(args, k)}
+    kwargs.update(overrides)
+    return kwargs
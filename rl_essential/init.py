@@ -1,5 +0,0 @@
-from .env import RNARLEnv, StepResult
-from .energy import TurnerEnergyModel
-
-
-__all__ = ["RNARLEnv", "StepResult", "TurnerEnergyModel"]
\ No newline at end of file
@@ -5,27 +5,34 @@ import torch.optim as optim
 from ..networks.encoder import SimpleEncoder
 from ..networks.graph_encoder import GraphEncoder
 from ..networks.policy_value import PolicyValueNet
+from ..utils.profiling import PROFILER, timed
 
 class AlphaZeroTrainer:
     def __init__(self, encoder: str = "graph", a_max: int = 256, lr=1e-3, device="cpu"):
         self.device = device
+        self.encoder_name = encoder
         if encoder == "graph":
             self.encoder = GraphEncoder(device=device)
             in_dim = 29
         else:
             self.encoder = SimpleEncoder(device=device)
             in_dim = 24
+        self.a_max = a_max
         self.net = PolicyValueNet(in_dim=in_dim, a_max=a_max).to(device)
         self.optim = optim.Adam(self.net.parameters(), lr=lr)
         self.pi_loss = nn.KLDivLoss(reduction="batchmean")
         self.v_loss = nn.MSELoss()
 
+    @timed("train.batch")
     def batch(self, samples):
         X, P, V = [], [], []
         for (seq, state, pi, v) in samples:
             x = self.encoder.encode(seq, state)
             X.append(x)
             import torch as T
+            # pad/truncate so states with different action counts stack
+            pi = list(pi)[:self.a_max]
+            pi = pi + [0.0] * (self.a_max - len(pi))
             P.append(T.tensor(pi, dtype=T.float32, device=self.device))
             V.append(T.tensor([v], dtype=T.float32, device=self.device))
         import torch as T
@@ -34,16 +41,42 @@ class AlphaZeroTrainer:
         V = T.cat(V)
         return X, P, V
 
+    @timed("train.step")
     def train_step(self, batch_samples):
         X, P, V = self.batch(batch_samples)
-        logits, v_pred = self.net(X)
-        k = P.size(1)
-        logits = logits[:, :k]
-        logp = torch.log_softmax(logits, dim=-1)
-        loss_pi = self.pi_loss(logp, P)
-        loss_v = self.v_loss(v_pred, V)
-        loss = loss_pi + loss_v
-        self.optim.zero_grad()
-        loss.backward()
-        self.optim.step()
-        return float(loss.item()), float(loss_pi.item()), float(loss_v.item())
\ No newline at end of file
+        with PROFILER.span("train.forward_backward"):
+            logits, v_pred = self.net(X)
+            k = P.size(1)
+            logits = logits[:, :k]
+            logp = torch.log_softmax(logits, dim=-1)
+            loss_pi = self.pi_loss(logp, P)
+            loss_v = self.v_loss(v_pred, V)
+            loss = loss_pi + loss_v
+            self.optim.zero_grad()
+            loss.backward()
+            self.optim.step()
+        PROFILER.count("train.samples", len(batch_samples))
+        return float(loss.item()), float(loss_pi.item()), float(loss_v.item())
+
+    def fit(self, batches, max_steps=None):
+        """Run train_step over an iterable of sample batches (e.g. ShardLoader.iter_batches).
+        Returns mean (loss, loss_pi, loss_v) over the steps taken."""
+        totals, steps = [0.0, 0.0, 0.0], 0
+        for batch_samples in batches:
+            if max_steps is not None and steps >= max_steps:
+                break
+            for k, x in enumerate(self.train_step(batch_samples)):
+                totals[k] += x
+            steps += 1
+        return tuple(t / max(1, steps) for t in totals)
+
+    def save(self, path: str) -> None:
+        torch.save({"encoder": self.encoder_name, "a_max": self.a_max,
+                    "state_dict": self.net.state_dict()}, path)
+
+    @classmethod
+    def load(cls, path: str, device="cpu") -> "AlphaZeroTrainer":
+        ckpt = torch.load(path, map_location=device)
+        trainer = cls(encoder=ckpt["encoder"], a_max=ckpt["a_max"], device=device)
+        trainer.net.load_state_dict(ckpt["state_dict"])
+        return trainer
@@ -1,10 +1,30 @@
 from __future__ import annotations
 import math
-import torch
 from typing import List, Tuple, Optional, Dict
 
+import numpy as np
+
+from .utils.profiling import PROFILER
+
 Action = Tuple[str, Optional[int]]
 
+
+def head_actions(env, a_max: Optional[int] = None, valid: Optional[List[Action]] = None) -> List[Action]:
+    """Actions a fixed policy head of a_max outputs scores at env's state: logit k
+    scores element k. These are the legal pairs by j, then ("skip", None). If there are
+    more than a_max - 1 legal pairs, only the a_max - 1 on the most stable stems
+    (stems.StemIndex.order) are kept, still listed by j, so skip always has a slot."""
+    pairs = env.valid_actions() if valid is None else list(valid)
+    if a_max is not None and len(pairs) > a_max - 1:
+        stems = env.stems
+        if stems is None:
+            from .stems import stem_index
+            stems = stem_index(env.seq, env.min_pair_separation, env.energy)
+        keep = sorted(stems.order(env.i, [j for _, j in pairs])[:a_max - 1].tolist())
+        pairs = [("pair", j) for j in keep]
+    return pairs + [("skip", None)]
+
+
 class Node:
     def __init__(self, parent=None):
         self.parent = parent
@@ -20,17 +40,57 @@ class Node:
 class PUCT:
     """PUCT that supports pointer-style policy with unbounded actions.
     If net exposes pointer interface, we score only the valid j's per state.
+    evaluator, if given, replaces net(x) for fixed-head evaluations (e.g. a
+    BatchedEvaluator shared by concurrent searches).
+
+    bpp (a partition.McCaskill, cached per sequence) prunes and seeds the tree: each
+    node keeps only the pairs (i, j) among its top_k by pair probability and/or with
+    probability >= bpp_threshold (plus skip), and mixes prior_mix of the normalised
+    probabilities (skip gets P(i unpaired)) into the network prior. The returned
+    policy still covers every valid action, pruned ones with zero visits.
+
+    stem_prior mixes that fraction of the stems.StemIndex Boltzmann weights (the stack
+    energy of the helix each pair can extend; skip counts as an unstacked pair) into
+    the prior, a cheap guide while the network is still untrained.
     """
-    def __init__(self, env_cls, encoder, net, use_pointer: bool = True, n_sim=100, c_puct=1.4, device="cpu"):
+    def __init__(self, env_cls, encoder, net, use_pointer: bool = True, n_sim=100, c_puct=1.4, device="cpu",
+                 evaluator=None, bpp=None, top_k: Optional[int] = None, bpp_threshold: Optional[float] = None,
+                 prior_mix: float = 0.0, stem_prior: float = 0.0):
         self.env_cls = env_cls
         self.encoder = encoder
         self.net = net
+        self.evaluate = evaluator or net
+        self.bpp = bpp
+        self.top_k = top_k
+        self.bpp_threshold = bpp_threshold
+        self.prior_mix = float(prior_mix)
+        self.stem_prior = float(stem_prior)
         self.use_pointer = use_pointer
         self.n_sim = n_sim
         self.c_puct = c_puct
         self.device = device
 
-    def _policy_priors(self, env):
+    def _drive(self, steps):
+        """Run a generator from search_steps()/_priors() to completion, answering each
+        yielded (seq, state) with one encode and one self.evaluate forward."""
+        import torch  # deferred so tree code (and selfplay imports) don't load torch up front
+        try:
+            leaf = next(steps)
+            while True:
+                with PROFILER.span("mcts.encode"):
+                    x = self.encoder.encode_batch([leaf])
+                with torch.no_grad(), PROFILER.span("mcts.evaluate"):
+                    out = self.evaluate(x)
+                leaf = steps.send(out)
+        except StopIteration as stop:
+            return stop.value
+
+    def _priors(self, env):
+        """(acts, P, v) for env's state. A generator: fixed-head evaluations are yielded
+        as (seq, state), for the driver to encode (encoder.encode_batch), and resumed
+        with the net's (logits, v) of shape (1, a_max), (1,); no profiler span is held
+        open across the yield."""
+        import torch
         valid = env.valid_actions()
         if not self.use_pointer:
             # fallback: require fixed-size logits; mask invalid outside caller
@@ -43,18 +103,60 @@ class PUCT:
                 acts.append(a)
                 j_candidates.append(a[1])
         acts.append(("skip", None))
-        # Encode
-        X_nodes = self.encoder.node_features(env.seq, env.state).unsqueeze(0)
-        g_vec = self.encoder.encode(env.seq, env.state).unsqueeze(0)
-        i_idx = torch.tensor([env.state[0]], dtype=torch.long)
-        j_idx = [torch.tensor(j_candidates, dtype=torch.long)]
-        with torch.no_grad():
-            logits_list, v = self.net(g_vec, X_nodes, i_idx, j_idx)
-        logits = logits_list[0]
+        if hasattr(self.encoder, "node_features"):
+            with PROFILER.span("mcts.encode"):
+                g_vec = self.encoder.encode(env.seq, env.state).unsqueeze(0)
+            with torch.no_grad(), PROFILER.span("mcts.evaluate"):
+                X_nodes = self.encoder.node_features(env.seq, env.state).unsqueeze(0)
+                i_idx = torch.tensor([env.state[0]], dtype=torch.long)
+                j_idx = [torch.tensor(j_candidates, dtype=torch.long)]
+                logits_list, v = self.net(g_vec, X_nodes, i_idx, j_idx)
+            logits = logits_list[0]
+        else:
+            # fixed policy head: logit k scores acts[k], the layout AlphaZeroTrainer trains on
+            acts = head_actions(env, getattr(self.net, "a_max", None), valid)
+            out, v = yield env.seq, env.state
+            logits = out[0, :len(acts)]
         pi = torch.softmax(logits, dim=-1)
         P = {a: float(pi[k]) for k, a in enumerate(acts)}
+        if self.bpp is not None:
+            acts, P = self._bpp_priors(env, acts, P)
+        if self.stem_prior > 0:
+            P = self._stem_priors(env, acts, P)
         return acts, P, float(v.item())
 
+    def _bpp_priors(self, env, acts, P):
+        """Restrict acts to the likely pairs (+ skip) and mix pair probabilities into P.
+        Under constraints the probabilities come from the constrained ensemble."""
+        allowed = env.allowed
+        row = self.bpp.pair_probs(env.seq, None if allowed is None else np.triu(allowed, 1))[env.i]
+        pairs = acts[:-1]
+        q = [float(row[j]) for _, j in pairs]
+        if self.top_k is not None or self.bpp_threshold is not None:
+            order = sorted(range(len(pairs)), key=q.__getitem__, reverse=True)
+            keep = set(order[:self.top_k]) if self.top_k is not None else set()
+            if self.bpp_threshold is not None:
+                keep |= {k for k in order if q[k] >= self.bpp_threshold}
+            idx = sorted(keep)
+            pairs, q = [pairs[k] for k in idx], [q[k] for k in idx]
+        acts = pairs + [acts[-1]]
+        q.append(max(0.0, 1.0 - float(row.sum())))  # skip: i left unpaired
+        total_q = sum(q) or 1.0
+        mix = self.prior_mix
+        P = {a: (1.0 - mix) * P.get(a, 0.0) + mix * qk / total_q for a, qk in zip(acts, q)}
+        total = sum(P.values()) or 1.0
+        return acts, {a: p / total for a, p in P.items()}
+
+    def _stem_priors(self, env, acts, P):
+        """Mix stem_prior of the stem Boltzmann weights of acts (pairs, then skip) into P."""
+        stems = env.stems
+        if stems is None:
+            from .stems import stem_index
+            stems = stem_index(env.seq, env.min_pair_separation, env.energy)
+        q = stems.prior(env.i, [j for _, j in acts[:-1]])
+        mix = self.stem_prior
+        return {a: (1.0 - mix) * P.get(a, 0.0) + mix * float(qk) for a, qk in zip(acts, q)}
+
     def _puct_score(self, node: Node, a: Action, c: float) -> float:
         child = node.children.get(a)
         if child is None:
@@ -62,52 +164,66 @@ class PUCT:
         return child.Q + c * node.P.get(a, 0.0) * math.sqrt(node.N + 1e-8) / (1 + child.N)
 
     def search(self, root_env):
+        return self._drive(self.search_steps(root_env))
+
+    def search_steps(self, root_env):
+        """search() as a generator, for drivers that batch evaluations across searches
+        (SelfPlay.play_games): each leaf needing the network is yielded as (seq, state);
+        send back the net's (logits, v) for its encoding. Returns (pi, acts) through
+        StopIteration.value."""
         root = Node(parent=None)
         root.state = root_env.state
-        acts, P, v = self._policy_priors(root_env)
+        acts, P, v = yield from self._priors(root_env)
         root.P = P
         root.value = v
 
         for _ in range(self.n_sim):
+            PROFILER.count("mcts.simulations")
             node = root
-            env = self.env_cls(root_env.seq, energy_model=root_env.energy)
-            env.i, env.pairing, env.E = root_env.i, root_env.pairing.copy(), root_env.E
+            with PROFILER.span("mcts.copy_env"):
+                env = root_env.copy()  # no reset(): masks, stems and energy are shared
             path = []
-            while True:
-                if env.i >= env.n:
-                    node.terminal = True
-                    break
-                valid = env.valid_actions()
-                if not valid:
-                    node.terminal = True
-                    break
-                if len(node.children) == 0:
-                    acts, P, v = self._policy_priors(env)
-                    node.P = P
-                    node.value = v
-                    break
-                best_a, best_s = None, -1e18
-                for a in valid + [("skip", None)]:
-                    s = self._puct_score(node, a, self.c_puct)
-                    if s > best_s:
-                        best_a, best_s = a, s
-                path.append((node, best_a))
-                sr = env.step(best_a)
-                if best_a not in node.children:
-                    node.children[best_a] = Node(parent=node)
-                    node.children[best_a].state = sr.state
-                node = node.children[best_a]
-                if sr.done:
-                    node.terminal = True
-                    node.value = -sr.info["energy"]
-                    break
-            v = node.value
-            for parent, a in reversed(path):
-                child = parent.children[a]
-                child.N += 1
-                child.W += v
-                child.Q = child.W / child.N
-                parent.N += 1
+            expand = False
+            with PROFILER.span("mcts.select"):
+                while True:
+                    if env.i >= env.n:
+                        node.terminal = True
+                        break
+                    valid = env.valid_actions()
+                    if not valid:
+                        node.terminal = True
+                        break
+                    if not node.P:
+                        expand = True
+                        break
+                    best_a, best_s = None, -1e18
+                    for a in (node.P if self.bpp is not None else valid + [("skip", None)]):
+                        s = self._puct_score(node, a, self.c_puct)
+                        if s > best_s:
+                            best_a, best_s = a, s
+                    path.append((node, best_a))
+                    sr = env.step(best_a)
+                    if best_a not in node.children:
+                        node.children[best_a] = Node(parent=node)
+                        node.children[best_a].state = sr.state
+                    node = node.children[best_a]
+                    if sr.done:
+                        node.terminal = True
+                        node.value = -sr.info["energy"]
+                        break
+            if expand:
+                acts, P, v = yield from self._priors(env)
+                node.P = P
+                node.value = v
+                PROFILER.count("mcts.expansions")
+            with PROFILER.span("mcts.backup"):
+                v = node.value
+                for parent, a in reversed(path):
+                    child = parent.children[a]
+                    child.N += 1
+                    child.W += v
+                    child.Q = child.W / child.N
+                    parent.N += 1
         # Build improved policy from visit counts
         valid = root_env.valid_actions()
         acts = [a for a in valid] + [("skip", None)]
@@ -0,0 +1,49 @@
+from __future__ import annotations
+from typing import Dict, Iterable, List, Set, Tuple
+
+from .utils.structures import from_dot_bracket
+
+
+def base_pairs(structure) -> Set[Tuple[int, int]]:
+    """{(i, j), i < j} of a pairing list or a dot-bracket string."""
+    pairing = from_dot_bracket(structure) if isinstance(structure, str) else structure
+    return {(i, j) for i, j in enumerate(pairing) if j > i}
+
+
+def pair_scores(pred, ref) -> Dict[str, float]:
+    """Base-pair counts and scores of a predicted vs reference structure.
+
+    sensitivity = TP / (TP + FN), ppv = TP / (TP + FP), f1 their harmonic mean. Exact
+    (i, j) matches only. Conventions for empty sets: no reference pairs gives
+    sensitivity 1, no predicted pairs gives ppv 1, so an unpaired prediction of an
+    unpaired reference scores f1 = 1.
+    """
+    p, r = base_pairs(pred), base_pairs(ref)
+    tp = len(p & r)
+    out = {"tp": tp, "fp": len(p) - tp, "fn": len(r) - tp}
+    out.update(_scores(out["tp"], out["fp"], out["fn"]))
+    return out
+
+
+def _scores(tp: int, fp: int, fn: int) -> Dict[str, float]:
+    sens = tp / (tp + fn) if tp + fn else 1.0
+    ppv = tp / (tp + fp) if tp + fp else 1.0
+    f1 = 2 * sens * ppv / (sens + ppv) if sens + ppv else 0.0
+    return {"sensitivity": sens, "ppv": ppv, "f1": f1}
+
+
+def aggregate(rows: Iterable[Dict]) -> Dict[str, float]:
+    """Dataset-level scores of pair_scores() rows (extra keys such as energy_gap are
+    averaged when present). micro_* pool TP/FP/FN over all sequences; mean_* average
+    the per-sequence values."""
+    rows = list(rows)
+    out: Dict[str, float] = {"n": len(rows)}
+    if not rows:
+        return out
+    tp, fp, fn = (sum(r[k] for r in rows) for k in ("tp", "fp", "fn"))
+    out.update({f"micro_{k}": v for k, v in _scores(tp, fp, fn).items()})
+    for k in ("sensitivity", "ppv", "f1", "energy_gap"):
+        vals: List[float] = [r[k] for r in rows if r.get(k) is not None]
+        if vals:
+            out[f"mean_{k}"] = sum(vals) / len(vals)
+    return out
@@ -0,0 +1,145 @@
+from __future__ import annotations
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .energy import TurnerEnergyModel
+from .env import BASE_CODE, PAIR_TABLE
+
+INF = float("inf")
+
+
+def allowed_pairs(seq: str, min_pair_separation: int = 4) -> np.ndarray:
+    """n x n bool: (i, j) may pair (i < j, base-compatible, j - i >= min_pair_separation)."""
+    codes = np.array([BASE_CODE[b] for b in seq], dtype=np.int8)
+    idx = np.arange(len(seq))
+    return PAIR_TABLE[codes[:, None], codes[None, :]] & (idx[None, :] - idx[:, None] >= max(1, min_pair_separation))
+
+
+class MFEFolder:
+    """Exact minimum of TurnerEnergyModel.total_energy over pseudoknot-free structures.
+
+    The model only charges stacks, a hairpin term at every helix end whose two inner
+    flanks are unpaired, and a cost for exterior unpaired runs that precede a pair
+    (loops enclosed by a pair are otherwise free). So a Zuker-style O(n^3) recursion is exact:
+        V[a,b]  a-b paired:  min(stack + V[a+1,b-1],  hairpin(a+1..b-1) + F[a+2,b-2],  G[a+1,b-1])
+        G[a,b]  a or b paired, but not to each other
+        F[a,b]  any structure inside a pair (unpaired bases free)
+        C[a]    exterior suffix a..n-1
+    """
+    def __init__(self, energy_model: Optional[TurnerEnergyModel] = None, min_pair_separation: int = 4):
+        self.energy = energy_model or TurnerEnergyModel()
+        self.min_pair_separation = int(min_pair_separation)
+
+    def _fill(self, seq: str, allowed: np.ndarray, bonus: Optional[np.ndarray] = None):
+        n = len(seq)
+        V = np.full((n, n), INF)
+        G = np.full((n, n), INF)
+        F = np.zeros((n + 2, n + 1))  # F[a, b] = 0 for empty ranges (a > b)
+        for d in range(1, n):
+            for a in range(0, n - d):
+                b = a + d
+                if allowed[a, b]:
+                    V[a, b] = min(self._v_options(seq, a, b, allowed, V, G, F))
+                    if bonus is not None:
+                        V[a, b] -= bonus[a, b]
+                if a > 0 and b < n - 1 and allowed[a - 1, b + 1] and d >= 2:
+                    G[a, b] = min(self._g_options(a, b, V, F))
+                F[a, b] = min(F[a + 1, b], float(np.min(V[a, a + 1:b + 1] + F[a + 2:b + 2, b])))
+        C = np.zeros(n + 2)
+        P = np.full(n + 1, INF)
+        for a in range(n - 1, -1, -1):
+            P[a] = float(np.min(V[a, a + 1:] + C[a + 2:n + 1], initial=INF))
+            C[a] = min(self._c_options(a, n, P, C))
+        return V, G, F, P, C
+
+    def _v_options(self, seq, a, b, allowed, V, G, F):
+        E = self.energy
+        stack = INF
+        if a + 1 < b - 1 and allowed[a + 1, b - 1]:
+            stack = E.stack_energy(seq, a, b) + V[a + 1, b - 1]
+        if a + 1 > b - 1:
+            hairpin = 0.0  # no loop between adjacent bases
+        else:
+            hairpin = E.hairpin_energy(seq, a + 1, b - 1) + (F[a + 2, b - 2] if a + 2 <= b - 2 else 0.0)
+        inner = G[a + 1, b - 1] if a + 1 < b - 1 else INF
+        return (stack, hairpin, inner)
+
+    @staticmethod
+    def _g_options(a, b, V, F):
+        left = V[a, a + 1:b] + F[a + 2:b + 1, b]   # a pairs k < b
+        right = F[a, a:b - 1] + V[a + 1:b, b]      # b pairs k > a
+        return (float(np.min(left, initial=INF)), float(np.min(right, initial=INF)))
+
+    def _c_options(self, a, n, P, C):
+        runs = self.energy.exterior_run_energy(np.arange(1, n - a)) + P[a + 1:n]
+        return (0.0, P[a], float(np.min(runs, initial=INF)))
+
+    def fold(self, seq: str, allowed: Optional[np.ndarray] = None,
+             forced: Iterable[Tuple[int, int]] = ()) -> Tuple[List[int], float]:
+        """Return (pairing, energy) of the minimum-energy structure.
+
+        allowed restricts the pairs considered (e.g. Constraints.mask()); every pair in
+        forced must appear. Forced pairs get a bonus larger than any energy difference
+        between structures, so the minimum includes all of them whenever they are
+        mutually compatible and allowed; the returned energy is the plain model energy.
+        """
+        n = len(seq)
+        if allowed is None:
+            allowed = allowed_pairs(seq, self.min_pair_separation)
+        pairing = [-1] * n
+        if n < 2:
+            return pairing, self.energy.total_energy(seq, pairing)
+        bonus = None
+        forced = list(forced)
+        if forced:
+            bonus = np.zeros((n, n))
+            for i, j in forced:
+                bonus[min(i, j), max(i, j)] = 100.0 * (n + 1)
+        V, G, F, P, C = self._fill(seq, allowed, bonus)
+
+        todo: List[Tuple[str, int, int]] = []
+        a = 0
+        while a < n:  # exterior traceback
+            opts = self._c_options(a, n, P, C)
+            choice = int(np.argmin(opts))
+            if choice == 0 or opts[choice] == INF:
+                break
+            if choice == 2:
+                runs = self.energy.exterior_run_energy(np.arange(1, n - a)) + P[a + 1:n]
+                a = a + 1 + int(np.argmin(runs))
+            l = a + 1 + int(np.argmin(V[a, a + 1:] + C[a + 2:n + 1]))
+            todo.append(("V", a, l))
+            a = l + 1
+        while todo:
+            kind, a, b = todo.pop()
+            if a > b:
+                continue
+            if kind == "V":
+                pairing[a], pairing[b] = b, a
+                choice = int(np.argmin(self._v_options(seq, a, b, allowed, V, G, F)))
+                if choice == 0:
+                    todo.append(("V", a + 1, b - 1))
+                elif choice == 1:
+                    todo.append(("F", a + 2, b - 2))
+                else:
+                    todo.append(("G", a + 1, b - 1))
+            elif kind == "G":
+                if int(np.argmin(self._g_options(a, b, V, F))) == 0:
+                    k = a + 1 + int(np.argmin(V[a, a + 1:b] + F[a + 2:b + 1, b]))
+                    todo += [("V", a, k), ("F", k + 1, b)]
+                else:
+                    k = a + 1 + int(np.argmin(F[a, a:b - 1] + V[a + 1:b, b]))
+                    todo += [("F", a, k - 1), ("V", k, b)]
+            else:  # "F"
+                if F[a, b] == F[a + 1, b]:
+                    todo.append(("F", a + 1, b))
+                else:
+                    k = a + 1 + int(np.argmin(V[a, a + 1:b + 1] + F[a + 2:b + 2, b]))  # a's partner
+                    todo += [("V", a, k), ("F", k + 1, b)]
+        return pairing, self.energy.total_energy(seq, pairing)
+
+
+def mfe_fold(seq: str, energy_model: Optional[TurnerEnergyModel] = None,
+             min_pair_separation: int = 4) -> Tuple[List[int], float]:
+    return MFEFolder(energy_model, min_pair_separation).fold(seq)
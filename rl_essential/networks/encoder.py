@@ -1,8 +1,15 @@
 from __future__ import annotations
 from typing import List, Tuple
+import numpy as np
 import torch
 
+from ..utils.profiling import timed
+
 BASE2IDX = {"A":0, "U":1, "G":2, "C":3}
+CODE = np.zeros(256, dtype=np.intp)  # ASCII byte -> BASE2IDX
+for _b, _k in BASE2IDX.items():
+    CODE[ord(_b)] = _k
+DIST_BUCKET_EDGES = np.array([0, 3, 7, 15, 31])  # _dist_bucket as a searchsorted table
 
 class SimpleEncoder:
     def __init__(self, device: str = "cpu"):
@@ -16,19 +23,30 @@ class SimpleEncoder:
         if d <= 31: return 4
         return 5
 
+    def candidate_features(self, state: Tuple[int, List[int]], js: List[int], stems) -> torch.Tensor:
+        """(len(js), 2) stem features [helix length, -stack energy] / 10 of the candidate
+        pairs (i, j) at the current i, for pointer-style heads. stems is the env's
+        stems.StemIndex (same separation and energy model), e.g. env.stems."""
+        return torch.from_numpy(stems.features(state[0], js)).to(self.device)
+
+    @timed("encoder.simple")
+    def encode_batch(self, items: List[Tuple[str, Tuple[int, List[int]]]]) -> torch.Tensor:
+        """(len(items), 24) encodings of (seq, state) pairs, for one batched forward."""
+        out = np.empty((len(items), 24), dtype=np.float32)
+        for b, (seq, (i, pairing)) in enumerate(items):
+            n = len(seq)
+            k = np.arange(n)
+            p = np.asarray(pairing)
+            paired = p != -1
+            X = np.zeros((n, 12), dtype=np.float32)
+            X[k, CODE[np.frombuffer(seq.encode("ascii"), dtype=np.uint8)]] = 1.0
+            X[:, 4] = paired
+            X[k, 5 + np.searchsorted(DIST_BUCKET_EDGES, np.where(paired, np.abs(p - k), 0))] = 1.0
+            if 0 <= i < n:
+                X[i, 11] = 1.0
+            out[b, :12] = X.mean(axis=0)
+            out[b, 12:] = X.max(axis=0)
+        return torch.from_numpy(out).to(self.device)
+
     def encode(self, seq: str, state: Tuple[int, List[int]]) -> torch.Tensor:
-        i, pairing = state
-        feats = []
-        for k, b in enumerate(seq):
-            x = [0.0]*4
-            x[BASE2IDX[b]] = 1.0
-            paired = 1.0 if pairing[k] != -1 else 0.0
-            dist = 0 if pairing[k] == -1 else abs(pairing[k]-k)
-            db = [0.0]*6
-            db[self._dist_bucket(dist)] = 1.0
-            cur = 1.0 if k == i else 0.0
-            feats.append(x + [paired] + db + [cur])
-        X = torch.tensor(feats, dtype=torch.float32, device=self.device)
-        mean = X.mean(dim=0)
-        mx, _ = X.max(dim=0)
-        return torch.cat([mean, mx], dim=0)  # (24,)
\ No newline at end of file
+        return self.encode_batch([(seq, state)])[0]  # (24,)
@@ -1,8 +1,15 @@
 from __future__ import annotations
 from typing import List, Tuple
+import numpy as np
 import torch
 
+from ..utils.profiling import timed
+
 BASE2IDX = {"A":0, "U":1, "G":2, "C":3}
+CODE = np.zeros(256, dtype=np.intp)  # ASCII byte -> BASE2IDX
+for _b, _k in BASE2IDX.items():
+    CODE[ord(_b)] = _k
+HELIX_BIN_EDGES = np.array([2, 4, 8, 16])  # _helix_bin as a searchsorted table
 
 class GraphEncoder:
     """Graph-aware encoder: nodes = positions; edges = backbone (k,k+1) and pairing (k, pairing[k]).
@@ -37,34 +44,50 @@ class GraphEncoder:
         if L <= 16: return 3
         return 4
 
-    def encode(self, seq: str, state: Tuple[int, List[int]]) -> torch.Tensor:
+    def candidate_features(self, state: Tuple[int, List[int]], js: List[int], stems) -> torch.Tensor:
+        """(len(js), 2) stem features [helix length, -stack energy] / 10 of the candidate
+        pairs (i, j) at the current i, for pointer-style heads. stems is the env's
+        stems.StemIndex (same separation and energy model), e.g. env.stems."""
+        return torch.from_numpy(stems.features(state[0], js)).to(self.device)
+
+    def _node_features(self, seq: str, state: Tuple[int, List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+        """(n, 12) float32 node features and the 5-bin helix histogram, vectorised over positions."""
         i, pairing = state
         n = len(seq)
-        helices = self._helices(pairing)
-        # Map each node to helix bin id (coarse). If unassigned, -1.
-        helix_id = [-1]*n
-        for h_idx, (a,b,L) in enumerate(helices):
-            for k in range(L):
-                helix_id[a+k] = self._helix_bin(L)
-                helix_id[b-k] = self._helix_bin(L)
-        # node features
-        feats = []
-        for k, b in enumerate(seq):
-            xb = [0.0]*4; xb[BASE2IDX[b]] = 1.0
-            paired = 1.0 if pairing[k] != -1 else 0.0
-            deg = 2.0  # backbone deg (k-1,k+1)
-            if k == 0 or k == n-1: deg -= 1.0
-            if pairing[k] != -1: deg += 1.0
-            hbins = [0.0]*5
-            if helix_id[k] >= 0: hbins[helix_id[k]] = 1.0
-            cur = 1.0 if k == i else 0.0
-            feats.append(xb + [paired, deg] + hbins + [cur])
-        X = torch.tensor(feats, dtype=torch.float32, device=self.device)
-        mean = X.mean(dim=0)
-        mx, _ = X.max(dim=0)
-        # global helix histogram
-        hist = [0]*5
-        for _,_,L in helices:
-            hist[self._helix_bin(L)] += 1
-        H = torch.tensor(hist, dtype=torch.float32, device=self.device)
-        return torch.cat([mean, mx, H], dim=0)  # ( (4+1+1+5+1)*2 + 5 = (12)*2 + 5 = 29 )
\ No newline at end of file
+        k = np.arange(n)
+        p = np.asarray(pairing)
+        paired = p != -1
+        # helix runs as in _helices: a rightward pair stacked on the one before continues its run
+        right = p > k
+        cont = np.zeros(n, dtype=bool)
+        cont[1:] = right[1:] & (p[:-1] == p[1:] + 1)
+        run = np.cumsum(right & ~cont)
+        lengths = np.bincount(run[right], minlength=run[-1] + 1 if n else 1)
+        bins = np.searchsorted(HELIX_BIN_EDGES, lengths)
+        hbin = np.full(n, -1)
+        hbin[k[right]] = bins[run[right]]
+        hbin[p[right]] = bins[run[right]]
+        X = np.zeros((n, 12), dtype=np.float32)
+        X[k, CODE[np.frombuffer(seq.encode("ascii"), dtype=np.uint8)]] = 1.0
+        X[:, 4] = paired
+        X[:, 5] = 2.0 - ((k == 0) | (k == n - 1)) + paired
+        X[k[hbin >= 0], 6 + hbin[hbin >= 0]] = 1.0
+        if 0 <= i < n:
+            X[i, 11] = 1.0
+        hist = np.bincount(bins[1:], minlength=5)
+        return X, hist
+
+    @timed("encoder.graph")
+    def encode_batch(self, items: List[Tuple[str, Tuple[int, List[int]]]]) -> torch.Tensor:
+        """(len(items), 29) encodings of (seq, state) pairs, for one batched forward."""
+        out = np.empty((len(items), 29), dtype=np.float32)
+        for b, (seq, state) in enumerate(items):
+            X, hist = self._node_features(seq, state)
+            out[b, :12] = X.mean(axis=0)
+            out[b, 12:24] = X.max(axis=0)
+            out[b, 24:] = hist
+        return torch.from_numpy(out).to(self.device)
+
+    def encode(self, seq: str, state: Tuple[int, List[int]]) -> torch.Tensor:
+        # (4+1+1+5+1) node features, mean + max pooled, + 5-bin helix histogram = 29
+        return self.encode_batch([(seq, state)])[0]
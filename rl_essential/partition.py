@@ -0,0 +1,196 @@
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .energy import TurnerEnergyModel
+from .mfe import allowed_pairs
+
+KT = 0.61632  # kcal/mol at 37 C
+NEG = -np.inf
+
+
+def _lse(x: np.ndarray, axis: int = -1) -> np.ndarray:
+    """log(sum(exp(x))) along axis; all -inf (or nothing) gives -inf."""
+    if x.shape[axis] == 0:
+        return np.full(np.delete(x.shape, axis), NEG)
+    m = np.max(x, axis=axis, keepdims=True)
+    m = np.where(np.isfinite(m), m, 0.0)
+    with np.errstate(divide="ignore"):
+        return np.log(np.sum(np.exp(x - m), axis=axis)) + np.squeeze(m, axis)
+
+
+class McCaskill:
+    """Boltzmann partition function and base-pair probabilities of TurnerEnergyModel.
+
+    Same decomposition as mfe.MFEFolder with sums in place of minima, except that G
+    is split so no structure is counted twice: the left end pairs, or the left end is
+    unpaired and the right end pairs. Everything is in log space, so long sequences
+    neither overflow nor underflow. Each row (left end a) is one batch of numpy ops,
+    both inside and outside, so the cost is O(n^3) flops over only O(n) Python steps;
+    rows and columns that cannot pair are skipped, and max_span caps the window.
+    Arrays are (i, j) indexed with two -inf sentinel rows/columns for edge gathers.
+
+    pair_probs() keeps the most recent results per sequence, so MCTS and the env can
+    ask for the same sequence repeatedly.
+    """
+    def __init__(self, energy_model: Optional[TurnerEnergyModel] = None, min_pair_separation: int = 4,
+                 kT: float = KT, max_span: Optional[int] = None, cache_size: int = 64):
+        self.energy = energy_model or TurnerEnergyModel()
+        self.min_pair_separation = int(min_pair_separation)
+        self.kT = float(kT)
+        self.max_span = None if max_span is None else int(max_span)
+        self.cache_size = int(cache_size)
+        self._cache: "OrderedDict[Tuple, Tuple[np.ndarray, float]]" = OrderedDict()
+        self._lock = threading.Lock()  # one instance may serve several fold threads
+
+    # ---------- public ----------
+    def pair_probs(self, seq: str, allowed: Optional[np.ndarray] = None) -> np.ndarray:
+        """Symmetric n x n matrix of P(i pairs j)."""
+        return self.compute(seq, allowed)[0]
+
+    def ensemble_energy(self, seq: str, allowed: Optional[np.ndarray] = None) -> float:
+        """-kT ln Z, in kcal/mol."""
+        return -self.kT * self.compute(seq, allowed)[1]
+
+    def compute(self, seq: str, allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, float]:
+        """(pair probability matrix, ln Z), cached per (seq, allowed)."""
+        key = (seq, None if allowed is None else np.packbits(allowed).tobytes())
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                return hit
+        if allowed is None:
+            allowed = allowed_pairs(seq, self.min_pair_separation)
+        out = self._compute(seq, np.triu(np.asarray(allowed, dtype=bool), 1))
+        with self._lock:
+            self._cache[key] = out
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return out
+
+    # ---------- DP ----------
+    def _tables(self, seq: str, allowed: np.ndarray):
+        n, N = len(seq), len(seq) + 2
+        lA = np.full((N, N), NEG)            # 0 where (i, j) may pair
+        lA[:n, :n][allowed] = 0.0
+        lS = np.full((N, N), NEG)            # stack weight of (i, j) on (i+1, j-1)
+        lS[:n, :n] = -self.energy.stack_energy_matrix(seq) / self.kT
+        lH = np.full((N, N), NEG)            # hairpin weight of flanks il..jr
+        lH[:n, :n] = -self.energy.hairpin_energy_matrix(seq) / self.kT
+        lR = np.full(n + 1, NEG)             # exterior run of length L followed by a pair
+        lR[1:] = -np.asarray(self.energy.exterior_run_energy(np.arange(1, n + 1)), dtype=float) / self.kT
+        return lA, lS, lH, lR
+
+    def _compute(self, seq: str, allowed: np.ndarray) -> Tuple[np.ndarray, float]:
+        n = len(seq)
+        if self.max_span is not None:
+            allowed = np.triu(allowed, 1) & ~np.triu(np.ones_like(allowed), self.max_span + 1)
+        if n < 2 or not allowed.any():
+            return np.zeros((n, n)), 0.0
+        W = n if self.max_span is None else max(1, self.max_span)
+        N = n + 2
+        lA, lS, lH, lR = self._tables(seq, allowed)
+        V, G = np.full((N, N), NEG), np.full((N, N), NEG)
+        Fx = np.full((N + 1, N + 1), NEG)  # Fx[i, j] = F over i..j-1; Fx[i, i] is the empty segment
+        idx = np.arange(N)
+        Fx[idx, idx] = 0.0
+        Fx[idx, idx + 1] = 0.0
+
+        # ---------- inside, rows a = n-2 .. 0 ----------
+        for a in range(n - 2, -1, -1):
+            b = np.arange(a + 1, n)
+            d = b - a
+            hp = np.where(d == 1, 0.0, lH[a + 1, b - 1] + np.where(d >= 4, Fx[a + 2, b - 1], 0.0))
+            V[a, b] = lA[a, b] + np.logaddexp(np.logaddexp(lS[a, b] + V[a + 1, b - 1], hp), G[a + 1, b - 1])
+            # a pairs k, F[k+1..b] follows; k == b (nothing follows) belongs to F only
+            ks = a + 1 + np.flatnonzero(lA[a, a + 1:min(n - 1, a + W) + 1] == 0.0)  # V[a, k] > 0 only here
+            block = V[a, ks, None] + Fx[ks + 1, a + 2:n + 1]
+            block[np.arange(len(ks)), ks - a - 1] = NEG
+            left = _lse(block, axis=0)
+            Fx[a, a + 2:n + 1] = np.logaddexp(np.logaddexp(Fx[a + 1, a + 2:n + 1], left), V[a, b])
+            # a unpaired, k pairs b: only needed where G can sit inside an allowed pair
+            gmax = min(n - 1, a + W)
+            right = _lse(Fx[a + 1, a + 1:gmax, None] + V[a + 1:gmax, a + 1:gmax + 1], axis=0) if gmax > a + 1 else NEG
+            G[a, a + 1:gmax + 1] = np.logaddexp(left[:gmax - a], right)
+
+        # exterior: C[a] is the suffix a..n-1, Pe[a] has a paired
+        C = np.zeros(n + 2)
+        Pe = np.full(n + 1, NEG)
+        for a in range(n - 1, -1, -1):
+            Pe[a] = _lse(V[a, a + 1:n] + C[a + 2:n + 1])
+            runs = _lse(lR[1:n - a] + Pe[a + 1:n])
+            C[a] = np.logaddexp(np.logaddexp(0.0, Pe[a]), runs)
+        logZ = float(C[0])
+
+        # ---------- outside ----------
+        Co = np.full(n + 2, NEG)
+        Co[0] = 0.0
+        Peo = np.full(n + 1, NEG)
+        for a in range(n):
+            Peo[a] = np.logaddexp(Co[a], _lse(Co[a - 1::-1][:a] + lR[1:a + 1]) if a else NEG)
+            Co[a + 2:n + 1] = np.logaddexp(Co[a + 2:n + 1], Peo[a] + V[a, a + 1:n])
+
+        Vo, Go, Fo, FG = (np.full((N, N), NEG) for _ in range(4))
+        for x in range(n - 1):
+            y = np.arange(x + 1, n)
+            # F[x..y]: after an unpaired x-1; after V[a..x-1] inside F/G[a..y];
+            # before V[y+1..b] in the right branch of G[x-1..b]; inside hairpin V[x-2..y+2]
+            fo = Fo[x - 1, y] if x >= 1 else np.full(len(y), NEG)
+            if x >= 2:
+                a_ = np.flatnonzero(lA[:x - 1, x - 1] == 0.0)
+                fo = np.logaddexp(fo, _lse(FG[a_, x + 1:n] + V[a_, x - 1, None], axis=0))
+            if x >= 1:
+                bs = np.flatnonzero(np.isfinite(Go[x - 1, :n]))
+                bs = bs[bs >= x + 2]
+                if len(bs):
+                    t = _lse(V[x + 2:n, bs] + Go[x - 1, bs], axis=1)
+                    fo[:len(t)] = np.logaddexp(fo[:len(t)], t)
+                fo = np.logaddexp(fo, Vo[x - 2, y + 2] + lA[x - 2, y + 2] + lH[x - 1, y + 1]) if x >= 2 else fo
+                Go[x, y] = Vo[x - 1, y + 1] + lA[x - 1, y + 1]
+            Fo[x, y] = fo
+            FG[x, y] = np.logaddexp(fo, Go[x, y])
+            # V[x..y]: exterior; stacked in V[x-1..y+1]; ahead of F[y+1..b] in F/G[x..b];
+            # after F[a+1..x-1] in the right branch of G[a..y]
+            yv = x + 1 + np.flatnonzero(lA[x, x + 1:min(n - 1, x + W) + 1] == 0.0)  # V[x, y] > 0 only here
+            if not len(yv):
+                continue
+            vo = Peo[x] + C[yv + 1]
+            if x >= 1:
+                vo = np.logaddexp(vo, Go[x, yv] + lS[x - 1, yv + 1])
+            block = FG[x, x + 1:n] + Fx[yv + 1, x + 2:n + 1]
+            block[np.arange(len(yv)), yv - x - 1] = NEG  # b == y: F only, added below
+            vo = np.logaddexp(vo, np.logaddexp(_lse(block, axis=1), Fo[x, yv]))
+            if x >= 1:
+                a0 = max(0, x - W)
+                vo = np.logaddexp(vo, _lse(Go[a0:x, yv] + Fx[a0 + 1:x + 1, x, None], axis=0))
+            Vo[x, yv] = vo
+
+        with np.errstate(over="ignore"):
+            probs = np.triu(np.exp(V[:n, :n] + Vo[:n, :n] - logZ), 1)
+        np.clip(probs, 0.0, 1.0, out=probs)
+        return probs + probs.T, logZ
+
+
+def candidate_mask(probs: np.ndarray, top_k: Optional[int] = None, threshold: Optional[float] = None) -> np.ndarray:
+    """Symmetric bool mask keeping, for each i, its top_k partners j > i by probability
+    and/or every pair with probability >= threshold (the union when both are given)."""
+    if top_k is None and threshold is None:
+        raise ValueError("candidate_mask needs top_k and/or threshold")
+    n = probs.shape[0]
+    up = np.triu(probs, 1)
+    keep = np.zeros((n, n), dtype=bool)
+    if threshold is not None:
+        keep |= up >= threshold
+    if top_k is not None and top_k > 0 and n > 1:
+        k = min(int(top_k), n)
+        idx = np.argpartition(-up, k - 1, axis=1)[:, :k]
+        rows = np.repeat(np.arange(n), k)
+        cols = idx.ravel()
+        hit = up[rows, cols] > 0
+        keep[rows[hit], cols[hit]] = True
+    keep = np.triu(keep, 1)
+    return keep | keep.T
@@ -1,29 +1,105 @@
 from __future__ import annotations
-from typing import List, Tuple
+from typing import Dict, Iterable, Iterator, List, Tuple
+import numpy as np
 from .mcts import PUCT
 
 class SelfPlay:
-    def __init__(self, env_cls, encoder, net, mcts_sims=100, device="cpu"):
+    """Plays MCTS-guided episodes. If `writer` (a shards.ShardWriter) is given,
+    finished trajectories are also appended to disk tagged with `net_version`."""
+    def __init__(self, env_cls, encoder, net, mcts_sims=100, device="cpu", writer=None, net_version: int = 0):
         self.env_cls = env_cls
         self.encoder = encoder
         self.net = net
         self.device = device
         self.mcts_sims = mcts_sims
+        self.writer = writer
+        self.net_version = net_version
+
+    def _search(self):
+        return PUCT(self.env_cls, self.encoder, self.net, n_sim=self.mcts_sims, device=self.device)
+
+    def _move(self, env, traj, s, pi, acts):
+        """Sample a move from pi, record (seq, s, pi) and step env."""
+        a_idx = np.random.choice(len(acts), p=pi)
+        sr = env.step(acts[a_idx])
+        traj.append((env.seq, s, pi, 0.0))
+        return sr
+
+    def _finish(self, traj, sr):
+        final_reward = -sr.info["energy"]
+        traj = [(seq, st, pi, final_reward) for (seq, st, pi, _) in traj]
+        if self.writer is not None:
+            self.writer.add_trajectory(traj, net_version=self.net_version)
+        return traj, sr.info
 
     def play_episode(self, seq: str):
         env = self.env_cls(seq)
         s = env.reset()
         traj = []
         while True:
-            mcts = PUCT(self.env_cls, self.encoder, self.net, n_sim=self.mcts_sims, device=self.device)
-            pi, acts = mcts.search(env)
-            import numpy as np
-            a_idx = np.random.choice(len(acts), p=pi)
-            a = acts[a_idx]
-            sr = env.step(a)
-            traj.append((seq, s, pi, 0.0))
+            pi, acts = self._search().search(env)
+            sr = self._move(env, traj, s, pi, acts)
             s = sr.state
             if sr.done:
-                final_reward = -sr.info["energy"]
-                traj = [(seq, st, pi, final_reward) for (seq, st, pi, _) in traj]
-                return traj, sr.info
\ No newline at end of file
+                return self._finish(traj, sr)
+
+    def play_games(self, seqs: Iterable[str], games: int = 8) -> Iterator[Tuple[List, Dict]]:
+        """Play an episode per sequence, up to `games` at once in lockstep, yielding
+        (traj, info) as each game finishes (not in seqs order).
+
+        Every round advances each live game's search (PUCT.search_steps) to its next
+        leaf that needs the network, then encodes all of those leaves as one batch
+        (encoder.encode_batch) and evaluates them in one forward, so the per-call
+        overhead is shared across games instead of paid per expansion. A game whose
+        search returns samples its move and starts the next search; a finished game's
+        slot is refilled from seqs. Moves are drawn exactly
+        as in play_episode.
+        """
+        import torch
+        seqs = iter(seqs)
+        live: List[Dict] = []
+
+        def advance(game, out=None):
+            """Resume game's search with out until it yields a state; False if it ended."""
+            while True:
+                try:
+                    game["leaf"] = game["steps"].send(out) if out is not None else next(game["steps"])
+                    return True
+                except StopIteration as stop:
+                    pi, acts = stop.value
+                out = None
+                env = game["env"]
+                sr = self._move(env, game["traj"], game["s"], pi, acts)
+                game["s"] = sr.state
+                if sr.done:
+                    game["result"] = self._finish(game["traj"], sr)
+                    return False
+                game["steps"] = self._search().search_steps(env)
+
+        done: List[Tuple[List, Dict]] = []
+        while True:
+            while len(live) < games:
+                seq = next(seqs, None)
+                if seq is None:
+                    break
+                env = self.env_cls(seq)
+                game = {"env": env, "s": env.reset(), "traj": [], "steps": self._search().search_steps(env)}
+                if advance(game):
+                    live.append(game)
+                else:
+                    done.append(game["result"])
+            yield from done
+            done.clear()
+            if not live:
+                return
+            X = self.encoder.encode_batch([g["leaf"] for g in live]).to(self.device)
+            with torch.no_grad():
+                logits, v = self.net(X)
+            logits, v = logits.cpu(), v.cpu()
+            still = []
+            for k, game in enumerate(live):
+                if advance(game, (logits[k:k + 1], v[k:k + 1])):
+                    still.append(game)
+                else:
+                    done.append(game["result"])
+            live[:] = still
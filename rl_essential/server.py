@@ -0,0 +1,178 @@
+from __future__ import annotations
+import asyncio
+import collections
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from .folding import Folder
+from .utils.structures import to_dot_bracket
+
+DEFAULT_PORT = 8765
+
+
+class FoldServer:
+    """Resident folding service speaking JSON lines over a localhost TCP socket.
+
+    Requests, one JSON object per line; each reply carries the request's id and
+    replies on one connection may come back out of order:
+        {"id": "a", "seq": "GGGAAACCC", "policy": "mcts"}  -> {"id", "policy", "dot_bracket", "energy", "queue_ms", "time_ms"}
+        (optional "constraints": "x..(...)..." as in Folder.fold)
+        {"cmd": "stats"}                                   -> request counts, queue depth, latency and evaluator stats
+        {"cmd": "ping"}                                    -> {"ok": true}
+    Folders stay loaded for the life of the server. Folds run on a thread pool; set a
+    Folder's .evaluator to a BatchedEvaluator so concurrent MCTS searches share forwards.
+    With a fold_cache.FoldCache, a request already folded (same Folder.cache_key) is
+    answered from it with "cached": true, and new folds are added to it.
+    """
+    def __init__(self, folders: Dict[str, Folder], threads: Optional[int] = None, cache=None):
+        if not folders:
+            raise ValueError("FoldServer needs at least one Folder")
+        self.folders = folders
+        self.cache = cache
+        self.default_policy = next(iter(folders))
+        self.pool = ThreadPoolExecutor(threads or os.cpu_count() or 1, thread_name_prefix="fold")
+        self.n_requests = 0
+        self.n_errors = 0
+        self.queued = 0    # accepted, waiting for a pool thread
+        self.running = 0   # folding now
+        self._latency_ms = collections.deque(maxlen=4096)
+        self._lock = threading.Lock()  # counters move on both the loop and the pool threads
+
+    # ---------- request handling ----------
+    def _fold(self, folder: Folder, seq: str, constraints: Optional[str], t_in: float) -> Dict:
+        t0 = time.perf_counter()
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            key = folder.cache_key(seq, constraints) if self.cache is not None else None
+            hit = self.cache.get(key) if key is not None else None
+            if hit is None:
+                pairing, energy = folder.fold(seq, constraints=constraints)
+        finally:
+            with self._lock:
+                self.running -= 1
+        t1 = time.perf_counter()
+        out = {"queue_ms": (t0 - t_in) * 1e3, "time_ms": (t1 - t0) * 1e3}
+        if hit is not None:
+            return {"dot_bracket": hit["dot_bracket"], "energy": hit["energy"], "cached": True, **out}
+        out = {"dot_bracket": to_dot_bracket(pairing), "energy": energy, **out}
+        if key is not None:
+            self.cache.put(key, out["dot_bracket"], energy, {"time_ms": out["time_ms"], "n": len(seq)})
+        return out
+
+    async def _reply(self, msg: Dict) -> Dict:
+        if msg.get("cmd") == "stats":
+            return self.stats()
+        if msg.get("cmd") == "ping":
+            return {"ok": True}
+        rid = msg.get("id")
+        policy = msg.get("policy") or self.default_policy
+        if policy not in self.folders:
+            return {"id": rid, "error": f"policy {policy!r} not loaded; have {list(self.folders)}"}
+        if not isinstance(msg.get("seq"), str):
+            return {"id": rid, "error": "missing 'seq'"}
+        seq = msg["seq"].strip().upper().replace("T", "U")
+        constraints = msg.get("constraints")
+        if constraints is not None and not isinstance(constraints, str):
+            return {"id": rid, "error": "'constraints' must be a constraint string"}
+        t_in = time.perf_counter()
+        with self._lock:
+            self.n_requests += 1
+            self.queued += 1
+        loop = asyncio.get_running_loop()
+        try:
+            out = await loop.run_in_executor(self.pool, self._fold, self.folders[policy], seq, constraints, t_in)
+        except (AssertionError, ValueError) as e:
+            with self._lock:
+                self.n_errors += 1
+            return {"id": rid, "error": str(e) or type(e).__name__}
+        with self._lock:
+            self._latency_ms.append((time.perf_counter() - t_in) * 1e3)
+        return {"id": rid, "policy": policy, **out}
+
+    async def _respond(self, line: bytes, writer: asyncio.StreamWriter) -> None:
+        try:
+            msg = json.loads(line)
+            if not isinstance(msg, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            out = {"error": f"bad request: {e}"}
+        else:
+            out = await self._reply(msg)
+        writer.write((json.dumps(out) + "\n").encode())
+        await writer.drain()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.ensure_future(self._respond(line, writer))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    # ---------- stats ----------
+    def stats(self) -> Dict:
+        with self._lock:
+            lat = sorted(self._latency_ms)
+            out = {
+                "requests": self.n_requests,
+                "errors": self.n_errors,
+                "queued": self.queued,
+                "running": self.running,
+            }
+        out.update({
+            "threads": self.pool._max_workers,
+            "latency_ms_p50": lat[len(lat) // 2] if lat else None,
+            "latency_ms_p95": lat[int(len(lat) * 0.95)] if lat else None,
+            "evaluators": {},
+            "cache": self.cache.stats() if self.cache is not None else None,
+        })
+        for policy, folder in self.folders.items():
+            if folder.evaluator is not None:
+                out["evaluators"][policy] = folder.evaluator.stats()
+        return out
+
+    # ---------- lifecycle ----------
+    async def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        """Start listening (port 0 picks a free one: see server.sockets[0].getsockname())."""
+        return await asyncio.start_server(self.handle, host, port, limit=1 << 24)
+
+    def close(self) -> None:
+        self.pool.shutdown(wait=True)
+        if self.cache is not None:
+            self.cache.close()
+        for folder in self.folders.values():
+            if folder.evaluator is not None:
+                folder.evaluator.close()
+
+
+def fold_remote(seqs: Iterable[str], host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                policy: Optional[str] = None, timeout: Optional[float] = None) -> List[Dict]:
+    """Blocking client: send every sequence on one connection, return replies in input order."""
+    seqs = list(seqs)
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        for k, seq in enumerate(seqs):
+            msg = {"id": k, "seq": seq}
+            if policy:
+                msg["policy"] = policy
+            sock.sendall((json.dumps(msg) + "\n").encode())
+        sock.shutdown(socket.SHUT_WR)
+        with sock.makefile("r") as f:
+            replies = [json.loads(line) for line in f if line.strip()]
+    return sorted(replies, key=lambda r: r["id"])
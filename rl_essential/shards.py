@@ -0,0 +1,184 @@
+from __future__ import annotations
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+INDEX_NAME = "index.json"
+FORMAT_VERSION = 1
+
+
+def record_dtype(max_len: int, pi_width: int) -> np.dtype:
+    """Fixed-size record: one (seq, state, pi, value) self-play sample."""
+    return np.dtype([
+        ("n", "<i4"),
+        ("i", "<i4"),
+        ("value", "<f4"),
+        ("seq", "S%d" % max_len),
+        ("pairing", "<i4", (max_len,)),
+        ("pi", "<f4", (pi_width,)),
+    ])
+
+
+def _read_index(root: str) -> Optional[Dict]:
+    path = os.path.join(root, INDEX_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _write_index(root: str, index: Dict) -> None:
+    # write-then-rename so readers never see a half-written index
+    path = os.path.join(root, INDEX_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp, path)
+
+
+class ShardWriter:
+    """Append-only writer for self-play samples.
+
+    Samples go to fixed-schema binary shards (`shard-000000.bin`, ...) under `root`.
+    `index.json` lists every shard with its record count and the network version
+    that generated it; a shard holds samples from exactly one net version.
+    Records past the indexed count (e.g. after a crash) are ignored by readers.
+    """
+    def __init__(self, root: str, max_len: int = 512, pi_width: int = 256, shard_size: int = 4096):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.shard_size = int(shard_size)
+        index = _read_index(root)
+        if index is None:
+            index = {"format": FORMAT_VERSION, "max_len": int(max_len), "pi_width": int(pi_width), "shards": []}
+        elif (index["max_len"], index["pi_width"]) != (max_len, pi_width):
+            raise ValueError(
+                f"Shard schema mismatch in {root}: on disk max_len={index['max_len']} "
+                f"pi_width={index['pi_width']}, requested max_len={max_len} pi_width={pi_width}"
+            )
+        self.index = index
+        self.max_len = index["max_len"]
+        self.pi_width = index["pi_width"]
+        self.dtype = record_dtype(self.max_len, self.pi_width)
+        self._f = None
+        self._entry: Optional[Dict] = None
+
+    def _open_shard(self, net_version: int) -> None:
+        self._close_shard()
+        name = "shard-%06d.bin" % len(self.index["shards"])
+        self._entry = {"file": name, "records": 0, "net_version": int(net_version)}
+        self.index["shards"].append(self._entry)
+        # "wb": a shard left over from a writer killed before its index was saved
+        # carries the same name and must not prefix the new records
+        self._f = open(os.path.join(self.root, name), "wb")
+
+    def _close_shard(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+            _write_index(self.root, self.index)
+        self._entry = None
+
+    def add(self, seq: str, state: Tuple[int, List[int]], pi: List[float], value: float, net_version: int = 0) -> None:
+        n = len(seq)
+        if n > self.max_len:
+            raise ValueError(f"Sequence length {n} exceeds shard max_len={self.max_len}")
+        if (self._entry is None or self._entry["net_version"] != net_version
+                or self._entry["records"] >= self.shard_size):
+            self._open_shard(net_version)
+        i, pairing = state
+        rec = np.zeros((), dtype=self.dtype)
+        rec["n"] = n
+        rec["i"] = i
+        rec["value"] = value
+        rec["seq"] = seq.encode("ascii")
+        rec["pairing"][:] = -1
+        rec["pairing"][:n] = pairing
+        p = np.asarray(pi, dtype=np.float32)[:self.pi_width]
+        if len(p) < len(pi) and p.sum() > 0:
+            p = p / p.sum()  # renormalise what fits in the fixed policy width
+        rec["pi"][:len(p)] = p
+        self._f.write(rec.tobytes())
+        self._entry["records"] += 1
+
+    def add_trajectory(self, traj, net_version: int = 0) -> None:
+        """Append a SelfPlay trajectory: list of (seq, state, pi, value)."""
+        for seq, state, pi, v in traj:
+            self.add(seq, state, pi, v, net_version=net_version)
+
+    def flush(self) -> None:
+        """Make everything written so far visible to readers."""
+        if self._f is not None:
+            self._f.flush()
+            _write_index(self.root, self.index)
+
+    def close(self) -> None:
+        self._close_shard()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ShardLoader:
+    """Memory-mapped reader that streams shuffled minibatches from a shard directory.
+
+    window: keep only shards from the `window` most recent net versions.
+    min_version: drop shards generated by nets older than this version.
+    Batches are lists of (seq, (i, pairing), pi, value), the format AlphaZeroTrainer.train_step takes.
+    """
+    def __init__(self, root: str, window: Optional[int] = None, min_version: Optional[int] = None,
+                 seed: Optional[int] = None):
+        index = _read_index(root)
+        if index is None:
+            raise FileNotFoundError(f"No shard index at {os.path.join(root, INDEX_NAME)}")
+        self.root = root
+        self.dtype = record_dtype(index["max_len"], index["pi_width"])
+        shards = [s for s in index["shards"] if s["records"] > 0]
+        if min_version is not None:
+            shards = [s for s in shards if s["net_version"] >= min_version]
+        if window is not None and shards:
+            versions = sorted({s["net_version"] for s in shards})[-window:]
+            shards = [s for s in shards if s["net_version"] >= versions[0]]
+        self.shards = shards
+        self._maps = [
+            np.memmap(os.path.join(root, s["file"]), dtype=self.dtype, mode="r", shape=(s["records"],))
+            for s in shards
+        ]
+        self._offsets = np.cumsum([0] + [s["records"] for s in shards])
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return int(self._offsets[-1])
+
+    @property
+    def net_versions(self) -> List[int]:
+        return sorted({s["net_version"] for s in self.shards})
+
+    def _gather(self, idx: np.ndarray) -> List[Tuple]:
+        shard_ids = np.searchsorted(self._offsets, idx, side="right") - 1
+        out = []
+        for sid in np.unique(shard_ids):
+            rows = np.sort(idx[shard_ids == sid] - self._offsets[sid])
+            recs = self._maps[sid][rows]  # one fancy-index read per shard
+            for r in recs:
+                n = int(r["n"])
+                out.append((r["seq"].decode("ascii"), (int(r["i"]), r["pairing"][:n].tolist()),
+                            r["pi"].tolist(), float(r["value"])))
+        return out
+
+    def iter_batches(self, batch_size: int, epochs: Optional[int] = 1, shuffle: bool = True) -> Iterator[List[Tuple]]:
+        """Yield minibatches; epochs=None streams forever."""
+        total = len(self)
+        if total == 0:
+            return
+        epoch = 0
+        while epochs is None or epoch < epochs:
+            order = self.rng.permutation(total) if shuffle else np.arange(total)
+            for start in range(0, total, batch_size):
+                yield self._gather(order[start:start + batch_size])
+            epoch += 1
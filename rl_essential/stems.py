@@ -0,0 +1,90 @@
+from __future__ import annotations
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+from .energy import TurnerEnergyModel
+from .env import BASE_CODE, PAIR_TABLE
+from .partition import KT
+
+
+def _diag(A: np.ndarray, d: int) -> np.ndarray:
+    """Writable view of the d-th upper diagonal of a square C-contiguous array."""
+    n = A.shape[0]
+    return A.reshape(-1)[d::n + 1][:max(0, n - d)]
+
+
+class StemIndex:
+    """Stem potential of every pair (i, j) of one sequence, precomputed in O(n^2).
+
+    length[i, j] is the number of pairs in the longest run of stackable pairs
+    (i-k, j+k) .. (i+k', j-k') through (i, j): 0 if (i, j) cannot pair at all, 1 if
+    it pairs but cannot stack on either side. energy[i, j] is the summed stack_energy
+    of that run, its most stable helix since every stack is stabilising. Pairs must
+    be Watson-Crick/wobble and at least min_pair_separation apart, as in RNARLEnv.
+    Only j > i is filled. Each diagonal is one numpy op, so n = 3000 takes well under
+    a second.
+    """
+    def __init__(self, seq: str, min_pair_separation: int = 4, energy_model: Optional[TurnerEnergyModel] = None):
+        self.seq = seq
+        self.n = n = len(seq)
+        self.min_pair_separation = int(min_pair_separation)
+        energy = energy_model or TurnerEnergyModel()
+        codes = np.array([BASE_CODE[b] for b in seq], dtype=np.intp)
+        ok = np.triu(PAIR_TABLE[codes[:, None], codes[None, :]], max(1, self.min_pair_separation))
+        S = energy.stack_energy_matrix(seq).astype(np.float32)
+        in_len, out_len = np.zeros((n, n), dtype=np.int16), np.zeros((n, n), dtype=np.int16)
+        in_E, out_E = np.zeros((n, n), dtype=np.float32), np.zeros((n, n), dtype=np.float32)
+        # inward: (i, j) then (i+1, j-1), which sits two diagonals in
+        for d in range(1, n):
+            okd = _diag(ok, d)
+            if d >= 3:
+                inner = slice(1, n - d + 1)
+                stack = _diag(ok, d - 2)[inner]
+                _diag(in_len, d)[:] = okd * (1 + _diag(in_len, d - 2)[inner])
+                _diag(in_E, d)[:] = okd * (stack * _diag(S, d) + _diag(in_E, d - 2)[inner])
+            else:
+                _diag(in_len, d)[:] = okd
+        # outward: (i, j) then (i-1, j+1)
+        for d in range(n - 1, 0, -1):
+            okd = _diag(ok, d)
+            _diag(out_len, d)[:] = okd
+            if d + 2 < n:
+                inner = slice(1, n - d - 1)
+                stack = _diag(ok, d + 2)
+                _diag(out_len, d)[inner] = okd[inner] * (1 + _diag(out_len, d + 2))
+                _diag(out_E, d)[inner] = okd[inner] * (stack * _diag(S, d + 2) + _diag(out_E, d + 2))
+        self.length = np.where(ok, in_len + out_len - 1, 0).astype(np.int16)
+        self.energy = in_E + out_E
+
+    # ---------- queries ----------
+    def mask(self, min_length: int = 2) -> np.ndarray:
+        """Symmetric n x n bool mask of pairs in a helix of at least min_length pairs;
+        usable as RNARLEnv(candidates=...)."""
+        keep = self.length >= max(1, int(min_length))
+        return keep | keep.T
+
+    def order(self, i: int, js: np.ndarray) -> np.ndarray:
+        """js sorted by stem energy (most stable first), then longer helices, then j."""
+        js = np.asarray(js, dtype=np.intp)
+        return js[np.lexsort((js, -self.length[i, js], self.energy[i, js]))]
+
+    def prior(self, i: int, js: np.ndarray, kT: float = KT) -> np.ndarray:
+        """Boltzmann weights of the stems behind ('pair', j) for js, then ('skip', None)
+        (weight of an unstacked pair), normalised to sum to 1."""
+        e = np.append(self.energy[i, np.asarray(js, dtype=np.intp)].astype(float), 0.0)
+        w = np.exp(-(e - e.min()) / kT)
+        return w / w.sum()
+
+    def features(self, i: int, js: np.ndarray) -> np.ndarray:
+        """(len(js), 2) float32 per-candidate features [helix length, -stack energy], / 10."""
+        js = np.asarray(js, dtype=np.intp)
+        return np.stack([self.length[i, js], -self.energy[i, js]], axis=1).astype(np.float32) / 10.0
+
+
+@lru_cache(maxsize=32)
+def stem_index(seq: str, min_pair_separation: int = 4,
+               energy_model: Optional[TurnerEnergyModel] = None) -> StemIndex:
+    """StemIndex(seq, ...) built once and reused by envs, MCTS and encoders."""
+    return StemIndex(seq, min_pair_separation, energy_model)
@@ -0,0 +1,141 @@
+from __future__ import annotations
+import functools
+import json
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("prof", "name", "t0", "child")
+
+    def __init__(self, prof: "Profiler", name: str):
+        self.prof = prof
+        self.name = name
+        self.child = 0.0
+
+    def __enter__(self):
+        self.prof._stack.append(self)
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        dt = time.perf_counter() - self.t0
+        prof = self.prof
+        prof._stack.pop()
+        prof.total[self.name] += dt
+        prof.self_time[self.name] += dt - self.child
+        prof.calls[self.name] += 1
+        if prof._stack:
+            prof._stack[-1].child += dt
+        return False
+
+
+class Profiler:
+    """Named timers and counters for the hot paths.
+
+    Disabled (the default) every span() is a shared no-op context and count() returns
+    immediately, so instrumented code pays one attribute check. Timers record
+    inclusive time and self time (minus nested timers) per name.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self) -> None:
+        self.total: Dict[str, float] = defaultdict(float)
+        self.self_time: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.counters: Dict[str, int] = defaultdict(int)
+        self._stack: List[_Span] = []
+
+    def enable(self, reset: bool = True) -> None:
+        if reset:
+            self.reset()
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def span(self, name: str):
+        return _Span(self, name) if self.enabled else _NULL
+
+    def count(self, name: str, k: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] += k
+
+    def summary(self) -> Dict:
+        return {
+            "timers": {k: {"calls": self.calls[k], "total_s": self.total[k], "self_s": self.self_time[k]}
+                       for k in sorted(self.total, key=self.total.get, reverse=True)},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def merge(self, summary: Dict) -> None:
+        """Add a summary() from another process (e.g. a pool worker)."""
+        for k, t in summary.get("timers", {}).items():
+            self.total[k] += t["total_s"]
+            self.self_time[k] += t["self_s"]
+            self.calls[k] += t["calls"]
+        for k, c in summary.get("counters", {}).items():
+            self.counters[k] += c
+
+    def table(self) -> str:
+        lines = [f"{'timer':32s} {'calls':>10s} {'total s':>10s} {'self s':>10s} {'us/call':>10s}"]
+        for k, t in self.summary()["timers"].items():
+            lines.append(f"{k:32s} {t['calls']:10d} {t['total_s']:10.3f} {t['self_s']:10.3f} "
+                         f"{1e6 * t['total_s'] / max(1, t['calls']):10.1f}")
+        for k, c in sorted(self.counters.items()):
+            lines.append(f"{k:32s} {c:10d}")
+        return "\n".join(lines)
+
+
+PROFILER = Profiler()
+
+
+def timed(name: str):
+    """Decorator: time every call under `name` while PROFILER is enabled."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return fn(*args, **kwargs)
+            with _Span(PROFILER, name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+# ---------- script helpers ----------
+def add_arguments(parser) -> None:
+    parser.add_argument("--profile", action="store_true", help="time hot paths and print a breakdown at exit")
+    parser.add_argument("--profile_json", type=str, default=None, help="also dump the --profile breakdown as JSON")
+
+
+def start(args) -> None:
+    if args.profile or args.profile_json:
+        PROFILER.enable()
+
+
+def finish(args, stream=sys.stderr) -> None:
+    if not PROFILER.enabled:
+        return
+    print("\n" + PROFILER.table(), file=stream)
+    if args.profile_json:
+        with open(args.profile_json, "w") as f:
+            json.dump(PROFILER.summary(), f, indent=1)
+        print(f"Saved profile to {args.profile_json}", file=stream)
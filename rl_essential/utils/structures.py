@@ -19,6 +19,23 @@ def to_dot_bracket(pairing: List[int]) -> str:
             s[j] = ")"
     return "".join(s)
 
+def from_dot_bracket(db: str) -> List[int]:
+    """Inverse of to_dot_bracket. Only '()' pairs are read; pseudoknot brackets
+    ('[]', '{}', '<>') and any other symbol are treated as unpaired."""
+    pairing = [-1] * len(db)
+    stack = []
+    for k, c in enumerate(db):
+        if c == "(":
+            stack.append(k)
+        elif c == ")":
+            if not stack:
+                raise ValueError(f"Unbalanced ')' at {k} in dot-bracket")
+            i = stack.pop()
+            pairing[i], pairing[k] = k, i
+    if stack:
+        raise ValueError(f"Unbalanced '(' at {stack[-1]} in dot-bracket")
+    return pairing
+
 # --- Parsing structural components ---
 
 def decompose_stems(pairing: List[int]) -> List[Tuple[int,int,int]]:
@@ -0,0 +1,78 @@
+from __future__ import annotations
+import colorsys
+from html import escape
+from typing import List, Optional, Tuple
+
+from .structures import to_dot_bracket
+
+
+def arcs_by_midpoint(pairing: List[int]) -> List[Tuple[int, int]]:
+    """Pairs (i, j), i < j, ordered by arc midpoint: the order rainbow colours sweep in."""
+    pairs = [(i, j) for i, j in enumerate(pairing) if j > i]
+    return sorted(pairs, key=lambda p: (p[0] + p[1]) / 2.0)
+
+
+def rainbow_hex(t: float) -> str:
+    """t in [0,1] -> '#rrggbb' along the hue circle (matplotlib's 'hsv' map)."""
+    r, g, b = colorsys.hsv_to_rgb(t, 1.0, 1.0)
+    return "#%02x%02x%02x" % (round(r * 255), round(g * 255), round(b * 255))
+
+
+def rainbow_svg(
+    seq: str,
+    pairing: List[int],
+    title: Optional[str] = None,
+    show_bases: Optional[bool] = None,
+    height: float = 0.65,
+    unit: float = 12.0,
+    linewidth: float = 1.6,
+) -> str:
+    """Render the plot_rainbow arc diagram as an SVG document, with no plotting dependencies.
+
+    One <path> elliptical arc per pair, one <path> for all ticks and one <text> per base
+    (bases are shown automatically up to 400 nt). `unit` is the pixel width of a base.
+    """
+    n = len(seq)
+    assert n == len(pairing), "seq/pairing length mismatch"
+    if show_bases is None:
+        show_bases = n <= 400
+    arcs = arcs_by_midpoint(pairing)
+    m = max(1, len(arcs))
+    arc_h = height * 300.0
+    pad = unit
+    top = 28.0 if title is not None or n <= 300 else 8.0
+    base_y = top + arc_h + 6.0
+    W = (n + 1) * unit + 2 * pad
+    H = base_y + (18.0 if show_bases else 6.0)
+
+    def x(k: float) -> float:
+        return pad + (k + 0.5) * unit
+
+    out = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{W:.0f}" height="{H:.0f}" '
+           f'viewBox="0 0 {W:.1f} {H:.1f}" font-family="sans-serif">',
+           '<rect width="100%" height="100%" fill="white"/>']
+    if title is not None or n <= 300:
+        ttl = (title + " — " if title else "") + (to_dot_bracket(pairing) if n <= 300 else f"{n} nt, {len(arcs)} pairs")
+        out.append(f'<text x="{W / 2:.1f}" y="18" font-size="12" text-anchor="middle">{escape(ttl)}</text>')
+    out.append(f'<line x1="{x(0):.1f}" y1="{base_y:.1f}" x2="{x(n - 1):.1f}" y2="{base_y:.1f}" stroke="#1f77b4"/>')
+    ticks = "".join(f"M{x(k):.1f} {base_y:.1f}v-3" for k in range(n))
+    out.append(f'<path d="{ticks}" stroke="#1f77b4" stroke-width="1"/>')
+    for rank, (i, j) in enumerate(arcs):
+        color = rainbow_hex(rank / (m - 1) if m > 1 else 0.0)
+        rx = (j - i) * unit / 2.0
+        out.append(f'<path d="M{x(i):.1f} {base_y:.1f}A{rx:.1f} {arc_h:.1f} 0 0 1 {x(j):.1f} {base_y:.1f}" '
+                   f'fill="none" stroke="{color}" stroke-width="{linewidth}"/>')
+    unpaired = "".join(f'<circle cx="{x(k):.1f}" cy="{base_y:.1f}" r="1.2"/>' for k, p in enumerate(pairing) if p == -1)
+    paired = "".join(f'<circle cx="{x(k):.1f}" cy="{base_y:.1f}" r="1.5"/>' for k, p in enumerate(pairing) if p != -1)
+    out.append(f'<g fill="#444444">{unpaired}</g><g fill="#000000">{paired}</g>')
+    if show_bases:
+        out.append(f'<g font-size="9" text-anchor="middle">'
+                   + "".join(f'<text x="{x(k):.1f}" y="{base_y + 13:.1f}">{b}</text>' for k, b in enumerate(seq))
+                   + "</g>")
+    out.append("</svg>")
+    return "\n".join(out)
+
+
+def write_rainbow_svg(path: str, seq: str, pairing: List[int], **kwargs) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(rainbow_svg(seq, pairing, **kwargs))
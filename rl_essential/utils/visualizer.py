@@ -1,19 +1,28 @@
 from __future__ import annotations
-import math
 from typing import List, Optional
-import matplotlib.pyplot as plt
-import matplotlib.cm as cm
 from .structures import to_dot_bracket
+from .svg import arcs_by_midpoint
 import numpy as np
 
 
+_ARC_T = np.linspace(0.0, np.pi, 61)
+_COS_T, _SIN_T = np.cos(_ARC_T), np.sin(_ARC_T)
 
 
 def _rainbow_color(t: float):
     """t in [0,1] → RGBA from hsv colormap."""
+    import matplotlib.cm as cm
     return cm.hsv(t)
 
 
+def arc_segments(pairs: np.ndarray, height: float) -> np.ndarray:
+    """(m, 2) pairs -> (m, 61, 2) semicircle points at a fixed height, all arcs at once."""
+    pairs = np.asarray(pairs, dtype=float).reshape(-1, 2)
+    cx = pairs.sum(axis=1, keepdims=True) / 2.0
+    r = (pairs[:, 1:] - pairs[:, :1]) / 2.0
+    xs = cx + r * _COS_T
+    ys = np.broadcast_to(height * _SIN_T, xs.shape)
+    return np.stack([xs, ys], axis=-1)
 
 
 def plot_rainbow(
@@ -21,66 +30,68 @@ def plot_rainbow(
     pairing: List[int],
     title: Optional[str] = None,
     save_path: Optional[str] = None,
-    show_bases: bool = True,
+    show_bases: Optional[bool] = None,
     height: float = 0.65,         # fixed arc height (0..~1); single “rainbow” look
     linewidth: float = 1.6,
+    max_width: float = 60.0,
 ):
     """
     Draw a clean rainbow arc diagram:
       - All arcs same height (fixed curvature).
       - Colors form ONE spectrum left→right by arc *midpoint* (not by i),
         so you don't get multiple mini-rainbows.
+
+    Arcs, ticks and markers are each one batched artist, so long RNAs stay cheap.
+    show_bases=None letters the bases only up to 400 nt; the figure is capped at
+    max_width inches and the dot-bracket joins the title only up to 300 nt.
     """
+    # matplotlib is imported on first plot, not with the module (~0.5 s of startup)
+    import matplotlib.pyplot as plt
+    import matplotlib.cm as cm
+    from matplotlib.collections import LineCollection
+
     n = len(seq)
     assert n == len(pairing), "seq/pairing length mismatch"
+    if show_bases is None:
+        show_bases = n <= 400
 
     # collect pairs and sort by midpoint so colors sweep left→right ONCE
-    pairs = [(i, j) for i, j in enumerate(pairing) if j > i]
-    pairs_sorted = sorted(pairs, key=lambda p: (p[0] + p[1]) / 2.0)
-    m = max(1, len(pairs_sorted))
+    pairs = np.array(arcs_by_midpoint(pairing), dtype=float).reshape(-1, 2)
+    m = max(1, len(pairs))
 
     # figure / axes
     fig_h = 3.5
-    fig_w = max(6, n * 0.12)
+    fig_w = min(max_width, max(6, n * 0.12))
     fig, ax = plt.subplots(figsize=(fig_w, fig_h), dpi=120)
 
     ax.set_xlim(-1, n)
     ax.set_ylim(-0.15, height + 0.1)
     ax.axis("off")
 
-    # baseline
+    # baseline & ticks
     ax.hlines(0, 0, n - 1, linewidth=1)
-
-    # ticks & bases
-    for i, b in enumerate(seq):
-        ax.vlines(i, 0, 0.03, linewidth=1)
-        if show_bases:
+    ax.vlines(np.arange(n), 0, 0.03, linewidth=1)
+    if show_bases:
+        for i, b in enumerate(seq):
             ax.text(i, -0.08, b, ha="center", va="top", fontsize=9)
 
     # draw arcs with a single rainbow sweep by midpoint rank
-    for rank, (i, j) in enumerate(pairs_sorted):
-        cx = (i + j) / 2.0
-        r = (j - i) / 2.0
-
-        # semicircle at fixed height factor
-        ts = [t / 60.0 * math.pi for t in range(61)]
-        xs = [cx + r * math.cos(t) for t in ts]
-        ys = [height * math.sin(t) for t in ts]
-
-        color = cm.hsv(rank / (m - 1) if m > 1 else 0.0)
-        ax.plot(xs, ys, linewidth=linewidth, color=color)
-
-    # paired markers
-    for i, j in enumerate(pairing):
-        if j == -1:
-            ax.plot(i, 0, marker="o", ms=2.4, color="#444444")
-        elif j > i:
-            ax.plot([i, j], [0, 0], ls="None", marker="o", ms=3.0, color="#000000")
-
-    db = to_dot_bracket(pairing)
-    ttl = (title + " — " if title else "") + db
+    if len(pairs):
+        colors = cm.hsv(np.arange(len(pairs)) / (m - 1) if m > 1 else np.zeros(1))
+        ax.add_collection(LineCollection(arc_segments(pairs, height), colors=colors, linewidths=linewidth))
+
+    # paired / unpaired markers
+    p = np.asarray(pairing)
+    idx = np.arange(n)
+    ax.scatter(idx[p == -1], np.zeros(int((p == -1).sum())), s=2.4 ** 2, color="#444444", linewidths=0)
+    ax.scatter(idx[p != -1], np.zeros(int((p != -1).sum())), s=3.0 ** 2, color="#000000", linewidths=0)
+
+    if n <= 300:
+        ttl = (title + " — " if title else "") + to_dot_bracket(pairing)
+    else:
+        ttl = (title + " — " if title else "") + f"{n} nt, {len(pairs)} pairs"
     ax.set_title(ttl, fontsize=12)
     fig.tight_layout()
     if save_path:
         fig.savefig(save_path, bbox_inches="tight")
-    return fig, ax
\ No newline at end of file
+    return fig, ax
@@ -0,0 +1,51 @@
+from __future__ import annotations
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .energy import TurnerEnergyModel
+from .env import RNARLEnv
+
+
+class VecRNAEnv:
+    """B independent RNARLEnv episodes stepped together.
+
+    Actions are integer columns: j >= 0 means ("pair", j), j < 0 means skip
+    (or auto-advance when nothing is legal). Masks are padded to the longest sequence.
+    Finished envs are not reset automatically; call reset(k) for those you want to rerun.
+    """
+    def __init__(self, seqs: Sequence[str], energy_model: Optional[TurnerEnergyModel] = None,
+                 min_pair_separation: int = 4):
+        energy = energy_model or TurnerEnergyModel()
+        self.envs = [RNARLEnv(s, energy_model=energy, min_pair_separation=min_pair_separation) for s in seqs]
+        self.num_envs = len(self.envs)
+        self.n_max = max(env.n for env in self.envs)
+
+    def reset(self, k: Optional[int] = None):
+        """Reset env k (or all envs) and return its state (or the list of states)."""
+        if k is not None:
+            return self.envs[k].reset()
+        return [env.reset() for env in self.envs]
+
+    @property
+    def states(self) -> List[Tuple[int, List[int]]]:
+        return [env.state for env in self.envs]
+
+    def legal_masks(self) -> np.ndarray:
+        masks = np.zeros((self.num_envs, self.n_max), dtype=bool)
+        for k, env in enumerate(self.envs):
+            masks[k, :env.n] = env.legal_mask()
+        return masks
+
+    def step(self, js: Sequence[int]):
+        """Step every env; returns (next_states, rewards, dones, infos)."""
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        dones = np.zeros(self.num_envs, dtype=bool)
+        states, infos = [], []
+        for k, (env, j) in enumerate(zip(self.envs, js)):
+            sr = env.step(("pair", int(j)) if j >= 0 else ("skip", None))
+            states.append(sr.state)
+            rewards[k] = sr.reward
+            dones[k] = sr.done
+            infos.append(sr.info)
+        return states, rewards, dones, infos
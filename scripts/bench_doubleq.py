@@ -0,0 +1,48 @@
+# scripts/bench_doubleq.py
+from __future__ import annotations
+import argparse, time
+from rl_essential.env import RNARLEnv
+from rl_essential.vec_env import VecRNAEnv
+from rl_essential.agents.double_q import DoubleQ
+from rl_essential.agents.dense_double_q import DenseDoubleQ, run_batched_episodes
+
+parser = argparse.ArgumentParser(description="Episodes/sec: dict-backed DoubleQ vs batched DenseDoubleQ")
+parser.add_argument("--seq", type=str, default="GGGAAACCCUUUGGGAAACCCAGCUAGCUAGGCUUAGCC")
+parser.add_argument("--episodes", type=int, default=500)
+parser.add_argument("--num_envs", type=int, default=32)
+parser.add_argument("--seed", type=int, default=0)
+args = parser.parse_args()
+
+
+def run_dict(n_episodes: int):
+    agent = DoubleQ(seed=args.seed)
+    last = None
+    for _ in range(n_episodes):
+        env = RNARLEnv(args.seq)
+        s = env.reset()
+        while True:
+            acts = env.valid_actions()
+            if not acts:
+                sr = env.step(("pair", None))
+            else:
+                a = agent.act(s, acts)
+                sr = env.step(a)
+                agent.update(s, a, sr.reward, sr.state, env.valid_actions())
+            s = sr.state
+            if sr.done:
+                last = sr.info
+                break
+    return last
+
+
+def run_dense(n_episodes: int):
+    agent = DenseDoubleQ(n_actions=len(args.seq), seed=args.seed)
+    vec = VecRNAEnv([args.seq] * args.num_envs)
+    return run_batched_episodes(agent, vec, n_episodes)[-1][1]
+
+
+for name, fn in (("DoubleQ (dict)", run_dict), (f"DenseDoubleQ x{args.num_envs}", run_dense)):
+    t0 = time.perf_counter()
+    info = fn(args.episodes)
+    dt = time.perf_counter() - t0
+    print(f"{name:22s} {args.episodes / dt:9.1f} episodes/s  last DB {info['dot_bracket']}  E {info['energy']:.2f}")
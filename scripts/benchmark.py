@@ -0,0 +1,271 @@
+# scripts/benchmark.py
+from __future__ import annotations
+import argparse, json, platform, random, sys, time
+from typing import Callable, Dict, List, Tuple
+from rl_essential.energy import TurnerEnergyModel
+from rl_essential.env import RNARLEnv
+from rl_essential.utils.structures import is_valid_pair
+
+parser = argparse.ArgumentParser(description="Throughput benchmarks over synthetic sequences")
+parser.add_argument("--lengths", type=int, nargs="+", default=[50, 200, 1000, 3000])
+parser.add_argument("--only", type=str, nargs="+", default=None, help="run just these workloads")
+parser.add_argument("--min_time", type=float, default=1.0, help="seconds spent measuring each workload/length")
+parser.add_argument("--sims", type=int, default=16, help="PUCT simulations per search")
+parser.add_argument("--beam_width", type=int, default=4, help="beams kept per step in fold_beam")
+parser.add_argument("--fold_max_len", type=int, default=200, help="longest sequence for the full-fold workloads")
+parser.add_argument("--games", type=int, default=8, help="games per selfplay call; selfplay_lockstep plays them at once")
+parser.add_argument("--batch", type=int, default=32, help="train_step batch size")
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--save", type=str, default=None, help="write results as a JSON baseline")
+parser.add_argument("--compare", type=str, default=None, help="baseline JSON to check for regressions")
+parser.add_argument("--tolerance", type=float, default=0.15, help="allowed fractional slowdown before flagging")
+
+
+def synthetic_seq(n: int, rng: random.Random) -> str:
+    return "".join(rng.choice("AUGC") for _ in range(n))
+
+
+def synthetic_structure(seq: str, rng: random.Random, min_sep: int = 4) -> List[int]:
+    """Random nested, base-compatible pairing built in one left-to-right sweep."""
+    pairing, stack = [-1] * len(seq), []
+    for k, b in enumerate(seq):
+        if stack and k - stack[-1] >= min_sep and is_valid_pair(seq[stack[-1]], b) and rng.random() < 0.6:
+            i = stack.pop()
+            pairing[i], pairing[k] = k, i
+        elif rng.random() < 0.3:
+            stack.append(k)
+    return pairing
+
+
+def mid_episode_env(seq: str, pairing: List[int]) -> RNARLEnv:
+    """Env halfway through: pairs closed before n/2 are committed, i at the next free site."""
+    env = RNARLEnv(seq)
+    half = len(seq) // 2
+    env.pairing = [p if p != -1 and max(k, p) < half else -1 for k, p in enumerate(pairing)]
+    env.E = env.energy.total_energy(seq, env.pairing)
+    env.i = half
+    env._advance_until_candidate()
+    return env
+
+
+class Skip(Exception):
+    """Raised by a workload setup that does not apply at this length."""
+
+
+# Each workload: setup(seq, pairing, rng) -> (fn, unit) or (fn, unit, quality); fn() does some
+# work and returns how many units; quality() -> dict of extra numbers reported for the last call.
+def wl_energy(seq, pairing, rng):
+    E = TurnerEnergyModel()
+    return (lambda: (E.total_energy(seq, pairing), 1)[1]), "calls/s"
+
+
+def wl_valid_actions(seq, pairing, rng):
+    env = mid_episode_env(seq, pairing)
+    return (lambda: (env.valid_actions(), 1)[1]), "calls/s"
+
+
+def wl_step(seq, pairing, rng):
+    env = RNARLEnv(seq)
+
+    def run():
+        if env.i >= env.n:
+            env.reset()
+        acts = env.valid_actions()
+        env.step(rng.choice(acts) if acts else ("pair", None))
+        return 1
+    return run, "steps/s"
+
+
+def wl_episode(seq, pairing, rng):
+    env = RNARLEnv(seq)
+
+    def run():
+        env.reset()
+        while env.i < env.n:
+            acts = env.valid_actions()
+            env.step(rng.choice(acts) if acts else ("pair", None))
+        return 1
+    return run, "episodes/s"
+
+
+def _encoder_workload(kind):
+    def setup(seq, pairing, rng):
+        from rl_essential.networks.encoder import SimpleEncoder
+        from rl_essential.networks.graph_encoder import GraphEncoder
+        enc = GraphEncoder() if kind == "graph" else SimpleEncoder()
+        state = (len(seq) // 2, pairing)
+        return (lambda: (enc.encode(seq, state), 1)[1]), "encodes/s"
+    return setup
+
+
+def wl_mcts(seq, pairing, rng):
+    import torch
+    from rl_essential.learners.az_trainers import AlphaZeroTrainer
+    from rl_essential.mcts import PUCT
+    torch.manual_seed(0)
+    trainer = AlphaZeroTrainer(encoder="graph")
+    env = RNARLEnv(seq)
+    mcts = PUCT(RNARLEnv, trainer.encoder, trainer.net, n_sim=args.sims)
+    return (lambda: (mcts.search(env), args.sims)[1]), "sims/s"
+
+
+def _fold_workload(kind):
+    """Whole-sequence folds from an untrained graph net: PUCT (most visited root move, --sims
+    per move) vs batched beam search (--beam_width). Reports final energy and forwards/fold."""
+    def setup(seq, pairing, rng):
+        if len(seq) > args.fold_max_len:
+            raise Skip(f"n > --fold_max_len {args.fold_max_len}")
+        import torch
+        from rl_essential.beam import BeamSearch
+        from rl_essential.folding import rollout
+        from rl_essential.learners.az_trainers import AlphaZeroTrainer
+        from rl_essential.mcts import PUCT
+        torch.manual_seed(0)
+        trainer = AlphaZeroTrainer(encoder="graph")
+        last = {}
+        if kind == "beam":
+            search = BeamSearch(trainer.encoder, trainer.net, width=args.beam_width)
+
+            def run():
+                search.forwards = 0
+                last["energy"] = search.search(RNARLEnv(seq)).E
+                last["forwards"] = search.forwards
+                return 1
+        else:
+            mcts = PUCT(RNARLEnv, trainer.encoder, trainer.net, n_sim=args.sims)
+            calls = [0]
+            net = mcts.evaluate
+            mcts.evaluate = lambda x: (calls.__setitem__(0, calls[0] + 1), net(x))[1]
+
+            def choose(env, acts):
+                pi, cand = mcts.search(env)
+                return cand[max(range(len(pi)), key=pi.__getitem__)]
+
+            def run():
+                calls[0] = 0
+                last["energy"] = rollout(RNARLEnv(seq), choose).E
+                last["forwards"] = calls[0]
+                return 1
+        return run, "folds/s", lambda: dict(last)
+    return setup
+
+
+def _selfplay_workload(lockstep):
+    """--games self-play episodes (--sims per move) from an untrained graph net, one after
+    another vs in lockstep with one batched forward per round."""
+    def setup(seq, pairing, rng):
+        if len(seq) > args.fold_max_len:
+            raise Skip(f"n > --fold_max_len {args.fold_max_len}")
+        import numpy as np
+        import torch
+        from rl_essential.learners.az_trainers import AlphaZeroTrainer
+        from rl_essential.selfplay import SelfPlay
+        torch.manual_seed(0)
+        np.random.seed(0)
+        trainer = AlphaZeroTrainer(encoder="graph")
+        sp = SelfPlay(RNARLEnv, trainer.encoder, trainer.net, mcts_sims=args.sims)
+        seqs = [seq] * args.games
+        if lockstep:
+            return (lambda: sum(1 for _ in sp.play_games(seqs, games=args.games))), "games/s"
+        return (lambda: sum(1 for s in seqs if sp.play_episode(s))), "games/s"
+    return setup
+
+
+def wl_train_step(seq, pairing, rng):
+    import torch
+    from rl_essential.learners.az_trainers import AlphaZeroTrainer
+    torch.manual_seed(0)
+    trainer = AlphaZeroTrainer(encoder="graph")
+    samples = []
+    for _ in range(args.batch):
+        k = rng.randrange(1, 20)
+        samples.append((seq, (rng.randrange(len(seq)), pairing), [1.0 / k] * k, rng.uniform(-1, 1)))
+    return (lambda: (trainer.train_step(samples), len(samples))[1]), "samples/s"
+
+
+WORKLOADS: Dict[str, Callable] = {
+    "total_energy": wl_energy,
+    "valid_actions": wl_valid_actions,
+    "step": wl_step,
+    "random_episode": wl_episode,
+    "encode_simple": _encoder_workload("simple"),
+    "encode_graph": _encoder_workload("graph"),
+    "puct_search": wl_mcts,
+    "fold_puct": _fold_workload("puct"),
+    "fold_beam": _fold_workload("beam"),
+    "selfplay": _selfplay_workload(False),
+    "selfplay_lockstep": _selfplay_workload(True),
+    "train_step": wl_train_step,
+}
+
+
+def measure(fn: Callable[[], int], min_time: float) -> Tuple[float, int]:
+    """Best rate over 3 rounds of >= min_time/3 each (at least one call per round)."""
+    best, calls = 0.0, 0
+    for _ in range(3):
+        done, t0 = 0, time.perf_counter()
+        while True:
+            done += fn()
+            calls += 1
+            dt = time.perf_counter() - t0
+            if dt >= min_time / 3:
+                break
+        best = max(best, done / dt)
+        if dt > min_time:  # one call already exceeds the budget; don't repeat it
+            break
+    return best, calls
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    flagged = []
+    print(f"\n{'workload':28s} {'baseline':>12s} {'current':>12s} {'ratio':>7s}")
+    for key, cur in results.items():
+        base = baseline.get("results", {}).get(key)
+        if base is None or not base.get("rate") or not cur.get("rate"):
+            continue
+        ratio = cur["rate"] / base["rate"]
+        mark = ""
+        if ratio < 1.0 - tolerance:
+            mark = "  REGRESSION"
+            flagged.append(key)
+        print(f"{key:28s} {base['rate']:12.2f} {cur['rate']:12.2f} {ratio:7.2f}{mark}")
+    return flagged
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    names = args.only or list(WORKLOADS)
+    unknown = set(names) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown workloads {sorted(unknown)}; choose from {list(WORKLOADS)}")
+    results: Dict[str, Dict] = {}
+    for n in args.lengths:
+        rng = random.Random(args.seed + n)
+        seq = synthetic_seq(n, rng)
+        pairing = synthetic_structure(seq, rng)
+        for name in names:
+            key = f"{name}/{n}"
+            try:
+                fn, unit, *quality = WORKLOADS[name](seq, pairing, random.Random(args.seed))
+            except (ImportError, Skip) as e:
+                print(f"{key:28s} skipped ({e})")
+                continue
+            rate, calls = measure(fn, args.min_time)
+            results[key] = {"rate": rate, "unit": unit, "calls": calls}
+            extra = quality[0]() if quality else {}
+            results[key].update(extra)
+            shown = "".join(f"  {k}={v:.6g}" for k, v in extra.items())
+            print(f"{key:28s} {rate:12.2f} {unit}{shown}", flush=True)
+    report = {"meta": {"python": sys.version.split()[0], "platform": platform.platform(),
+                       "min_time": args.min_time, "sims": args.sims, "beam_width": args.beam_width, "games": args.games, "batch": args.batch, "seed": args.seed},
+              "results": results}
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=1)
+        print(f"Saved baseline to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            flagged = compare(results, json.load(f), args.tolerance)
+        if flagged:
+            print(f"{len(flagged)} regression(s) beyond {args.tolerance:.0%}: {', '.join(flagged)}")
+            sys.exit(1)
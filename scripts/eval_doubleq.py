@@ -1,21 +1,21 @@
 # scripts/eval_doubleq.py
 from __future__ import annotations
-import argparse, pickle
+import argparse
 from rl_essential.env import RNARLEnv
-from rl_essential.agents.double_q import DoubleQ
+from rl_essential.agents.double_q import hash_state
+from rl_essential.agents.q_checkpoint import load_q_table
 from rl_essential.utils.visualizer import plot_rainbow
+from rl_essential.utils import profiling
 
 parser = argparse.ArgumentParser()
 parser.add_argument("--seq", type=str, required=True)
-parser.add_argument("--ckpt", type=str, default="checkpoints/dq.pkl")
+parser.add_argument("--ckpt", type=str, default="checkpoints/dq.qtab", help=".qtab checkpoint (legacy .pkl also accepted)")
 parser.add_argument("--out", type=str, default="final.png")
+profiling.add_arguments(parser)
 args = parser.parse_args()
+profiling.start(args)
 
-agent = DoubleQ()
-with open(args.ckpt, "rb") as f:
-    data = pickle.load(f)
-agent.Q1.update({k: {tuple(a): v for a, v in vv.items()} for k, vv in data["Q1"].items()})
-agent.Q2.update({k: {tuple(a): v for a, v in vv.items()} for k, vv in data["Q2"].items()})
+table = load_q_table(args.ckpt)  # memory-mapped; nothing is unpacked up front
 
 env = RNARLEnv(args.seq)  # <— removed seed
 s = env.reset()
@@ -24,8 +24,7 @@ while True:
     if not acts:
         sr = env.step(("pair", None))  # auto-advance
     else:
-        hs = agent._hash_state(s)
-        a = max(acts, key=lambda act: agent.Q1[hs][act] + agent.Q2[hs][act])
+        a = table.greedy(hash_state(s), acts)
         sr = env.step(a)
     s = sr.state
     if sr.done:
@@ -33,3 +32,5 @@ while True:
         plot_rainbow(args.seq, env.pairing, title="Final", save_path=args.out)
         print(f"Saved plot to {args.out}")
         break
+
+profiling.finish(args)
@@ -0,0 +1,107 @@
+# scripts/evaluate.py
+from __future__ import annotations
+import argparse, json, multiprocessing as mp, os, time
+from rl_essential import fold_cache, folding
+from rl_essential.dataset import SequenceDataset
+from rl_essential.energy import TurnerEnergyModel
+from rl_essential.metrics import aggregate, pair_scores
+from rl_essential.utils.structures import from_dot_bracket, to_dot_bracket
+
+parser = argparse.ArgumentParser(description="Score a folding policy against reference structures (FASTA/.dbn)")
+parser.add_argument("--data", type=str, nargs="+", required=True, help="files or globs; records without a structure are skipped")
+parser.add_argument("--out", type=str, default=None, help="per-sequence JSONL scores")
+parser.add_argument("--summary", type=str, default=None, help="aggregate scores as JSON")
+folding.add_arguments(parser)
+parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+parser.add_argument("--max_len", type=int, default=None)
+fold_cache.add_arguments(parser, default=fold_cache.DEFAULT_PATH)
+args = parser.parse_args()
+
+_folder = None
+
+
+def _init(kwargs):
+    global _folder
+    _folder = folding.pool_folder(kwargs)
+
+
+def _fold(item):
+    key, seq = item
+    t0 = time.perf_counter()
+    try:
+        pairing, energy = _folder.fold(seq)
+    except (AssertionError, ValueError) as e:
+        return key, {"error": str(e) or type(e).__name__}
+    return key, {"dot_bracket": to_dot_bracket(pairing), "energy": energy, "time_ms": (time.perf_counter() - t0) * 1e3}
+
+
+def main():
+    kwargs = folding.folder_kwargs(args)
+    version = folding.model_version(**kwargs)
+    records = [r for r in SequenceDataset(args.data, max_len=args.max_len) if r.structure]
+    E = TurnerEnergyModel()
+    key_parts = (version, E.fingerprint())
+    keys = {r.seq: fold_cache.fold_key(r.seq, *key_parts, args.min_pair_separation) for r in records}
+    # an untrained mcts/beam net is random per process: nothing to reuse
+    cache = fold_cache.open_cache(args) if version is not None else None
+    preds, todo = {}, {}
+    for seq, k in keys.items():
+        hit = cache.get(k) if cache is not None else None
+        if hit is not None:
+            preds[k] = {"dot_bracket": hit["dot_bracket"], "energy": hit["energy"], **hit["stats"]}
+        else:
+            todo[k] = seq
+
+    t0 = time.perf_counter()
+    if todo:
+        with mp.Pool(min(args.workers, len(todo)), initializer=_init, initargs=(kwargs,)) as pool:
+            for k, pred in pool.imap_unordered(_fold, todo.items()):
+                preds[k] = pred
+                if "error" not in pred and cache is not None:
+                    cache.put(k, pred["dot_bracket"], pred["energy"], {"time_ms": pred["time_ms"], "n": len(todo[k])})
+    wall = time.perf_counter() - t0
+
+    if cache is not None:
+        cache.close()
+
+    rows, errors = [], 0
+    for r in records:
+        pred = preds[keys[r.seq]]
+        row = {"id": r.id, "n": len(r.seq)}
+        try:
+            if "error" in pred:
+                raise ValueError(pred["error"])
+            ref_energy = E.total_energy(r.seq, from_dot_bracket(r.structure))
+        except ValueError as e:  # failed fold or malformed reference
+            row["error"] = str(e)
+            errors += 1
+        else:
+            row.update(pair_scores(pred["dot_bracket"], r.structure))
+            row.update({"dot_bracket": pred["dot_bracket"], "energy": pred["energy"], "ref_energy": ref_energy,
+                        "energy_gap": pred["energy"] - ref_energy, "time_ms": pred.get("time_ms")})
+        rows.append(row)
+    if args.out:
+        with open(args.out, "w") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+
+    fresh_nt = sum(len(s) for s in todo.values())
+    summary = aggregate(r for r in rows if "error" not in r)
+    summary.update({"model_version": version, "policy": args.policy, "errors": errors, "folded": len(todo),
+                    "cached": sum(1 for r in records if keys[r.seq] not in todo),
+                    "wall_s": wall, "seqs_per_s": len(todo) / wall if wall > 0 else None,
+                    "nt_per_s": fresh_nt / wall if wall > 0 else None})
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump(summary, f, indent=1)
+    print(f"{args.policy} (version {version or 'untrained'}): {summary['n']} scored, {errors} errors, "
+          f"{len(todo)} folded in {wall:.1f}s, {summary['cached']} cached")
+    for k in ("micro_f1", "micro_sensitivity", "micro_ppv", "mean_f1", "mean_energy_gap"):
+        if k in summary:
+            print(f"  {k:18s} {summary[k]:8.3f}")
+    if todo and wall > 0:
+        print(f"  throughput         {summary['seqs_per_s']:8.2f} seq/s  {summary['nt_per_s']:8.0f} nt/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# scripts/fold_batch.py
+from __future__ import annotations
+import argparse, json, multiprocessing as mp, os, re, time
+from rl_essential import fold_cache, folding
+from rl_essential.dataset import read_records
+from rl_essential.utils import profiling
+from rl_essential.utils.profiling import PROFILER
+from rl_essential.utils.structures import from_dot_bracket, to_dot_bracket
+
+parser = argparse.ArgumentParser(description="Fold every sequence of a FASTA/.dbn file; stream JSONL results")
+parser.add_argument("--fasta", type=str, required=True)
+parser.add_argument("--out", type=str, required=True, help="JSONL output; re-running resumes after finished ids")
+folding.add_arguments(parser)
+parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+parser.add_argument("--max_domain", type=int, default=None,
+                    help="fold each sequence as independent domains of at most this length, in parallel")
+fold_cache.add_arguments(parser)
+parser.add_argument("--plot_dir", type=str, default=None, help="also save a rainbow plot per sequence here")
+profiling.add_arguments(parser)
+args = parser.parse_args()
+
+_folder = None
+_cache = None
+
+
+def _init(kwargs):
+    global _folder, _cache
+    _folder = folding.pool_folder(kwargs)
+    _cache = fold_cache.open_cache(args)  # one connection per worker
+    profiling.start(args)
+
+
+def _fold(rec):
+    rid, seq = rec
+    t0 = time.perf_counter()
+    key = _folder.cache_key(seq) if _cache is not None else None
+    hit = _cache.get(key) if key is not None else None
+    if hit is not None:
+        pairing, energy = from_dot_bracket(hit["dot_bracket"]), hit["energy"]
+    else:
+        try:
+            pairing, energy = _folder.fold(seq)
+        except (AssertionError, ValueError) as e:
+            return {"id": rid, "error": str(e) or type(e).__name__}
+    out = {"id": rid, "dot_bracket": to_dot_bracket(pairing), "energy": energy,
+           "time_ms": (time.perf_counter() - t0) * 1e3}
+    if hit is not None:
+        out["cached"] = True
+    elif key is not None:
+        _cache.put(key, out["dot_bracket"], energy, {"time_ms": out["time_ms"], "n": len(seq)})
+    if args.plot_dir:
+        try:
+            _plot(rid, seq, pairing)
+        except Exception as e:  # a failed plot must not take the pool down with it
+            out["error"] = f"plot: {e}"
+    if PROFILER.enabled:
+        out["_profile"] = PROFILER.summary()  # merged by the parent, not written
+        PROFILER.reset()
+    return out
+
+
+def _plot(rid: str, seq: str, pairing) -> None:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from rl_essential.utils.visualizer import plot_rainbow
+    name = re.sub(r"[^\w.-]", "_", rid).lstrip(".") or "_"  # FASTA ids may hold '/' or '..'
+    fig, _ = plot_rainbow(seq, pairing, title=rid, save_path=os.path.join(args.plot_dir, f"{name}.png"))
+    plt.close(fig)
+
+
+def _finished_ids(path: str) -> set:
+    """Ids already in the output; a torn last line from a killed run is cut off."""
+    if not os.path.exists(path):
+        return set()
+    done, good_end = set(), 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                done.add(json.loads(line)["id"])
+            except (ValueError, KeyError):
+                break
+            good_end += len(line)
+    with open(path, "rb+") as f:
+        f.truncate(good_end)
+    return done
+
+
+if __name__ == "__main__":
+    if args.plot_dir:
+        os.makedirs(args.plot_dir, exist_ok=True)
+    done = _finished_ids(args.out)
+    todo = ((r.id, r.seq) for r in read_records(args.fasta) if r.id not in done)
+    n_new, n_cached, t0 = 0, 0, time.perf_counter()
+    profiling.start(args)  # before DomainFolder starts its workers, so they profile too
+    if args.max_domain:
+        # parallel over the domains of one sequence rather than over sequences
+        from rl_essential.domains import DomainFolder
+        runner = DomainFolder(folding.folder_kwargs(args), args.max_domain, workers=args.workers)
+        _folder, _cache = runner, fold_cache.open_cache(args)
+        results = map(_fold, todo)
+    else:
+        runner = mp.Pool(args.workers, initializer=_init, initargs=(folding.folder_kwargs(args),))
+        results = runner.imap_unordered(_fold, todo)
+    with open(args.out, "a") as out, runner:
+        for res in results:
+            if "_profile" in res:
+                PROFILER.merge(res.pop("_profile"))
+            out.write(json.dumps(res) + "\n")
+            out.flush()  # each finished line is a resume point
+            n_new += 1
+            n_cached += bool(res.get("cached"))
+    dt = time.perf_counter() - t0
+    print(f"Folded {n_new} sequences in {dt:.1f}s ({n_cached} from the fold cache, "
+          f"{len(done)} already done) -> {args.out}")
+    profiling.finish(args)
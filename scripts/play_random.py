@@ -2,26 +2,41 @@ from __future__ import annotations
 import argparse
 from rl_essential.env import RNARLEnv
 from rl_essential.agents.double_q import DoubleQ
+from rl_essential.dataset import SeqRecord, SequenceDataset
+from rl_essential.utils import profiling
 
 parser = argparse.ArgumentParser()
-parser.add_argument("--seq", type=str, required=True)
+src = parser.add_mutually_exclusive_group(required=True)
+src.add_argument("--seq", type=str)
+src.add_argument("--data", type=str, help="FASTA/.dbn file or glob; one rollout per sequence")
 parser.add_argument("--seed", type=int, default=0)
+profiling.add_arguments(parser)
 args = parser.parse_args()
+profiling.start(args)
 
-env = RNARLEnv(args.seq, seed=args.seed)
 agent = DoubleQ(seed=args.seed)
+records = [SeqRecord("seq", args.seq)] if args.seq else SequenceDataset(args.data)
+verbose = args.seq is not None
 
-s = env.reset()
-ret = 0.0
-step = 0
-while True:
-    acts = env.valid_actions()
-    a = agent.act(s, acts)
-    sr = env.step(a)
-    ret += sr.reward
-    print(f"t={step:02d} i={sr.state[0]} a={a} E={sr.info['energy']:.3f} r={sr.reward:.3f} db={sr.info['dot_bracket']}")
-    step += 1
-    s = sr.state
-    if sr.done:
-        print(f"Return: {ret:.3f}")
-        break
\ No newline at end of file
+for rec in records:
+    env = RNARLEnv(rec.seq)
+    s = env.reset()
+    ret = 0.0
+    step = 0
+    while True:
+        acts = env.valid_actions()
+        a = agent.act(s, acts)
+        sr = env.step(a)
+        ret += sr.reward
+        if verbose:
+            print(f"t={step:02d} i={sr.state[0]} a={a} E={sr.info['energy']:.3f} r={sr.reward:.3f} db={sr.info['dot_bracket']}")
+        step += 1
+        s = sr.state
+        if sr.done:
+            if verbose:
+                print(f"Return: {ret:.3f}")
+            else:
+                print(f"{rec.id}\t{sr.info['dot_bracket']}\tE={sr.info['energy']:.3f}\tReturn={ret:.3f}")
+            break
+
+profiling.finish(args)
@@ -0,0 +1,76 @@
+# scripts/render_batch.py
+from __future__ import annotations
+import argparse, json, multiprocessing as mp, os, re, time
+from rl_essential.dataset import read_records
+from rl_essential.utils.structures import from_dot_bracket
+
+parser = argparse.ArgumentParser(description="Render rainbow plots for every structure in a fold_batch JSONL file")
+parser.add_argument("--results", type=str, required=True, help="JSONL from scripts.fold_batch (id, dot_bracket, ...)")
+parser.add_argument("--fasta", type=str, required=True, help="the FASTA/.dbn the results were folded from")
+parser.add_argument("--out_dir", type=str, required=True)
+parser.add_argument("--format", type=str, default="svg", choices=["svg", "png"],
+                    help="svg needs no plotting libraries; png goes through matplotlib")
+parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+parser.add_argument("--overwrite", action="store_true", help="re-render files that already exist")
+args = parser.parse_args()
+
+
+def _safe(rid: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", rid)
+
+
+def _init(fmt):
+    if fmt == "png":
+        import matplotlib
+        matplotlib.use("Agg")
+
+
+def _render(job):
+    rid, seq, db, path = job
+    try:
+        pairing = from_dot_bracket(db)
+        if len(pairing) != len(seq):
+            raise ValueError(f"structure length {len(pairing)} != sequence length {len(seq)}")
+        if path.endswith(".svg"):
+            from rl_essential.utils.svg import write_rainbow_svg
+            write_rainbow_svg(path, seq, pairing, title=rid)
+        else:
+            import matplotlib.pyplot as plt
+            from rl_essential.utils.visualizer import plot_rainbow
+            fig, _ = plot_rainbow(seq, pairing, title=rid, save_path=path)
+            plt.close(fig)
+    except ValueError as e:
+        return rid, str(e)
+    return rid, None
+
+
+def _jobs(seqs):
+    with open(args.results) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            res = json.loads(line)
+            if "dot_bracket" not in res:  # failed folds carry "error" instead
+                continue
+            rid = res["id"]
+            if rid not in seqs:
+                print(f"[skip] {rid}: not in {args.fasta}")
+                continue
+            path = os.path.join(args.out_dir, f"{_safe(rid)}.{args.format}")
+            if not args.overwrite and os.path.exists(path):
+                continue
+            yield rid, seqs[rid], res["dot_bracket"], path
+
+
+if __name__ == "__main__":
+    os.makedirs(args.out_dir, exist_ok=True)
+    seqs = {r.id: r.seq for r in read_records(args.fasta)}
+    n_ok, n_err, t0 = 0, 0, time.perf_counter()
+    with mp.Pool(args.workers, initializer=_init, initargs=(args.format,)) as pool:
+        for rid, err in pool.imap_unordered(_render, _jobs(seqs), chunksize=8):
+            if err:
+                n_err += 1
+                print(f"[error] {rid}: {err}")
+            else:
+                n_ok += 1
+    print(f"Rendered {n_ok} plots ({n_err} errors) in {time.perf_counter() - t0:.1f}s -> {args.out_dir}")
@@ -0,0 +1,53 @@
+# scripts/serve.py
+from __future__ import annotations
+import argparse, asyncio, os
+from rl_essential import fold_cache, folding
+from rl_essential.folding import POLICIES, Folder
+from rl_essential.server import DEFAULT_PORT, FoldServer
+
+parser = argparse.ArgumentParser(description="Resident localhost folding server (JSON lines over TCP)")
+parser.add_argument("--host", type=str, default="127.0.0.1")
+parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+parser.add_argument("--policy", type=str, nargs="+", default=["dq"], choices=POLICIES,
+                    help="policies to keep loaded; the first is the default for requests without one")
+parser.add_argument("--dq_ckpt", type=str, default=None, help="Double-Q .qtab (default checkpoints/dq.qtab)")
+parser.add_argument("--az_ckpt", type=str, default=None, help="AlphaZero .pt for the mcts and beam policies")
+folding.add_arguments(parser, policy=False)
+parser.add_argument("--device", type=str, default="cpu")
+parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="concurrent folds")
+parser.add_argument("--max_batch", type=int, default=32, help="max MCTS evaluations merged into one forward")
+parser.add_argument("--max_wait_ms", type=float, default=2.0, help="how long a batch waits to fill up")
+fold_cache.add_arguments(parser)
+args = parser.parse_args()
+
+
+def build_folders():
+    folders = {}
+    for policy in args.policy:
+        ckpt = {"dq": args.dq_ckpt, "mcts": args.az_ckpt, "beam": args.az_ckpt}.get(policy)
+        folder = Folder(**folding.folder_kwargs(args, policy=policy, ckpt=ckpt), device=args.device)
+        if policy == "mcts":
+            from rl_essential.evaluator import BatchedEvaluator
+            folder.evaluator = BatchedEvaluator(folder.trainer.net, device=args.device,
+                                                max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+        folders[policy] = folder
+    return folders
+
+
+async def main():
+    server = FoldServer(build_folders(), threads=args.threads, cache=fold_cache.open_cache(args))
+    srv = await server.start(args.host, args.port)
+    host, port = srv.sockets[0].getsockname()[:2]
+    print(f"Serving {', '.join(server.folders)} on {host}:{port} ({args.threads} threads); Ctrl-C to stop")
+    try:
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
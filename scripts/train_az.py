@@ -0,0 +1,83 @@
+# scripts/train_az.py
+from __future__ import annotations
+import argparse, os
+from rl_essential.dataset import SequenceDataset
+from rl_essential.env import RNARLEnv
+from rl_essential.learners.az_trainers import AlphaZeroTrainer
+from rl_essential.replay import Replay
+from rl_essential.selfplay import SelfPlay
+from rl_essential.shards import ShardLoader, ShardWriter
+from rl_essential.utils import profiling
+
+parser = argparse.ArgumentParser()
+src = parser.add_mutually_exclusive_group(required=True)
+src.add_argument("--seq", type=str)
+src.add_argument("--data", type=str, help="FASTA/.dbn file or glob; each iteration plays one length bucket")
+parser.add_argument("--bucket_width", type=int, default=32)
+parser.add_argument("--rank", type=int, default=0, help="this worker's shard of --data")
+parser.add_argument("--world", type=int, default=1)
+parser.add_argument("--iters", type=int, default=50)
+parser.add_argument("--episodes_per_iter", type=int, default=8)
+parser.add_argument("--batch", type=int, default=32)
+parser.add_argument("--train_steps", type=int, default=16)
+parser.add_argument("--sims", type=int, default=50)
+parser.add_argument("--games", type=int, default=1,
+                    help="play this many self-play games in lockstep, batching their network evaluations")
+parser.add_argument("--encoder", type=str, default="graph", choices=["graph", "simple"])
+parser.add_argument("--device", type=str, default="cpu")
+parser.add_argument("--shard_dir", type=str, default=None,
+                    help="persist self-play samples to memory-mapped shards here and train from them")
+parser.add_argument("--window", type=int, default=5, help="train on the N most recent net versions in --shard_dir")
+parser.add_argument("--ckpt", type=str, default="checkpoints/az.pt")
+parser.add_argument("--max_len", type=int, default=512, help="shard record width; longer --data sequences are skipped")
+profiling.add_arguments(parser)
+args = parser.parse_args()
+profiling.start(args)
+
+
+def iteration_seqs():
+    """Sequences for each iteration's self-play games, forever."""
+    if args.seq:
+        while True:
+            yield [args.seq] * args.episodes_per_iter
+    data = SequenceDataset(args.data, max_len=args.max_len, rank=args.rank, world=args.world)
+    while True:
+        empty = True
+        for batch in data.batches(args.episodes_per_iter, bucket_width=args.bucket_width):
+            empty = False
+            yield [r.seq for r in batch]
+        if empty:
+            raise SystemExit(f"No usable sequences in {args.data}")
+
+
+trainer = AlphaZeroTrainer(encoder=args.encoder, device=args.device)
+writer = ShardWriter(args.shard_dir, max_len=args.max_len, pi_width=trainer.a_max) if args.shard_dir else None
+replay = Replay()
+sp = SelfPlay(RNARLEnv, trainer.encoder, trainer.net, mcts_sims=args.sims, device=args.device, writer=writer)
+
+seq_batches = iteration_seqs()
+for it in range(1, args.iters + 1):
+    sp.net_version = it - 1  # samples are tagged with the net that generated them
+    seqs = next(seq_batches)
+    games = sp.play_games(seqs, games=args.games) if args.games > 1 else map(sp.play_episode, seqs)
+    for traj, info in games:
+        for sample in traj:
+            replay.add(sample)
+    if writer is not None:
+        writer.flush()
+        loader = ShardLoader(args.shard_dir, window=args.window)
+        batches = loader.iter_batches(args.batch, epochs=None)
+    else:
+        batches = (replay.sample(args.batch) for _ in range(args.train_steps))
+    loss, loss_pi, loss_v = trainer.fit(batches, max_steps=args.train_steps)
+    print(f"Iter {it:4d}  loss {loss:.4f} (pi {loss_pi:.4f}, v {loss_v:.4f})  "
+          f"DB {info['dot_bracket']}  E {info['energy']:.2f}", flush=True)
+
+if writer is not None:
+    writer.close()
+
+os.makedirs(os.path.dirname(args.ckpt) or ".", exist_ok=True)
+trainer.save(args.ckpt)
+print(f"Saved AlphaZero checkpoint to {args.ckpt}")
+
+profiling.finish(args)
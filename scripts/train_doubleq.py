@@ -3,12 +3,30 @@ from __future__ import annotations
 import argparse, os, pickle
 from rl_essential.env import RNARLEnv
 from rl_essential.agents.double_q import DoubleQ
+from rl_essential.agents.dense_double_q import DenseDoubleQ, run_batched_episodes
+from rl_essential.dataset import SequenceDataset
+from rl_essential.vec_env import VecRNAEnv
+from rl_essential.utils import profiling
 
 parser = argparse.ArgumentParser()
-parser.add_argument("--seq", type=str, required=True)
-parser.add_argument("--episodes", type=int, default=2000)
-parser.add_argument("--ckpt", type=str, default="checkpoints/dq.pkl")
+src = parser.add_mutually_exclusive_group(required=True)
+src.add_argument("--seq", type=str)
+src.add_argument("--data", type=str, help="FASTA/.dbn file or glob, streamed in length buckets")
+parser.add_argument("--episodes", type=int, default=2000, help="episodes on --seq")
+parser.add_argument("--epochs", type=int, default=1, help="passes over --data (one episode per sequence)")
+parser.add_argument("--max_len", type=int, default=512, help="skip longer --data sequences")
+parser.add_argument("--bucket_width", type=int, default=32)
+parser.add_argument("--rank", type=int, default=0, help="this worker's shard of --data")
+parser.add_argument("--world", type=int, default=1)
+parser.add_argument("--num_envs", type=int, default=0,
+                    help="if > 0, train the array-backed DenseDoubleQ on this many episodes in lockstep")
+parser.add_argument("--ckpt", type=str, default="checkpoints/dq.qtab",
+                    help="compact .qtab checkpoint; a .pkl path writes the legacy pickled dicts")
+profiling.add_arguments(parser)
 args = parser.parse_args()
+profiling.start(args)
+if args.num_envs > 0 and args.ckpt.endswith(".pkl"):
+    parser.error("--num_envs saves compact .qtab checkpoints; pass a .qtab --ckpt")
 
 os.makedirs(os.path.dirname(args.ckpt), exist_ok=True)
 agent = DoubleQ()  # no env seed needed; env is deterministic
@@ -32,14 +50,39 @@ def run_episode(seq: str):
         if sr.done:
             return G, sr.info
 
-for ep in range(1, args.episodes + 1):
-    G, info = run_episode(args.seq)
+def seq_episodes():
+    # --seq: args.episodes episodes on one sequence
+    if args.num_envs > 0:
+        yield from run_batched_episodes(agent, VecRNAEnv([args.seq] * args.num_envs), args.episodes)
+    else:
+        for _ in range(args.episodes):
+            yield run_episode(args.seq)
+
+def data_episodes():
+    # --data: similar-length sequences are batched so lockstep envs pad little
+    data = SequenceDataset(args.data, max_len=args.max_len, rank=args.rank, world=args.world)
+    for _ in range(args.epochs):
+        for batch in data.batches(max(1, args.num_envs), bucket_width=args.bucket_width):
+            if args.num_envs > 0:
+                yield from run_batched_episodes(agent, VecRNAEnv([r.seq for r in batch]), len(batch))
+            else:
+                for rec in batch:
+                    yield run_episode(rec.seq)
+
+if args.num_envs > 0:
+    agent = DenseDoubleQ(n_actions=len(args.seq) if args.seq else args.max_len)
+for ep, (G, info) in enumerate(seq_episodes() if args.seq else data_episodes(), start=1):
     if ep % 100 == 0:
         print(f"Episode {ep:5d}  Return {G:8.3f}  DB {info['dot_bracket']}  E {info['energy']:.2f}", flush=True)
 
 # save trained tables
-Q1 = {k: dict(v) for k, v in agent.Q1.items()}
-Q2 = {k: dict(v) for k, v in agent.Q2.items()}
-with open(args.ckpt, "wb") as f:
-    pickle.dump({"Q1": Q1, "Q2": Q2}, f)
+if args.ckpt.endswith(".pkl"):
+    Q1 = {k: dict(v) for k, v in agent.Q1.items()}
+    Q2 = {k: dict(v) for k, v in agent.Q2.items()}
+    with open(args.ckpt, "wb") as f:
+        pickle.dump({"Q1": Q1, "Q2": Q2}, f)
+else:
+    agent.save(args.ckpt)
 print(f"Saved DoubleQ checkpoint to {args.ckpt}")
+
+profiling.finish(args)
@@ -0,0 +1,19 @@
+import itertools
+import pytest
+
+def _structures(a, b, allowed):
+    """Every nested secondary structure on [a, b] using allowed[i, j] pairs, as {i: j}."""
+    if a > b:
+        yield {}
+        return
+    yield from _structures(a + 1, b, allowed)
+    for k in range(a + 1, b + 1):
+        if allowed[a, k]:
+            for inner, rest in itertools.product(list(_structures(a + 1, k - 1, allowed)),
+                                                 list(_structures(k + 1, b, allowed))):
+                yield {a: k, **inner, **rest}
+
+@pytest.fixture
+def structures():
+    """The exhaustive structure enumerator the exact folders are checked against."""
+    return _structures
@@ -0,0 +1,78 @@
+import random
+import pytest
+torch = pytest.importorskip("torch")
+from rl_essential.beam import BeamSearch
+from rl_essential.env import RNARLEnv
+from rl_essential.folding import Folder, rollout
+from rl_essential.learners.az_trainers import AlphaZeroTrainer
+from rl_essential.mcts import PUCT, head_actions
+from rl_essential.stems import stem_index
+
+def test_width_one_beam_is_greedy_policy_rollout():
+    torch.manual_seed(0)
+    trainer = AlphaZeroTrainer(encoder="graph")
+    rng = random.Random(3)
+    seq = "".join(rng.choice("AUGC") for _ in range(40))
+
+    def greedy(env, acts):
+        logits, _ = trainer.net(trainer.encoder.encode(env.seq, env.state).unsqueeze(0))
+        cand = acts + [("skip", None)]
+        return cand[int(logits[0, :len(cand)].argmax())]
+    expected = rollout(RNARLEnv(seq), greedy)
+    beam = BeamSearch(trainer.encoder, trainer.net, width=1, top_k=1)
+    root = RNARLEnv(seq)
+    got = beam.search(root)
+    assert got.pairing == expected.pairing and got.E == expected.E
+    assert root.pairing == [-1] * len(seq)  # search works on copies
+    assert beam.forwards <= len(seq)
+
+def test_beam_policy_folds_with_one_forward_per_step():
+    torch.manual_seed(0)
+    folder = Folder("beam", beam_width=3, beam_top_k=3)
+    seq = "GGGGAAACCCCAUAUGGGAAACCCAU"
+    pairing, energy = folder.fold(seq)
+    assert energy == folder.energy.total_energy(seq, pairing)
+    assert (pairing, energy) == folder.fold(seq)
+    beam = BeamSearch(folder.trainer.encoder, folder.trainer.net, width=3, top_k=3)
+    assert beam.search(RNARLEnv(seq)).E == energy and beam.forwards <= len(seq)
+
+def _skip_head(trainer):
+    """Point the policy head at its last slot, which head_actions keeps for skip."""
+    with torch.no_grad():
+        trainer.net.pi_head.weight.zero_()
+        trainer.net.pi_head.bias.zero_()
+        trainer.net.pi_head.bias[-1] = 50.0
+
+def test_skip_keeps_a_slot_when_pairs_overflow_the_head():
+    torch.manual_seed(0)
+    trainer = AlphaZeroTrainer(encoder="graph", a_max=16)
+    _skip_head(trainer)
+    env = RNARLEnv("GGGGCCCC" * 8)
+    assert len(env.valid_actions()) >= trainer.a_max
+    acts = head_actions(env, trainer.a_max)
+    js = [j for _, j in acts[:-1]]
+    assert len(acts) == trainer.a_max and acts[-1] == ("skip", None) and js == sorted(js)
+    ranked = stem_index(env.seq).order(0, [j for _, j in env.valid_actions()])
+    assert set(js) == set(ranked[:trainer.a_max - 1].tolist())
+    got = BeamSearch(trainer.encoder, trainer.net, width=1, top_k=1).search(env)
+    assert got.pairing[0] == -1  # skip was reachable at the root
+    mcts = PUCT(RNARLEnv, trainer.encoder, trainer.net, n_sim=1)
+    root_acts, P, _ = mcts._drive(mcts._priors(env))
+    assert root_acts == acts and P[("skip", None)] > 0.99
+
+class _PairedFirst:
+    """Uniform policy; value +1 once position 0 is paired, else -1."""
+    a_max = 256
+
+    def encode(self, seq, state):
+        return torch.tensor([float(state[1][0] != -1)])
+
+    def __call__(self, x):
+        return torch.zeros(len(x), self.a_max), 2 * x[:, 0] - 1
+
+def test_value_weight_changes_which_beams_survive():
+    seq = "GGGAAAACCCAAAAAAAA"
+    stub = _PairedFirst()
+    by_energy = BeamSearch(stub, stub, width=1, top_k=8, value_weight=0.0).search(RNARLEnv(seq))
+    by_value = BeamSearch(stub, stub, width=1, top_k=8, value_weight=100.0).search(RNARLEnv(seq))
+    assert by_energy.pairing[0] == -1 and by_value.pairing[0] != -1
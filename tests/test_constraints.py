@@ -0,0 +1,72 @@
+import random
+import numpy as np
+import pytest
+from rl_essential.constraints import Constraints
+from rl_essential.energy import TurnerEnergyModel
+from rl_essential.env import RNARLEnv
+from rl_essential.folding import Folder
+from rl_essential.mcts import PUCT
+from rl_essential.mfe import MFEFolder, allowed_pairs
+
+def _satisfies(pairing, c):
+    return (all(pairing[k] == -1 for k in c.unpaired) and all(pairing[i] == j for i, j in c.pairs)
+            and all(pairing[i] != j for i, j in c.forbidden))
+
+def _random_constraints(seq, rng):
+    """A few unpaired/forbidden positions plus one forced pair taken from a legal pair."""
+    n, ok = len(seq), allowed_pairs(seq, 2)
+    legal = [(i, j) for i in range(n) for j in range(n) if ok[i, j]]
+    pairs = [rng.choice(legal)] if legal and rng.random() < 0.7 else []
+    used = {k for p in pairs for k in p}
+    unpaired = {k for k in rng.sample(range(n), 2) if k not in used}
+    forbidden = {p for p in rng.sample(legal, min(2, len(legal))) if p not in pairs}
+    return Constraints.build(unpaired, pairs, forbidden)
+
+def test_constrained_mfe_matches_exhaustive_search(structures):
+    E = TurnerEnergyModel()
+    rng = random.Random(4)
+    for _ in range(25):
+        seq = "".join(rng.choice("AUGC") for _ in range(rng.randint(6, 13)))
+        c = _random_constraints(seq, rng)
+        best = float("inf")
+        for pairs in structures(0, len(seq) - 1, allowed_pairs(seq, 2)):
+            p = [-1] * len(seq)
+            for i, j in pairs.items():
+                p[i], p[j] = j, i
+            if _satisfies(p, c):
+                best = min(best, E.total_energy(seq, p))
+        mask = c.mask(seq, 2)
+        pairing, e = MFEFolder(E, 2).fold(seq, allowed=allowed_pairs(seq, 2) & mask, forced=c.pairs)
+        assert _satisfies(pairing, c) and abs(e - best) < 1e-9
+        # every rollout of the constrained env stays feasible
+        env = RNARLEnv(seq, min_pair_separation=2, constraints=c)
+        assert all(env.pairing[i] == j for i, j in c.pairs)
+        while env.i < env.n:
+            acts = env.valid_actions()
+            env.step(rng.choice(acts + [("skip", None)]) if acts else ("pair", None))
+        assert _satisfies(env.pairing, c)
+
+def test_every_policy_honours_constraint_string():
+    seq = "GGGGAAACCCCAUAUGGGAAACCCAU"
+    spec = "x(........)".ljust(16, ".") + "xxx".ljust(len(seq) - 16, ".")  # (1,10) is G-C
+    c = Constraints.parse(spec)
+    torch = pytest.importorskip("torch")
+    torch.manual_seed(0)
+    for folder in (Folder("mfe"), Folder("dq"), Folder("beam"), Folder("mcts", sims=4),
+                   Folder("mcts", sims=4, prior_mix=0.5), Folder("mfe", bpp_top_k=1)):
+        pairing, energy = folder.fold(seq, constraints=spec)
+        assert _satisfies(pairing, c), folder.policy
+        assert energy == folder.energy.total_energy(seq, pairing)
+    # the MCTS bpp prior comes from the constrained ensemble, not the free one
+    folder = Folder("mcts", prior_mix=1.0)
+    env = RNARLEnv(seq, constraints=spec)
+    mcts = PUCT(RNARLEnv, folder.trainer.encoder, folder.trainer.net, n_sim=1, bpp=folder.bpp, prior_mix=1.0)
+    acts, P, _ = mcts._drive(mcts._priors(env))
+    row = folder.bpp.pair_probs(seq, np.triu(env.allowed, 1))[env.i]
+    assert not np.allclose(row, folder.bpp.pair_probs(seq)[env.i])
+    q = [row[j] for _, j in acts[:-1]] + [max(0.0, 1.0 - row.sum())]
+    assert P[("skip", None)] == pytest.approx(q[-1] / sum(q))
+    with pytest.raises(ValueError):
+        Constraints.parse("((..").mask("GGAC")
+    with pytest.raises(ValueError):
+        Folder("mfe").fold("AGGAAACCC", constraints="(.......)")  # A-C cannot pair
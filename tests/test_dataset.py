@@ -0,0 +1,33 @@
+import pytest
+from rl_essential.dataset import SequenceDataset, bucket_by_length, read_records
+from rl_essential.utils.structures import from_dot_bracket, to_dot_bracket
+
+def test_read_and_bucket(tmp_path):
+    path = tmp_path / "mix.dbn"
+    path.write_text(
+        ">a\nGGGAAA\nCCC\n(((...)))\n"
+        "#Name: b\nacgtACGT\n"
+        ">c\nGCNC\n"
+        ">d\n" + "A" * 40 + "\n"
+    )
+    recs = list(read_records(str(path)))
+    assert [r.id for r in recs] == ["a", "b", "c", "d"]
+    assert recs[0].seq == "GGGAAACCC" and recs[0].structure == "(((...)))"
+    assert recs[1].seq == "ACGUACGU" and recs[1].structure is None
+    ds = SequenceDataset(str(path))
+    assert [r.id for r in ds] == ["a", "b", "d"]  # 'N' dropped
+    batches = list(bucket_by_length(iter(ds), batch_size=2, bucket_width=16))
+    assert [[r.id for r in b] for b in batches] == [["a", "b"], ["d"]]
+    shards = [{r.id for r in SequenceDataset(str(path), rank=k, world=2)} for k in range(2)]
+    assert shards[0] | shards[1] == {"a", "b", "d"} and not shards[0] & shards[1]
+
+def test_mismatched_structure_is_skipped_with_a_warning(tmp_path):
+    path = tmp_path / "bad.dbn"
+    path.write_text(">a\nGGGAAACCC\n(((...)))\n>bad\nGGGAAACCC\n((...))\n>c\nACGU\n")
+    with pytest.warns(UserWarning, match="'bad'"):
+        recs = list(read_records(str(path)))
+    assert [r.id for r in recs] == ["a", "c"]
+
+def test_dot_bracket_roundtrip():
+    db = "((..((...))..))..."
+    assert to_dot_bracket(from_dot_bracket(db)) == db
@@ -0,0 +1,62 @@
+import random
+import pytest
+from rl_essential.domains import DomainFolder, plan_domains, stitch
+from rl_essential.energy import TurnerEnergyModel
+from rl_essential.mfe import MFEFolder
+from rl_essential.utils.structures import is_valid_pair
+
+def _check_nested(seq, pairing):
+    pairs = [(i, j) for i, j in enumerate(pairing) if j > i]
+    assert all(pairing[j] == i and is_valid_pair(seq[i], seq[j]) for i, j in pairs)
+    assert not any(a < c < b < d for a, b in pairs for c, d in pairs)
+
+def test_plan_partitions_sequence_and_stitches_nested_structure():
+    rng = random.Random(0)
+    seq = "".join(rng.choice("AUGC") for _ in range(700))
+    plan = plan_domains(seq, max_domain=120)
+    assert plan.helices and all(len(d) <= 120 for d in plan.domains)
+    covered = sorted(k for d in plan.domains for k in d)
+    covered += [k for i, j, L in plan.helices for k in (*range(i, i + L), *range(j - L + 1, j + 1))]
+    assert sorted(covered) == list(range(len(seq)))
+    mfe = MFEFolder()
+    folds = [mfe.fold("".join(seq[k] for k in d))[0] for d in plan.domains]
+    _check_nested(seq, stitch(len(seq), plan, folds))
+
+def test_domain_folder_matches_whole_fold_on_short_sequences():
+    rng = random.Random(1)
+    seqs = ["".join(rng.choice("AUGC") for _ in range(n)) for n in (40, 260)]
+    with DomainFolder({"policy": "mfe"}, max_domain=100, workers=2) as df:
+        short, long_ = (df.fold(s) for s in seqs)
+    assert short == MFEFolder().fold(seqs[0])  # fits one domain: plain fold
+    _check_nested(seqs[1], long_[0])
+    assert long_[1] == TurnerEnergyModel().total_energy(seqs[1], long_[0])
+
+def test_helixless_domains_split_into_balanced_chunks():
+    plan = plan_domains("A" * 401, max_domain=200)
+    assert not plan.helices and sorted(len(d) for d in plan.domains) == [133, 134, 134]
+    assert sorted(k for d in plan.domains for k in d) == list(range(401))
+
+class _LoneBases(TurnerEnergyModel):
+    def exterior_run_energy(self, L):
+        return -5.0 * L  # unpaired runs pay off, so the MFE pairs far less
+
+def test_domain_workers_fold_under_the_callers_energy_model():
+    rng = random.Random(2)
+    seq = "".join(rng.choice("AUGC") for _ in range(60))
+    E = _LoneBases()
+    with DomainFolder({"policy": "mfe"}, max_domain=100, workers=1, energy_model=E) as df:
+        pairing, energy = df.fold(seq)
+    assert pairing == MFEFolder(E).fold(seq)[0] != MFEFolder().fold(seq)[0]
+    assert energy == E.total_energy(seq, pairing)
+
+def test_domain_worker_profiles_merge_into_the_parent():
+    pytest.importorskip("torch")
+    from rl_essential.utils.profiling import PROFILER
+    PROFILER.enable()
+    try:
+        with DomainFolder({"policy": "beam"}, max_domain=100, workers=1) as df:
+            df.fold("GGGGAAACCCCAUAUGGGAAACCCAU")
+        assert PROFILER.calls["beam.evaluate"] > 0  # only the workers run the network
+    finally:
+        PROFILER.disable()
+        PROFILER.reset()
@@ -0,0 +1,16 @@
+import random
+from rl_essential.env import RNARLEnv
+
+def _reference_actions(env):
+    return [("pair", j) for j in range(env.i + 1, env.n)
+            if env.pairing[j] == -1 and env._pair_allowed(env.i, j)]
+
+def test_legal_mask_matches_pair_rules():
+    rng = random.Random(0)
+    for _ in range(50):
+        seq = "".join(rng.choice("AUGC") for _ in range(rng.randint(5, 40)))
+        env = RNARLEnv(seq, min_pair_separation=rng.choice([1, 4]))
+        while env.i < env.n:
+            acts = env.valid_actions()
+            assert acts == _reference_actions(env)
+            env.step(rng.choice(acts + [("skip", None)]) if acts else ("pair", None))
@@ -0,0 +1,67 @@
+import asyncio, json
+from rl_essential.constraints import Constraints
+from rl_essential.energy import TurnerEnergyModel
+from rl_essential.fold_cache import FoldCache, fold_key
+from rl_essential.folding import Folder
+from rl_essential.server import FoldServer
+
+def test_fold_key_covers_every_input():
+    base = fold_key("GGGAAACCC", "v1", "e1")
+    assert base == fold_key("GGGAAACCC", "v1", "e1", 4, None)
+    others = [fold_key("GGGAAACCA", "v1", "e1"), fold_key("GGGAAACCC", "v2", "e1"),
+              fold_key("GGGAAACCC", "v1", "e2"), fold_key("GGGAAACCC", "v1", "e1", 3),
+              fold_key("GGGAAACCC", "v1", "e1", 4, "x........")]
+    assert len({base, *others}) == 6
+    spec = "(.......)"
+    assert fold_key("GGGAAACCC", "v1", "e1", 4, spec) == fold_key("GGGAAACCC", "v1", "e1", 4, Constraints.parse(spec))
+
+def test_energy_fingerprint_tracks_parameters():
+    class Cheaper(TurnerEnergyModel):
+        def exterior_run_energy(self, L):
+            return 3.0 + 0.2 * L
+    assert TurnerEnergyModel().fingerprint() == TurnerEnergyModel().fingerprint()
+    assert Cheaper().fingerprint() != TurnerEnergyModel().fingerprint()
+
+def test_entries_persist_and_least_recently_used_are_evicted(tmp_path):
+    path = str(tmp_path / "folds.sqlite")
+    with FoldCache(path, max_entries=10) as cache:
+        for k in range(10):
+            cache.put(f"k{k}", "((...))", -1.0 * k, {"time_ms": k})
+        assert cache.get("k0")["stats"] == {"time_ms": 0}  # k0 is now the most recently used
+        assert cache.get("missing") is None
+        cache.put("k10", "(...)", 0.5)
+        assert cache.evicted >= 1 and len(cache) <= 10
+        assert cache.get("k0") is not None and cache.get("k1") is None
+    with FoldCache(path, max_entries=10) as cache:
+        assert cache.get("k10") == {"dot_bracket": "(...)", "energy": 0.5, "stats": {}}
+        assert cache.stats()["entries"] == len(cache)
+
+def test_server_answers_repeats_from_cache(tmp_path):
+    folder = Folder("mfe")
+    server = FoldServer({"mfe": folder}, threads=2, cache=FoldCache(str(tmp_path / "c.sqlite")))
+    seq = "GGGGAAACCCCAUAUGGGAAACCCAU"
+
+    async def run():
+        srv = await server.start("127.0.0.1", 0)
+        reader, writer = await asyncio.open_connection(*srv.sockets[0].getsockname()[:2])
+        replies = []
+        for k, constraints in enumerate([None, None, "x" + "." * (len(seq) - 1)]):
+            msg = {"id": k, "seq": seq}
+            if constraints:
+                msg["constraints"] = constraints
+            writer.write((json.dumps(msg) + "\n").encode())
+            replies.append(json.loads(await reader.readline()))
+        writer.close()
+        srv.close()
+        await srv.wait_closed()
+        return replies
+
+    try:
+        first, again, constrained = asyncio.run(run())
+        stats = server.stats()["cache"]
+    finally:
+        server.close()
+    assert "cached" not in first and again["cached"] is True
+    assert (again["dot_bracket"], again["energy"]) == (first["dot_bracket"], first["energy"])
+    assert "cached" not in constrained and constrained["dot_bracket"][0] == "."
+    assert stats["hits"] == 1 and stats["entries"] == 2
@@ -0,0 +1,33 @@
+import os, subprocess, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# energy/env/Double-Q startup, numpy included; ~80 ms on a dev box, generous for CI
+IMPORT_BUDGET_MS = 500
+
+def _importtime(stmt):
+    """-> ({module: cumulative us}, total us of the outermost imports)"""
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", stmt], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stderr
+    mods, total = {}, 0
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cum, name = line.split("|")
+        mods[name.strip()] = int(cum)
+        if not name.startswith("  "):  # " name" is outermost; nested imports are indented further
+            total += int(cum)
+    return mods, total
+
+def test_light_paths_skip_torch_and_matplotlib():
+    mods, total = _importtime("import rl_essential.energy, rl_essential.env, rl_essential.agents, "
+                              "rl_essential.folding, rl_essential.mcts, rl_essential.utils.visualizer")
+    heavy = sorted(m for m in mods if m.split(".")[0] in ("torch", "matplotlib"))
+    assert not heavy, heavy
+    assert total / 1e3 < IMPORT_BUDGET_MS, f"{total / 1e3:.0f} ms"
+
+def test_top_level_api_is_lazy():
+    stmt = "import sys, rl_essential as r; r.TurnerEnergyModel; print(' '.join(sys.modules))"
+    mods = subprocess.run([sys.executable, "-c", stmt], cwd=ROOT, capture_output=True, text=True,
+                          check=True).stdout.split()
+    assert "rl_essential.energy" in mods
+    assert "rl_essential.env" not in mods and "numpy" not in mods
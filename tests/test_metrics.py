@@ -0,0 +1,31 @@
+from rl_essential.folding import model_version
+from rl_essential.metrics import aggregate, pair_scores
+
+def test_pair_scores_and_aggregate():
+    s = pair_scores("((...))..", "(((...)))")
+    assert (s["tp"], s["fp"], s["fn"]) == (0, 2, 3) and s["f1"] == 0.0
+    s = pair_scores("((....))", "(((..)))")
+    assert (s["tp"], s["fp"], s["fn"]) == (2, 0, 1) and s["ppv"] == 1.0
+    s = pair_scores([7, 6, -1, -1, -1, -1, 1, 0], "((....))")
+    assert s["sensitivity"] == s["ppv"] == s["f1"] == 1.0
+    assert pair_scores("....", "....")["f1"] == 1.0
+    s = pair_scores("(((...)))..", "((.....))..")
+    assert (s["tp"], s["fp"], s["fn"]) == (2, 1, 0) and abs(s["f1"] - 0.8) < 1e-12
+    agg = aggregate([dict(s, energy_gap=1.0), dict(pair_scores("((....))", "((....))"), energy_gap=3.0)])
+    assert agg["n"] == 2 and agg["mean_energy_gap"] == 2.0
+    assert agg["micro_sensitivity"] == 1.0 and abs(agg["micro_ppv"] - 4 / 5) < 1e-12
+    assert abs(agg["mean_f1"] - 0.9) < 1e-12
+
+def test_model_version_tracks_what_changes_predictions(tmp_path):
+    assert model_version("mfe") == model_version("mfe", sims=7, device="cuda", prior_mix=0.0)
+    assert model_version("mfe") != model_version("mfe", stem_min_length=2)
+    ckpt = tmp_path / "dq.qtab"
+    ckpt.write_bytes(b"table v1")
+    v1 = model_version("dq", str(ckpt))
+    assert v1 == model_version("dq", str(ckpt), sims=10)
+    ckpt.write_bytes(b"table v2")
+    assert model_version("dq", str(ckpt)) != v1
+    az = tmp_path / "az.pt"
+    az.write_bytes(b"weights")
+    assert model_version("mcts", str(az), sims=8) != model_version("mcts", str(az), sims=16)
+    assert model_version("mcts", sims=8) is None and model_version("beam") is None
@@ -0,0 +1,18 @@
+import random
+from rl_essential.energy import TurnerEnergyModel
+from rl_essential.mfe import allowed_pairs, mfe_fold
+
+def test_mfe_matches_exhaustive_search(structures):
+    E = TurnerEnergyModel()
+    rng = random.Random(1)
+    for _ in range(25):
+        seq = "".join(rng.choice("AUGC") for _ in range(rng.randint(6, 13)))
+        pairing, e = mfe_fold(seq, min_pair_separation=2)
+        best = float("inf")
+        for pairs in structures(0, len(seq) - 1, allowed_pairs(seq, 2)):
+            p = [-1] * len(seq)
+            for i, j in pairs.items():
+                p[i], p[j] = j, i
+            best = min(best, E.total_energy(seq, p))
+        assert abs(e - best) < 1e-9
+        assert e == E.total_energy(seq, pairing)
@@ -0,0 +1,51 @@
+import math
+import random
+import numpy as np
+from rl_essential.energy import TurnerEnergyModel
+from rl_essential.env import RNARLEnv
+from rl_essential.mfe import allowed_pairs
+from rl_essential.partition import KT, McCaskill, candidate_mask
+
+def test_pair_probs_match_exhaustive_ensemble(structures):
+    E = TurnerEnergyModel()
+    rng = random.Random(2)
+    for _ in range(20):
+        seq = "".join(rng.choice("AUGC") for _ in range(rng.randint(4, 12)))
+        Z, P = 0.0, np.zeros((len(seq), len(seq)))
+        for pairs in structures(0, len(seq) - 1, allowed_pairs(seq, 2)):
+            p = [-1] * len(seq)
+            for i, j in pairs.items():
+                p[i], p[j] = j, i
+            w = math.exp(-E.total_energy(seq, p) / KT)
+            Z += w
+            for i, j in pairs.items():
+                P[i, j] += w
+                P[j, i] += w
+        probs, logZ = McCaskill(E, 2).compute(seq)
+        assert abs(logZ - math.log(Z)) < 1e-9
+        assert np.abs(probs - P / Z).max() < 1e-9
+    # max_span is the same as banning long pairs in `allowed`
+    seq = "".join(rng.choice("AUGC") for _ in range(40))
+    banned = allowed_pairs(seq, 3) & ~np.triu(np.ones((40, 40), dtype=bool), 9)
+    assert np.allclose(McCaskill(E, 3, max_span=8).pair_probs(seq), McCaskill(E, 3).pair_probs(seq, banned))
+
+def test_energy_matrices_match_scalar_terms():
+    E = TurnerEnergyModel()
+    seq = "GGAAACUUCGAGCUUGCCAUGGAAAU"
+    S, H = E.stack_energy_matrix(seq), E.hairpin_energy_matrix(seq)
+    for i in range(len(seq)):
+        for j in range(i, len(seq)):
+            assert abs(H[i, j] - E.hairpin_energy(seq, i, j)) < 1e-12
+            if j - i >= 2:
+                assert S[i, j] == E.stack_energy(seq, i, j)
+
+def test_candidate_mask_restricts_env():
+    seq = "GGGGAAACCCCAUAUGGGAAACCCAU"
+    probs = McCaskill().pair_probs(seq)
+    cand = candidate_mask(probs, top_k=1)
+    assert (cand == cand.T).all() and np.triu(cand, 1).sum(axis=1).max() <= 1
+    env = RNARLEnv(seq, candidates=cand)
+    while env.i < env.n:
+        acts = env.valid_actions()
+        assert all(cand[env.i, j] for _, j in acts)
+        env.step(acts[0] if acts else ("skip", None))
@@ -0,0 +1,35 @@
+import time
+from rl_essential.utils.profiling import Profiler
+
+def test_disabled_profiler_records_nothing():
+    prof = Profiler()
+    with prof.span("outer"):
+        prof.count("hits")
+    assert prof.summary() == {"timers": {}, "counters": {}}
+
+def test_spans_split_self_time_and_summaries_merge():
+    prof = Profiler()
+    prof.enable()
+    for _ in range(2):
+        with prof.span("outer"):
+            with prof.span("inner"):
+                time.sleep(0.002)
+            prof.count("hits", 3)
+    s = prof.summary()
+    outer, inner = s["timers"]["outer"], s["timers"]["inner"]
+    assert list(s["timers"]) == ["outer", "inner"]  # sorted by total time
+    assert outer["calls"] == inner["calls"] == 2 and s["counters"] == {"hits": 6}
+    assert outer["total_s"] >= inner["total_s"] >= 0.004
+    assert abs(outer["self_s"] - (outer["total_s"] - inner["total_s"])) < 1e-9
+    # a pool worker's summary adds onto the parent's
+    parent = Profiler()
+    parent.enable()
+    parent.count("hits")
+    parent.merge(s)
+    parent.merge(s)
+    m = parent.summary()
+    assert m["counters"] == {"hits": 13}
+    assert m["timers"]["inner"]["calls"] == 4
+    assert abs(m["timers"]["outer"]["total_s"] - 2 * outer["total_s"]) < 1e-9
+    parent.reset()
+    assert parent.summary() == {"timers": {}, "counters": {}}
@@ -0,0 +1,12 @@
+from rl_essential.agents.q_checkpoint import CompactQTable, save_q_tables
+
+def test_qtab_roundtrip(tmp_path):
+    Q1 = {(0, 0, 0.0): {("pair", 8): 1.0, ("pair", 5): -2.0}, (3, 1, 0.25): {("pair", 7): 0.5}}
+    Q2 = {(0, 0, 0.0): {("pair", 8): 0.5, ("pair", 6): 3.0}}
+    path = str(tmp_path / "dq.qtab")
+    save_q_tables(path, Q1, Q2)
+    t = CompactQTable.open(path)
+    assert len(t) == 4
+    assert list(t.values((0, 0, 0.0), [5, 6, 8, 9])) == [-2.0, 3.0, 1.5, 0.0]
+    assert t.greedy((0, 0, 0.0), [("pair", 8), ("pair", 6)]) == ("pair", 6)
+    assert list(t.values((9, 9, 0.5), [1, 2])) == [0.0, 0.0]
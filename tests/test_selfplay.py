@@ -0,0 +1,84 @@
+import random
+import numpy as np
+import pytest
+torch = pytest.importorskip("torch")
+from rl_essential.env import RNARLEnv
+from rl_essential.learners.az_trainers import AlphaZeroTrainer
+from rl_essential.mcts import PUCT
+from rl_essential.selfplay import SelfPlay
+
+def _seqs(k, n, seed=0):
+    rng = random.Random(seed)
+    return ["".join(rng.choice("AUGC") for _ in range(n)) for _ in range(k)]
+
+def test_search_steps_matches_search():
+    torch.manual_seed(0)
+    trainer = AlphaZeroTrainer(encoder="graph")
+    seq = _seqs(1, 30)[0]
+    mcts = PUCT(RNARLEnv, trainer.encoder, trainer.net, n_sim=12)
+    expected = mcts.search(RNARLEnv(seq))
+    steps, calls = mcts.search_steps(RNARLEnv(seq)), 0
+    try:
+        leaf = next(steps)
+        while True:
+            calls += 1
+            with torch.no_grad():
+                leaf = steps.send(trainer.net(trainer.encoder.encode_batch([leaf])))
+    except StopIteration as stop:
+        got = stop.value
+    assert got == expected
+    assert 1 <= calls <= 13  # root + at most one expansion per simulation
+
+def test_single_lockstep_game_replays_play_episode():
+    torch.manual_seed(0)
+    trainer = AlphaZeroTrainer(encoder="graph")
+    sp = SelfPlay(RNARLEnv, trainer.encoder, trainer.net, mcts_sims=8)
+    seq = _seqs(1, 30)[0]
+    np.random.seed(0)
+    traj, info = sp.play_episode(seq)
+    np.random.seed(0)
+    [(traj2, info2)] = list(sp.play_games([seq], games=1))
+    assert info2 == info
+    assert [(s, st, list(pi), r) for s, st, pi, r in traj2] == [(s, st, list(pi), r) for s, st, pi, r in traj]
+
+def test_lockstep_games_batch_forwards_and_write_every_trajectory():
+    torch.manual_seed(0)
+    trainer = AlphaZeroTrainer(encoder="graph")
+    sizes = []
+    net = trainer.net
+    batched = lambda x: (sizes.append(len(x)), net(x))[1]
+    written = []
+
+    class Writer:
+        def add_trajectory(self, traj, net_version=0):
+            written.append((traj[0][0], net_version))
+
+    sp = SelfPlay(RNARLEnv, trainer.encoder, batched, mcts_sims=4, writer=Writer(), net_version=3)
+    seqs = _seqs(5, 24, seed=1)
+    results = list(sp.play_games(seqs, games=3))
+    assert sorted(traj[0][0] for traj, _ in results) == sorted(seqs)
+    assert sorted(written) == sorted((s, 3) for s in seqs)
+    for traj, info in results:
+        assert all(r == -info["energy"] for _, _, _, r in traj)
+    assert max(sizes) == 3 and len(sizes) < sum(sizes)
+
+def test_encode_batch_rows_match_the_helix_reference():
+    from rl_essential.networks.encoder import SimpleEncoder
+    from rl_essential.networks.graph_encoder import GraphEncoder
+    rng = random.Random(5)
+    seq = "".join(rng.choice("AUGC") for _ in range(60))
+    pairing = [-1] * 60
+    for i, j, L in [(0, 59, 20), (22, 40, 3), (44, 50, 1)]:  # one helix per histogram bin
+        for t in range(L):
+            pairing[i + t], pairing[j - t] = j - t, i + t
+    items = [(seq, (0, [-1] * 60)), (seq, (30, pairing))]
+    graph = GraphEncoder()
+    X = graph.encode_batch(items)
+    hist = [0] * 5
+    for _, _, L in graph._helices(pairing):
+        hist[graph._helix_bin(L)] += 1
+    assert X[1, 24:].tolist() == hist == [1, 1, 0, 0, 1]
+    for enc in (graph, SimpleEncoder()):
+        rows = enc.encode_batch(items)
+        for b, (s, st) in enumerate(items):
+            assert torch.equal(rows[b], enc.encode(s, st))
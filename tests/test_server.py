@@ -0,0 +1,41 @@
+import asyncio, json, random
+import pytest
+torch = pytest.importorskip("torch")
+from rl_essential.evaluator import BatchedEvaluator
+from rl_essential.folding import Folder
+from rl_essential.server import FoldServer
+from rl_essential.utils.structures import to_dot_bracket
+
+def test_server_batches_concurrent_mcts_folds():
+    rng = random.Random(0)
+    seqs = ["".join(rng.choice("AUGC") for _ in range(rng.randint(14, 24))) for _ in range(6)]
+    torch.manual_seed(0)
+    folder = Folder("mcts", sims=8)
+    expected = [to_dot_bracket(folder.fold(s)[0]) for s in seqs]
+    folder.evaluator = BatchedEvaluator(folder.trainer.net, max_batch=8, max_wait_ms=5.0)
+    server = FoldServer({"mcts": folder}, threads=6)
+
+    async def run():
+        srv = await server.start("127.0.0.1", 0)
+        reader, writer = await asyncio.open_connection(*srv.sockets[0].getsockname()[:2])
+        for k, s in enumerate(seqs):
+            writer.write((json.dumps({"id": k, "seq": s}) + "\n").encode())
+        writer.write(b'{"id": "bad", "seq": "GGNAC"}\n')
+        replies = [json.loads(await reader.readline()) for _ in range(len(seqs) + 1)]
+        writer.write(b'{"cmd": "stats"}\n')
+        stats = json.loads(await reader.readline())
+        writer.close()
+        srv.close()
+        await srv.wait_closed()
+        return replies, stats
+
+    try:
+        replies, stats = asyncio.run(run())
+    finally:
+        server.close()
+    by_id = {r["id"]: r for r in replies}
+    assert [by_id[k]["dot_bracket"] for k in range(len(seqs))] == expected
+    assert "error" in by_id["bad"]
+    ev = stats["evaluators"]["mcts"]
+    assert stats["requests"] == len(seqs) + 1 and stats["errors"] == 1
+    assert ev["batches"] < ev["requests"] and ev["max_batch"] > 1
@@ -0,0 +1,33 @@
+from rl_essential.shards import ShardLoader, ShardWriter
+
+def test_roundtrip_and_window(tmp_path):
+    root = str(tmp_path / "sp")
+    with ShardWriter(root, max_len=16, pi_width=4, shard_size=3) as w:
+        for v in range(3):
+            for k in range(4):
+                w.add("GGGAAACCC", (k, [8, -1, -1, -1, -1, -1, -1, -1, 0]), [0.5, 0.5], float(v), net_version=v)
+    loader = ShardLoader(root, seed=0)
+    assert len(loader) == 12
+    batches = list(loader.iter_batches(5))
+    assert sum(len(b) for b in batches) == 12
+    seq, (i, pairing), pi, value = batches[0][0]
+    assert seq == "GGGAAACCC" and pairing[0] == 8 and len(pairing) == 9
+    assert pi == [0.5, 0.5, 0.0, 0.0]
+    recent = ShardLoader(root, window=1)
+    assert recent.net_versions == [2] and len(recent) == 4
+
+
+def test_writer_killed_before_close(tmp_path):
+    root = str(tmp_path / "sp")
+    with ShardWriter(root, max_len=16, pi_width=4) as w:
+        w.add("GGGAAACCC", (0, [-1] * 9), [1.0], 0.0, net_version=0)
+    dead = ShardWriter(root, max_len=16, pi_width=4)
+    for _ in range(5):
+        dead.add("AAAAAAAAA", (0, [-1] * 9), [1.0], -1.0, net_version=1)
+    dead._f.close()  # killed: records hit disk, index.json never updated
+    with ShardWriter(root, max_len=16, pi_width=4) as w:
+        w.add("CCCCCCCCC", (1, [-1] * 9), [1.0], 1.0, net_version=1)
+    loader = ShardLoader(root)
+    assert len(loader) == 2
+    seqs = sorted(b[0] for batch in loader.iter_batches(8, shuffle=False) for b in batch)
+    assert seqs == ["CCCCCCCCC", "GGGAAACCC"]
@@ -0,0 +1,49 @@
+import random
+import pytest
+from rl_essential.energy import TurnerEnergyModel
+from rl_essential.env import RNARLEnv
+from rl_essential.mcts import PUCT
+from rl_essential.stems import StemIndex
+from rl_essential.utils.structures import is_valid_pair
+
+def test_stem_index_matches_helix_scan():
+    E = TurnerEnergyModel()
+    rng = random.Random(0)
+    for _ in range(60):
+        n, sep = rng.randint(1, 30), rng.randint(1, 5)
+        seq = "".join(rng.choice("AUGC") for _ in range(n))
+        ok = lambda i, j: 0 <= i < j < n and j - i >= sep and is_valid_pair(seq[i], seq[j])
+        idx = StemIndex(seq, sep, E)
+        for i in range(n):
+            for j in range(i + 1, n):
+                a, b, L, e = i, j, 0, 0.0
+                while ok(i, j) and ok(a - 1, b + 1):
+                    a, b = a - 1, b + 1
+                while ok(a + L, b - L):
+                    e += E.stack_energy(seq, a + L - 1, b - L + 1) if L else 0.0
+                    L += 1
+                assert idx.length[i, j] == L
+                assert abs(idx.energy[i, j] - e) < 1e-4
+
+def test_stems_filter_order_and_prior():
+    torch = pytest.importorskip("torch")
+    from rl_essential.networks.graph_encoder import GraphEncoder
+    from rl_essential.networks.policy_value import PolicyValueNet
+    seq = "GGGGAAACCCCAUAUGGGAAACCCAUGCAUCG"
+    idx = StemIndex(seq)
+    env = RNARLEnv(seq, candidates=idx.mask(3), stems=idx)
+    acts = env.valid_actions()
+    js = [j for _, j in acts]
+    assert js and all(idx.length[0, j] >= 3 for j in js)
+    assert js == sorted(js)  # the policy head's layout is never reordered
+    ranked = list(idx.order(0, js))
+    assert [idx.energy[0, j] for j in ranked] == sorted(idx.energy[0, j] for j in js)
+    q = idx.prior(0, ranked)
+    assert abs(q.sum() - 1) < 1e-12 and q[0] == q.max()
+    feats = GraphEncoder().candidate_features(env.state, js, env.stems)
+    assert feats.shape == (len(js), 2) and (feats[:, 0] >= 0.3).all()
+    # an MCTS over the filtered env still returns a policy over every valid action
+    torch.manual_seed(0)
+    mcts = PUCT(RNARLEnv, GraphEncoder(), PolicyValueNet(29), n_sim=8, stem_prior=0.5)
+    pi, cand = mcts.search(env)
+    assert cand == acts + [("skip", None)] and abs(sum(pi) - 1) < 1e-6
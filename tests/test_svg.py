@@ -0,0 +1,34 @@
+import json, os, subprocess, sys
+import xml.etree.ElementTree as ET
+from rl_essential.utils.structures import from_dot_bracket
+from rl_essential.utils.svg import write_rainbow_svg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NS = "{http://www.w3.org/2000/svg}"
+
+def _arcs(root):
+    return [p for p in root.iter(NS + "path") if "A" in p.get("d")]
+
+def test_write_rainbow_svg_is_utf8_xml(tmp_path):
+    seq, db = "GGGAAACCCAGGAAACCU", "(((...)))((...)).."
+    path = str(tmp_path / "hp.svg")
+    write_rainbow_svg(path, seq, from_dot_bracket(db), title="hairpin <1>")
+    root = ET.parse(path).getroot()
+    assert root.tag == NS + "svg"
+    assert len(_arcs(root)) == db.count("(")
+    title = next(root.iter(NS + "text")).text
+    assert title == "hairpin <1> — " + db
+    assert [t.text for t in root.iter(NS + "text")][1:] == list(seq)
+
+def test_render_batch_writes_one_svg_per_fold(tmp_path):
+    fasta, results, out = tmp_path / "in.fa", tmp_path / "res.jsonl", tmp_path / "plots"
+    fasta.write_text(">a/b\nGGGAAACCC\n>bad\nGGGAAACCC\n>failed\nGGGAAACCC\n")
+    results.write_text("".join(json.dumps(r) + "\n" for r in [
+        {"id": "a/b", "dot_bracket": "(((...)))"},
+        {"id": "bad", "dot_bracket": "((...))"},
+        {"id": "failed", "error": "boom"},
+    ]))
+    subprocess.run([sys.executable, "-m", "scripts.render_batch", "--results", str(results), "--fasta", str(fasta),
+                    "--out_dir", str(out), "--workers", "1"], cwd=ROOT, check=True, capture_output=True)
+    assert os.listdir(out) == ["a_b.svg"]
+    assert len(_arcs(ET.parse(out / "a_b.svg").getroot())) == 3